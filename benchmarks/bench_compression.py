@@ -0,0 +1,120 @@
+"""Benchmark compressed session storage: on-disk size against frame load time
+for each compression method and level.
+
+    python benchmarks/bench_compression.py --frames 200 --output results.json
+
+zstd variants are reported as skipped when zstandard is not installed.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+from bench_replay import load_frames, measure  # noqa: E402
+from synthetic import generate_session  # noqa: E402
+
+from auto_gpt_replay.compression import (  # noqa: E402
+    COMPRESSION_GZIP,
+    COMPRESSION_ZSTD,
+    compact_session,
+)
+from auto_gpt_replay.manifest import SessionManifest  # noqa: E402
+
+VARIANTS = (
+    ("none", None, None, False),
+    ("gzip-1", COMPRESSION_GZIP, 1, False),
+    ("gzip-6", COMPRESSION_GZIP, 6, False),
+    ("gzip-9", COMPRESSION_GZIP, 9, False),
+    ("zstd-3", COMPRESSION_ZSTD, 3, False),
+    ("zstd-10", COMPRESSION_ZSTD, 10, False),
+    ("zstd-19", COMPRESSION_ZSTD, 19, False),
+    ("zstd-10-dict", COMPRESSION_ZSTD, 10, True),
+)
+
+
+def session_size(session_path):
+    size = 0
+    for root, _, files in os.walk(session_path):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+
+def bench_variant(session_dir, session, frames, compression, level, dictionary):
+    if compression is not None:
+        compact_session(session_dir, session, compression, level, dictionary)
+
+    def load():
+        manifest = SessionManifest(session_dir, session).scan()
+        loaded = load_frames(session_dir, session, frames, None, manifest)
+        # Frames read the history lazily, touch it like a replay would
+        for frame in loaded:
+            frame.full_message_history
+        return len(loaded)
+
+    return {
+        "bytes": session_size(os.path.join(session_dir, session)),
+        "load": measure(load, repeat=3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed sessions.")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--context-messages", type=int, default=8)
+    parser.add_argument("--message-chars", type=int, default=800)
+    parser.add_argument("--label", default=None, help="Label stored with the results")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_dir = os.path.join(tmp_dir, "source")
+        session = generate_session(
+            source_dir,
+            frames=args.frames,
+            context_messages=args.context_messages,
+            message_chars=args.message_chars,
+        )
+        for name, compression, level, dictionary in VARIANTS:
+            session_dir = os.path.join(tmp_dir, name)
+            shutil.copytree(
+                os.path.join(source_dir, session), os.path.join(session_dir, session)
+            )
+            try:
+                results[name] = bench_variant(
+                    session_dir, session, args.frames, compression, level, dictionary
+                )
+            except ImportError as error:
+                results[name] = {"skipped": str(error)}
+
+    baseline = results["none"]["bytes"]
+    for result in results.values():
+        if "bytes" in result:
+            result["ratio"] = round(baseline / result["bytes"], 2)
+
+    output = json.dumps(
+        {
+            "label": args.label,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
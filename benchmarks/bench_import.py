@@ -0,0 +1,167 @@
+"""Benchmark the cold start of the plugin: importing the package and
+constructing ``AutoGPTReplay`` the way Auto-GPT does when it loads plugins,
+with replay disabled and enabled.
+
+    python benchmarks/bench_import.py --repeat 5 --output results.json
+
+Every run is a fresh interpreter started with ``python -X importtime``; only
+the imports made by the plugin are counted, the modules Auto-GPT has already
+imported by then are loaded before the measurement starts. The scenarios that
+need Auto-GPT are reported as skipped when it is not importable.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+MARKER = "-- replay import benchmark --"
+
+# Imported by Auto-GPT before it loads its plugins
+AUTOGPT_PRELOAD = (
+    "autogpt.agent.agent",
+    "autogpt.config.config",
+    "autogpt.logs",
+    "colorama",
+)
+
+SCENARIOS = {
+    "import": {
+        "code": "import auto_gpt_replay",
+        "env": {},
+        "preload": (),
+    },
+    "plugin": {
+        "code": "import auto_gpt_replay; auto_gpt_replay.AutoGPTReplay()",
+        "env": {"RUN_REPLAY": "False"},
+        "preload": (),
+    },
+    "plugin_replay": {
+        "code": "import auto_gpt_replay; auto_gpt_replay.AutoGPTReplay()",
+        "env": {"RUN_REPLAY": "True", "REPLAY_SESSION": "20230101_120000_Bench"},
+        "preload": AUTOGPT_PRELOAD,
+    },
+    # What the replay loads once the agent starts its loop
+    "replay_machinery": {
+        "code": "import auto_gpt_replay.mock",
+        "env": {},
+        "preload": AUTOGPT_PRELOAD,
+    },
+}
+
+RUNNER = """
+import importlib, json, sys, time
+for name in {preload!r}:
+    importlib.import_module(name)
+before = set(sys.modules)
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+{code}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": len(set(sys.modules) - before)}}))
+"""
+
+
+def parse_importtime(stderr):
+    # Top level imports after the marker, (module, cumulative microseconds)
+    imports = []
+    measuring = False
+    for line in stderr.splitlines():
+        if line == MARKER:
+            measuring = True
+            continue
+        if not measuring or not line.startswith("import time:"):
+            continue
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        if not name.startswith(" "):
+            imports.append((name, int(fields[1])))
+    return imports
+
+
+def run_scenario(scenario, cwd):
+    env = dict(os.environ)
+    env.update(scenario["env"])
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])
+    )
+    code = RUNNER.format(
+        preload=scenario["preload"], marker=MARKER, code=scenario["code"]
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else "exit code %d" % process.returncode)
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(process.stderr)
+    return result
+
+
+def bench_scenario(scenario, repeat, cwd):
+    # One run first so the timed runs find the bytecode cached
+    run_scenario(scenario, cwd)
+    runs = [run_scenario(scenario, cwd) for _ in range(repeat)]
+    best = min(runs, key=lambda run: run["seconds"])
+    return {
+        "best_ms": round(best["seconds"] * 1000, 3),
+        "median_ms": round(
+            sorted(run["seconds"] for run in runs)[len(runs) // 2] * 1000, 3
+        ),
+        "import_ms": round(sum(us for _, us in best["imports"]) / 1000, 3),
+        "modules": best["modules"],
+        "slowest_imports": [
+            {"module": name, "ms": round(us / 1000, 3)}
+            for name, us in sorted(best["imports"], key=lambda entry: -entry[1])[:5]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the plugin cold start.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--label", default=None, help="Label stored with the results")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    # An empty working directory, so no .env or sessions are picked up
+    with tempfile.TemporaryDirectory() as cwd:
+        for name, scenario in SCENARIOS.items():
+            try:
+                results[name] = bench_scenario(scenario, args.repeat, cwd)
+            except RuntimeError as error:
+                results[name] = {"skipped": str(error)}
+
+    output = json.dumps(
+        {
+            "label": args.label,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Benchmark the replay: session discovery, frame loading, exact and fuzzy
+message matching, command replay, embedding lookups, console output and
+MockIOFunctions dispatch on a synthetic session.
+
+    python benchmarks/bench_replay.py --frames 200 --output results.json
+
+Run it from a folder with a .env file (e.g. the Auto-GPT root), like the
+plugin itself. Results are emitted as JSON so runs of different versions can
+be compared.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+from synthetic import generate_session  # noqa: E402
+
+from auto_gpt_replay.archive import SessionArchive, pack_session  # noqa: E402
+from auto_gpt_replay.console import ReplayConsole  # noqa: E402
+from auto_gpt_replay.frame import Frame  # noqa: E402
+from auto_gpt_replay.fuzzy import FuzzyIndex, FuzzyMatcher  # noqa: E402
+from auto_gpt_replay.manifest import SessionManifest  # noqa: E402
+from auto_gpt_replay.session_index import SessionIndex  # noqa: E402
+
+WORKSPACE_ROOT = "/workspace"
+
+
+def measure(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ops = func()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "ops": ops,
+        "best": round(best, 6),
+        "mean": round(sum(timings) / len(timings), 6),
+        "per_op_us": round(best / ops * 1e6, 3) if ops else None,
+    }
+
+
+def quiet(msg):
+    pass
+
+
+def load_frames(session_dir, session, frames, archive=None, manifest=None):
+    return [
+        Frame(
+            index, session_dir, session, quiet, False, WORKSPACE_ROOT, archive, manifest
+        )
+        for index in range(1, frames + 1)
+    ]
+
+
+def bench_discovery(session_dir, sessions):
+    # Empty sessions older than the benchmark session, like a busy DEBUG folder
+    started = datetime(2022, 1, 1)
+    for i in range(sessions):
+        name = (started + timedelta(minutes=i)).strftime("%Y%m%d_%H%M%S")
+        os.makedirs(os.path.join(session_dir, f"{name}_Old"), exist_ok=True)
+
+    index = SessionIndex(session_dir)
+
+    def cold():
+        if os.path.exists(index.path):
+            os.remove(index.path)
+        index.latest()
+        return 1
+
+    def warm():
+        index.latest()
+        return 1
+
+    return {"cold": measure(cold), "warm": measure(warm, repeat=50)}
+
+
+def bench_frame_load(session_dir, session, frames):
+    def manifest():
+        session_manifest = SessionManifest(session_dir, session).scan()
+        return len(load_frames(session_dir, session, frames, None, session_manifest))
+
+    results = {
+        "loose": measure(lambda: len(load_frames(session_dir, session, frames))),
+        "manifest": measure(manifest),
+    }
+    pack_session(session_dir, session)
+    archive = SessionArchive.open(session_dir, session)
+    results["archive"] = measure(
+        lambda: len(load_frames(session_dir, session, frames, archive))
+    )
+    return results, archive
+
+
+def bench_matching(session_dir, session, frames, archive):
+    loaded = [
+        frame
+        for frame in load_frames(session_dir, session, frames, archive)
+        if frame.can_replay
+    ]
+    contexts = [list(frame.current_context) for frame in loaded]
+    miss = [{"role": "user", "content": "This prompt was never recorded."}]
+
+    def hit():
+        for frame, context in zip(loaded, contexts):
+            frame.try_replay_message(context)
+        return len(loaded)
+
+    def no_hit():
+        for frame in loaded:
+            frame.try_replay_message(miss)
+        return len(loaded)
+
+    return {"hit": measure(hit), "miss": measure(no_hit)}
+
+
+def bench_fuzzy_matching(session_dir, session, frames, archive):
+    loaded = [
+        frame
+        for frame in load_frames(session_dir, session, frames, archive)
+        if frame.can_replay
+    ]
+    # The same prompts at another time of day, with a reworded last message
+    prompts = []
+    for frame in loaded:
+        context = [dict(message) for message in frame.current_context]
+        context[1]["content"] = "The current time and date is some other time"
+        context[-1]["content"] += " Please."
+        prompts.append((frame.index, context))
+
+    def build():
+        FuzzyIndex.build(FuzzyMatcher(), loaded)
+        return len(loaded)
+
+    index = FuzzyIndex.build(FuzzyMatcher(), loaded)
+
+    def lookup():
+        for frame_index, context in prompts:
+            index.lookup(context, frame_index)
+        return len(prompts)
+
+    return {"build": measure(build, repeat=3), "lookup": measure(lookup)}
+
+
+def bench_command_replay(session_dir, session, frames, archive):
+    def replay():
+        # Fresh frames, a frame keeps its command result once it is looked up
+        loaded = load_frames(session_dir, session, frames, archive)
+        for frame in loaded[1:]:
+            frame.command_result
+        return len(loaded) - 1
+
+    def history_scan():
+        loaded = load_frames(session_dir, session, frames, archive)
+        for frame in loaded[1:]:
+            frame.try_replay_command_for_prev_frame()
+        return len(loaded) - 1
+
+    return {"result_lookup": measure(replay), "history_scan": measure(history_scan)}
+
+
+def bench_embeddings(session_dir, session, count=2000, dimensions=1536):
+    try:
+        import numpy as np
+
+        from auto_gpt_replay.embeddings import EmbeddingStore
+    except ImportError as error:
+        return {"skipped": f"NumPy is not importable: {error}"}
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimensions), dtype=np.float32)
+    texts = [f"Memory {i}" for i in range(count)]
+    store = EmbeddingStore.for_session(session_dir, session)
+    for text, vector in zip(texts, vectors):
+        store.add(text, vector)
+    store.save()
+    store = EmbeddingStore.open(session_dir, session)
+
+    def lookup():
+        for text in texts:
+            store.get(text)
+        return count
+
+    def nearest():
+        store.nearest(vectors[:100], k=5)
+        return 100
+
+    return {"lookup": measure(lookup), "nearest_batch": measure(nearest)}
+
+
+class TypingHandler(logging.StreamHandler):
+    # Auto-GPT's TypingConsoleHandler the way the replay used to run it: the
+    # typing delay patched to 0 on every record, the words still written and
+    # flushed one by one
+    def emit(self, record):
+        random.uniform = lambda a, b: 0
+        min_typing_speed = 0.05
+        max_typing_speed = 0.01
+        words = self.format(record).split()
+        for i, word in enumerate(words):
+            self.stream.write(word)
+            self.stream.flush()
+            if i < len(words) - 1:
+                self.stream.write(" ")
+                self.stream.flush()
+            time.sleep(random.uniform(min_typing_speed, max_typing_speed))
+            min_typing_speed = min_typing_speed * 0.95
+            max_typing_speed = max_typing_speed * 0.95
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+def bench_console_output(tmp_dir, records=5000):
+    message = "SYSTEM: Command write_to_file returned: File written to successfully."
+    uniform = random.uniform
+
+    def run(handler_class, buffered):
+        path = os.path.join(tmp_dir, "console.log")
+        with open(path, "w", encoding="utf-8") as stream:
+            log = logging.getLogger("bench_replay.console")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            handler = handler_class(stream)
+            log.addHandler(handler)
+            console = None
+            if buffered:
+                autogpt_logger = argparse.Namespace(
+                    typing_logger=log, logger=log, typing_console_handler=handler
+                )
+                console = ReplayConsole(stream=stream).install(autogpt_logger)
+            for _ in range(records):
+                log.info(message)
+            if console is not None:
+                console.restore()
+            log.removeHandler(handler)
+        random.uniform = uniform
+        return records
+
+    return {
+        "typing": measure(lambda: run(TypingHandler, False)),
+        "per_record": measure(lambda: run(logging.StreamHandler, False)),
+        "buffered": measure(lambda: run(TypingHandler, True)),
+    }
+
+
+def bench_dispatch(session_dir, session, frames):
+    try:
+        from auto_gpt_replay.mock import MockIOFunctions
+    except ImportError as error:
+        return {"skipped": f"Auto-GPT is not importable: {error}"}
+
+    contexts = [
+        (frame.index, list(frame.current_context))
+        for frame in load_frames(session_dir, session, frames)
+        if frame.can_replay
+    ]
+
+    def dispatch():
+        mock = MockIOFunctions(session_dir, session)
+        mock.workspace_root = WORKSPACE_ROOT
+        mock.normalizer.set_workspace_root(WORKSPACE_ROOT)
+        for index, context in contexts:
+            mock.current_frame = index
+            mock.replay_ChatCompletion_create(messages=context, model="gpt-3.5-turbo")
+        mock.prefetcher.shutdown()
+        return len(contexts)
+
+    return {"chat_completion": measure(dispatch, repeat=3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the replay.")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--context-messages", type=int, default=8)
+    parser.add_argument("--message-chars", type=int, default=800)
+    parser.add_argument("--history-limit", type=int, default=None)
+    parser.add_argument(
+        "--sessions", type=int, default=1000, help="Sessions for discovery"
+    )
+    parser.add_argument("--label", default=None, help="Label stored with the results")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        session_dir = os.path.join(tmp_dir, "logs", "DEBUG")
+        session = generate_session(
+            session_dir,
+            frames=args.frames,
+            context_messages=args.context_messages,
+            message_chars=args.message_chars,
+            history_limit=args.history_limit,
+        )
+
+        frame_load, archive = bench_frame_load(session_dir, session, args.frames)
+        results = {
+            "label": args.label,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+            "results": {
+                "session_discovery": bench_discovery(session_dir, args.sessions),
+                "frame_load": frame_load,
+                "message_matching": bench_matching(
+                    session_dir, session, args.frames, archive
+                ),
+                "fuzzy_matching": bench_fuzzy_matching(
+                    session_dir, session, args.frames, archive
+                ),
+                "command_replay": bench_command_replay(
+                    session_dir, session, args.frames, archive
+                ),
+                "embeddings": bench_embeddings(session_dir, session),
+                "console_output": bench_console_output(tmp_dir),
+                "mock_dispatch": bench_dispatch(session_dir, session, args.frames),
+            },
+        }
+        archive.close()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
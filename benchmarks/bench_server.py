@@ -0,0 +1,145 @@
+"""Benchmark the replay server under load: index build time, then requests per
+second and latency for concurrent keep-alive clients replaying the prompts of
+a synthetic session.
+
+    python benchmarks/bench_server.py --frames 200 --clients 1,16,64
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+from bench_replay import WORKSPACE_ROOT, load_frames, measure  # noqa: E402
+from synthetic import generate_session  # noqa: E402
+
+from auto_gpt_replay.report import MISS_STUB  # noqa: E402
+from auto_gpt_replay.server import ReplayIndex, ReplayServer  # noqa: E402
+
+
+def request_bytes(port, body):
+    return (
+        "POST /v1/chat/completions HTTP/1.1\r\n"
+        f"Host: 127.0.0.1:{port}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode("latin-1") + body
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.decode("latin-1").split("\r\n"):
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+
+
+async def client(port, requests, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for request in requests:
+        started = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        await read_response(reader)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def load_test(index, clients, requests_per_client, bodies):
+    server = ReplayServer(index, MISS_STUB)
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    requests = [request_bytes(port, body) for body in bodies]
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(
+                port,
+                [requests[(i + j) % len(requests)] for j in range(requests_per_client)],
+                latencies,
+            )
+            for i in range(clients)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    listener.close()
+    await listener.wait_closed()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        "hits": server.hits["chat"],
+        "misses": server.misses["chat"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the replay server.")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--context-messages", type=int, default=8)
+    parser.add_argument("--message-chars", type=int, default=800)
+    parser.add_argument(
+        "--clients", default="1,16,64", help="Comma separated concurrent clients"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Per client")
+    parser.add_argument("--label", default=None, help="Label stored with the results")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        session_dir = os.path.join(tmp_dir, "logs", "DEBUG")
+        session = generate_session(
+            session_dir,
+            frames=args.frames,
+            context_messages=args.context_messages,
+            message_chars=args.message_chars,
+        )
+        results["index_build"] = measure(
+            lambda: len(
+                ReplayIndex.build(session_dir, [session], WORKSPACE_ROOT).responses
+            ),
+            repeat=3,
+        )
+        index = ReplayIndex.build(session_dir, [session], WORKSPACE_ROOT)
+        bodies = [
+            json.dumps({"model": "gpt-4", "messages": frame.current_context}).encode()
+            for frame in load_frames(session_dir, session, args.frames)
+            if frame.can_replay
+        ]
+        for clients in (int(count) for count in args.clients.split(",")):
+            results[f"clients_{clients}"] = asyncio.run(
+                load_test(index, clients, args.requests, bodies)
+            )
+
+    output = json.dumps(
+        {
+            "label": args.label,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
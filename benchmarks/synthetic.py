@@ -0,0 +1,170 @@
+"""Generate synthetic Auto-GPT DEBUG sessions for benchmarking the replay.
+
+The sessions use the on-disk layout Auto-GPT's cycle logger writes and
+``Frame.session_files`` expects: ``<session_dir>/<YYYYMMDD_HHMMSS>_<name>/NNN/``
+with one ``<n>_<file name>`` per logged file.
+"""
+import argparse
+import json
+import os
+import random
+import string
+from datetime import datetime, timedelta
+
+SYSTEM_PROMPT_HEADER = "You are Bench-GPT, an AI designed to benchmark replays."
+NEXT_COMMAND_PROMPT = (
+    "Determine which next command to use, and respond using the format specified "
+    "above:"
+)
+SUMMARY_PROMPT = (
+    "Your task is to create a concise running summary of actions and information "
+    "results in the provided text, focusing on key and potentially important "
+    "information to remember.\n\nYou will receive the current summary and the your "
+    "latest actions. Combine them, adding relevant key information from the latest "
+    "development in 1st person past tense and keeping the summary concise."
+)
+COMMANDS = ("write_to_file", "read_file", "google", "browse_website", "list_files")
+
+
+def _text(rng, chars):
+    words = []
+    length = 0
+    while length < chars:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def _next_action(rng, index, message_chars):
+    name = COMMANDS[index % len(COMMANDS)]
+    if name in ("write_to_file", "read_file"):
+        args = {"filename": f"/workspace/file_{index}.txt"}
+        if name == "write_to_file":
+            args["text"] = _text(rng, message_chars)
+    elif name == "list_files":
+        args = {"directory": "/workspace"}
+    elif name == "google":
+        args = {"query": _text(rng, 40)}
+    else:
+        args = {"url": f"https://example.com/{index}", "question": _text(rng, 40)}
+    return {
+        "thoughts": {
+            "text": _text(rng, 120),
+            "reasoning": _text(rng, 120),
+            "plan": "- " + _text(rng, 80),
+            "criticism": _text(rng, 80),
+            "speak": _text(rng, 60),
+        },
+        "command": {"name": name, "args": args},
+    }
+
+
+def _write_json(path, content):
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(content, fp, ensure_ascii=False, indent=4)
+
+
+def _write_text(path, content):
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write(json.dumps(content))
+
+
+def generate_session(
+    session_dir,
+    frames=50,
+    context_messages=8,
+    message_chars=800,
+    system_prompt_chars=4000,
+    summary_every=5,
+    history_limit=None,
+    name="BenchGPT",
+    created_at=None,
+    seed=0,
+):
+    rng = random.Random(seed)
+    created_at = created_at or datetime(2023, 5, 1, 12, 0, 0)
+    session = f"{created_at.strftime('%Y%m%d_%H%M%S')}_{name}"
+    system_prompt = SYSTEM_PROMPT_HEADER + "\n" + _text(rng, system_prompt_chars)
+
+    history = []
+    for index in range(1, frames + 1):
+        frame_folder = os.path.join(session_dir, session, str(index).zfill(3))
+        os.makedirs(frame_folder, exist_ok=True)
+        log_count = 0
+
+        def path(file_name):
+            nonlocal log_count
+            log_count += 1
+            return os.path.join(frame_folder, f"{log_count - 1}_{file_name}")
+
+        if summary_every and index % summary_every == 0:
+            _write_json(
+                path("prompt_summary.json"),
+                [{"role": "user", "content": SUMMARY_PROMPT + _text(rng, 400)}],
+            )
+            _write_text(path("summary.txt"), _text(rng, 300))
+
+        moment = created_at + timedelta(minutes=index)
+        context = [
+            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": f"The current time and date is {moment}"},
+            {
+                "role": "system",
+                "content": "This reminds you of these events from your past:\n"
+                + _text(rng, 200),
+            },
+            *history[-context_messages:],
+            {"role": "user", "content": NEXT_COMMAND_PROMPT},
+        ]
+        _write_json(path("current_context.json"), context)
+
+        next_action = _next_action(rng, index, message_chars)
+        _write_json(path("next_action.json"), next_action)
+        if index == 1:
+            _write_text(path("user_input.txt"), "y")
+
+        history.append({"role": "user", "content": NEXT_COMMAND_PROMPT})
+        history.append({"role": "assistant", "content": json.dumps(next_action)})
+        if history_limit is not None:
+            history = history[-history_limit:]
+        _write_json(path("full_message_history.json"), history)
+
+        command_name = next_action["command"]["name"]
+        history.append(
+            {
+                "role": "system",
+                "content": f"Command {command_name} returned: "
+                + _text(rng, message_chars),
+            }
+        )
+
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic session.")
+    parser.add_argument("session_dir", help="Folder to create the session in")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--context-messages", type=int, default=8)
+    parser.add_argument("--message-chars", type=int, default=800)
+    parser.add_argument("--system-prompt-chars", type=int, default=4000)
+    parser.add_argument("--summary-every", type=int, default=5)
+    parser.add_argument("--history-limit", type=int, default=None)
+    args = parser.parse_args()
+
+    print(
+        generate_session(
+            args.session_dir,
+            frames=args.frames,
+            context_messages=args.context_messages,
+            message_chars=args.message_chars,
+            system_prompt_chars=args.system_prompt_chars,
+            summary_every=args.summary_every,
+            history_limit=args.history_limit,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
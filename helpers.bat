@@ -9,8 +9,11 @@ if "%1" == "clean" (
 ) else if "%1" == "style" (
   echo Running code formatters...
   call :style
+) else if "%1" == "test" (
+  echo Running tests...
+  call :test
 ) else (
-  echo Usage: %0 [clean^|qa^|style]
+  echo Usage: %0 [clean^|qa^|style^|test]
   exit /b 1
 )
 
@@ -42,3 +45,9 @@ exit /b 0
   @black --exclude=".*\/*(dist|venv|.venv|test-results)\/*.*" .
   echo Done!
   exit /b 0
+
+:test
+  rem Run the tests
+  @python -m pytest
+  echo Done!
+  exit /b 0
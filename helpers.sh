@@ -16,6 +16,11 @@ qa() {
   python run_pylint.py
 }
 
+test() {
+  # Run the tests
+  python -m pytest
+}
+
 style() {
   # Format code
   isort .
@@ -35,8 +40,12 @@ case "$1" in
     echo Running code formatters...
     style
     ;;
+  test)
+    echo Running tests...
+    test
+    ;;
   *)
-    echo "Usage: $0 [clean|qa|style]"
+    echo "Usage: $0 [clean|qa|style|test]"
     exit 1
     ;;
 esac
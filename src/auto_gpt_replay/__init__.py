@@ -1,15 +1,30 @@
 """This is a template for Auto-GPT plugins."""
 import os
+import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, TypedDict, TypeVar
 
 from auto_gpt_plugin_template import AutoGPTPluginTemplate
-from dotenv import load_dotenv
 
 PromptGenerator = TypeVar("PromptGenerator")
 
-with open(str(Path(os.getcwd()) / ".env"), "r", encoding="utf-8") as fp:
-    load_dotenv(stream=fp)
+_env_loaded = False
+
+
+def load_env():
+    # Read the .env file once, when the plugin is set up instead of on import
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    env_path = Path(os.getcwd()) / ".env"
+    if not env_path.exists():
+        return
+
+    from dotenv import load_dotenv
+
+    with open(str(env_path), "r", encoding="utf-8") as fp:
+        load_dotenv(stream=fp)
 
 
 class Message(TypedDict):
@@ -27,12 +42,45 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
         self._name = "AutoGPT-Replay"
         self._version = "0.1.0"
         self._description = "Replay last AutoGPT session."
-        should_run_replay = os.getenv("RUN_REPLAY", "False") == "True"
+        load_env()
+        # A replay driven from outside the plugin, e.g. a headless one, is
+        # running before Auto-GPT loads its plugins, whatever .env says
+        replay_driven = self._active_replay() is not None
+        should_run_replay = (
+            os.getenv("RUN_REPLAY", "False") == "True" and not replay_driven
+        )
         if should_run_replay:
             from auto_gpt_replay.main import Replay
 
             replay = Replay()
             replay.run_replay()
+        # The recorders are created by the first hook that needs them
+        self._record = os.getenv("REPLAY_RECORD", "False") == "True" and not (
+            should_run_replay or replay_driven
+        )
+        self._record_workspace = os.getenv("REPLAY_RECORD_WORKSPACE", "False") == "True"
+        self._recorder = None
+        self._workspace_recorder = None
+
+    def _session_recorder(self):
+        if self._recorder is None:
+            from auto_gpt_replay.recorder import SessionRecorder
+
+            self._recorder = SessionRecorder.from_env(
+                str(Path(os.getcwd()) / "logs" / "DEBUG")
+            )
+        return self._recorder
+
+    def _workspace_snapshots(self):
+        if self._workspace_recorder is None:
+            from autogpt.config import Config
+
+            from auto_gpt_replay.snapshot import WorkspaceRecorder
+
+            self._workspace_recorder = WorkspaceRecorder(
+                str(Path(os.getcwd()) / "logs" / "DEBUG"), Config().workspace_path
+            )
+        return self._workspace_recorder
 
     def can_handle_on_response(self) -> bool:
         """This method is called to check that the plugin can
@@ -72,7 +120,7 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
 
         Returns:
             bool: True if the plugin can handle the on_planning method."""
-        return False
+        return self._record
 
     def on_planning(
         self, prompt: PromptGenerator, messages: List[Message]
@@ -83,7 +131,7 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
             prompt (PromptGenerator): The prompt generator.
             messages (List[str]): The list of messages.
         """
-        pass
+        self._session_recorder().start_frame(messages)
 
     def can_handle_post_planning(self) -> bool:
         """This method is called to check that the plugin can
@@ -91,7 +139,7 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
 
         Returns:
             bool: True if the plugin can handle the post_planning method."""
-        return False
+        return self._record
 
     def post_planning(self, response: str) -> str:
         """This method is called after the planning chat completion is done.
@@ -102,7 +150,8 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
         Returns:
             str: The resulting response.
         """
-        pass
+        self._session_recorder().record_reply(response)
+        return response
 
     def can_handle_pre_instruction(self) -> bool:
         """This method is called to check that the plugin can
@@ -189,7 +238,7 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
 
         Returns:
             bool: True if the plugin can handle the post_command method."""
-        return False
+        return self._record or self._record_workspace
 
     def post_command(self, command_name: str, response: str) -> str:
         """This method is called after the command is executed.
@@ -201,7 +250,14 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
         Returns:
             str: The resulting response.
         """
-        pass
+        if self._record:
+            recorder = self._session_recorder()
+            recorder.record_command_result(command_name, response)
+            if self._record_workspace:
+                self._workspace_snapshots().record(recorder.session, recorder.frame)
+        elif self._record_workspace:
+            self._workspace_snapshots().record()
+        return response
 
     def can_handle_chat_completion(
         self, messages: Dict[Any, Any], model: str, temperature: float, max_tokens: int
@@ -217,7 +273,12 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
 
           Returns:
               bool: True if the plugin can handle the chat_completion method."""
-        return False
+        # Only the running summaries, the planning prompt is recorded on_planning
+        if not self._record:
+            return False
+        from auto_gpt_replay.frame import is_summary_prompt
+
+        return is_summary_prompt(messages)
 
     def handle_chat_completion(
         self, messages: List[Message], model: str, temperature: float, max_tokens: int
@@ -233,7 +294,9 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
         Returns:
             str: The resulting response.
         """
-        pass
+        return self._session_recorder().record_summary(
+            messages, model, temperature, max_tokens
+        )
 
     def can_handle_text_embedding(self, text: str) -> bool:
         """This method is called to check that the plugin can
@@ -242,7 +305,10 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
             text (str): The text to be convert to embedding.
           Returns:
               bool: True if the plugin can handle the text_embedding method."""
-        return False
+        replay = self._active_replay()
+        if replay is not None:
+            return replay.can_replay_embedding(text)
+        return self._record
 
     def handle_text_embedding(self, text: str) -> list:
         """This method is called when the chat completion is done.
@@ -251,7 +317,18 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
         Returns:
             list: The text embedding.
         """
-        pass
+        replay = self._active_replay()
+        if replay is not None:
+            return replay.replay_embedding(text)
+        return self._session_recorder().record_embedding(text)
+
+    @staticmethod
+    def _active_replay():
+        # Only a running replay (interactive or headless) has imported the mock
+        mock = sys.modules.get("auto_gpt_replay.mock")
+        if mock is None:
+            return None
+        return mock.MockIOFunctions.active
 
     def can_handle_user_input(self, user_input: str) -> bool:
         """This method is called to check that the plugin can
@@ -262,7 +339,7 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
 
         Returns:
             bool: True if the plugin can handle the user_input method."""
-        return False
+        return self._record
 
     def user_input(self, user_input: str) -> str:
         """This method is called to request user input to the user.
@@ -273,8 +350,9 @@ class AutoGPTReplay(AutoGPTPluginTemplate):
         Returns:
             str: The user input.
         """
-
-        pass
+        answer = input(user_input)
+        self._session_recorder().record_user_input(answer)
+        return answer
 
     def can_handle_report(self) -> bool:
         """This method is called to check that the plugin can
@@ -0,0 +1,364 @@
+"""Packed single-file archive of a replay session.
+
+Layout: header, offset table (one entry per frame) and one record per frame.
+Each frame record starts with a small file table pointing at the contents of
+the files the frame folder contained. Message lists are stored one message per
+entry, so a reader can decode a single message (e.g. the last one) straight
+from the memory mapped file without parsing the whole list.
+
+Full message histories only grow from frame to frame, so they are stored as
+the messages appended since the previous frame's history, with a full
+checkpoint every ``checkpoint_every`` frames to bound the chain of deltas a
+reader has to follow. The result of the command run before each frame is
+extracted from its history into a small ``command_result`` record, so
+replaying a command does not need the history at all.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+from auto_gpt_replay.atomic import open_atomic
+from auto_gpt_replay.compression import read_bytes
+from auto_gpt_replay.frame import COMMAND_RESULT_PREFIX, Frame, parse_command_result
+from auto_gpt_replay.manifest import (
+    COMMAND_RESULT,
+    FILE_FORMATS,
+    FORMAT_JSON,
+    SESSION_FILES,
+    SessionManifest,
+    list_frame_folders,
+)
+
+ARCHIVE_NAME = "session.replay"
+ARCHIVE_MAGIC = b"AGRP"
+ARCHIVE_VERSION = 4
+# Version 3 only adds the history delta encoding and version 4 the extracted
+# command results, so older archives still read
+SUPPORTED_VERSIONS = (2, 3, 4)
+CHECKPOINT_EVERY = 32
+ARCHIVE_KEYS = (*SESSION_FILES, COMMAND_RESULT)
+
+ENCODING_RAW = 0
+ENCODING_MESSAGES = 1
+ENCODING_HISTORY_DELTA = 2
+
+HEADER = struct.Struct("<4sHHI")
+FRAME_ENTRY = struct.Struct("<IQI")
+RECORD_HEADER = struct.Struct("<H")
+FILE_ENTRY = struct.Struct("<BBII")
+MESSAGE_COUNT = struct.Struct("<I")
+MESSAGE_ENTRY = struct.Struct("<II")
+HISTORY_DELTA = struct.Struct("<II")
+
+
+class MessageSequence(Sequence):
+    def __eq__(self, other):
+        if not isinstance(other, (list, MessageSequence)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)} messages)"
+
+
+class LazyMessageList(MessageSequence):
+    def __init__(self, data):
+        self._data = data
+        (self._count,) = MESSAGE_COUNT.unpack_from(data)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("message index out of range")
+        offset, length = MESSAGE_ENTRY.unpack_from(
+            self._data, MESSAGE_COUNT.size + MESSAGE_ENTRY.size * index
+        )
+        return json.loads(bytes(self._data[offset : offset + length]))
+
+
+class DeltaMessageList(MessageSequence):
+    def __init__(self, archive, key, base_index, base_length, appended):
+        self._archive = archive
+        self._key = key
+        self._base_index = base_index
+        self._base_length = base_length
+        self._base = None
+        self._appended = appended
+
+    @property
+    def base(self):
+        if self._base is None:
+            self._base = self._archive.load(self._base_index, self._key)
+        return self._base
+
+    def __len__(self):
+        return self._base_length + len(self._appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        # Follow the chain of deltas down to the frame that appended the message
+        history = self
+        while isinstance(history, DeltaMessageList) and index < history._base_length:
+            history = history.base
+        if isinstance(history, DeltaMessageList):
+            return history._appended[index - history._base_length]
+        return history[index]
+
+
+def _is_message_list(content):
+    return isinstance(content, list) and all(isinstance(m, dict) for m in content)
+
+
+def _message_blobs(messages):
+    return [json.dumps(message, ensure_ascii=False).encode() for message in messages]
+
+
+def _encode_messages(blobs):
+    offset = MESSAGE_COUNT.size + MESSAGE_ENTRY.size * len(blobs)
+    entries = []
+    for blob in blobs:
+        entries.append(MESSAGE_ENTRY.pack(offset, len(blob)))
+        offset += len(blob)
+    return MESSAGE_COUNT.pack(len(blobs)) + b"".join(entries) + b"".join(blobs)
+
+
+def _encode_file(key, data):
+    if FILE_FORMATS[key] == FORMAT_JSON:
+        content = json.loads(data)
+        if _is_message_list(content):
+            return ENCODING_MESSAGES, _encode_messages(_message_blobs(content))
+    return ENCODING_RAW, data
+
+
+def archive_path(session_dir, session):
+    return os.path.join(session_dir, session, ARCHIVE_NAME)
+
+
+def session_frame_indexes(session_dir, session, archive=None):
+    if archive is not None:
+        return sorted(archive.frames)
+    session_path = os.path.join(session_dir, session)
+    if not os.path.exists(session_path):
+        return []
+    return [index for index, _ in list_frame_folders(session_path)]
+
+
+def _encode_history(index, content, data, previous, checkpoint_every):
+    if not _is_message_list(content):
+        return ENCODING_RAW, data, previous
+
+    blobs = _message_blobs(content)
+    if previous is not None:
+        base_index, base_blobs, depth = previous
+        base_length = len(base_blobs)
+        if (
+            depth < checkpoint_every
+            and base_length <= len(blobs)
+            and blobs[:base_length] == base_blobs
+        ):
+            return (
+                ENCODING_HISTORY_DELTA,
+                HISTORY_DELTA.pack(base_index, base_length)
+                + _encode_messages(blobs[base_length:]),
+                (index, blobs, depth + 1),
+            )
+    return ENCODING_MESSAGES, _encode_messages(blobs), (index, blobs, 0)
+
+
+def _command_result(history):
+    # The result of the previous frame's command, extracted once at pack time
+    for message in reversed(history):
+        if message["role"] == "system" and message["content"].startswith(
+            COMMAND_RESULT_PREFIX
+        ):
+            return parse_command_result(message["content"])
+    return None
+
+
+def _pack_frame(index, files, previous_history, checkpoint_every):
+    contents = []
+    for key, frame_file in files.items():
+        data = read_bytes(frame_file.path, frame_file.compression)
+        if key == "full_message_history":
+            history = json.loads(data)
+            encoding, data, previous_history = _encode_history(
+                index, history, data, previous_history, checkpoint_every
+            )
+            if _is_message_list(history):
+                record = _command_result(history)
+                if record is not None:
+                    contents.append(
+                        (COMMAND_RESULT, ENCODING_RAW, json.dumps(record).encode())
+                    )
+        else:
+            encoding, data = _encode_file(key, data)
+        contents.append((key, encoding, data))
+
+    entries = []
+    offset = RECORD_HEADER.size + FILE_ENTRY.size * len(contents)
+    for key, encoding, data in contents:
+        entries.append(
+            FILE_ENTRY.pack(ARCHIVE_KEYS.index(key), encoding, offset, len(data))
+        )
+        offset += len(data)
+    record = (
+        RECORD_HEADER.pack(len(entries))
+        + b"".join(entries)
+        + b"".join(data for _, _, data in contents)
+    )
+    return record, previous_history
+
+
+def pack_session(session_dir, session, output=None, checkpoint_every=CHECKPOINT_EVERY):
+    if output is None:
+        output = archive_path(session_dir, session)
+
+    manifest = SessionManifest(session_dir, session).scan()
+    records = []
+    previous_history = None
+    for index in sorted(manifest.frames):
+        record, previous_history = _pack_frame(
+            index, manifest.frames[index].files, previous_history, checkpoint_every
+        )
+        records.append((index, record))
+
+    offset = HEADER.size + FRAME_ENTRY.size * len(records)
+    table = []
+    for index, record in records:
+        table.append(FRAME_ENTRY.pack(index, offset, len(record)))
+        offset += len(record)
+
+    with open_atomic(output) as fp:
+        fp.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, len(records)))
+        fp.write(b"".join(table))
+        for _, record in records:
+            fp.write(record)
+    return output
+
+
+class SessionArchive:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, _, frame_count = HEADER.unpack_from(self._view)
+        if magic != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a replay archive")
+        if version not in SUPPORTED_VERSIONS:
+            self.close()
+            raise ValueError(
+                f"Unsupported replay archive version {version}, repack the session"
+            )
+
+        self.frames = {
+            index: (offset, length)
+            for index, offset, length in FRAME_ENTRY.iter_unpack(
+                self._view[HEADER.size : HEADER.size + FRAME_ENTRY.size * frame_count]
+            )
+        }
+        self._file_tables = {}
+
+    @classmethod
+    def open(cls, session_dir, session):
+        path = archive_path(session_dir, session)
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def has_frame(self, index):
+        return index in self.frames
+
+    def frame_files(self, index):
+        if index not in self._file_tables:
+            record_offset, _ = self.frames[index]
+            (count,) = RECORD_HEADER.unpack_from(self._view, record_offset)
+            table_offset = record_offset + RECORD_HEADER.size
+            table = self._view[table_offset : table_offset + FILE_ENTRY.size * count]
+            self._file_tables[index] = {
+                ARCHIVE_KEYS[key_id]: (encoding, record_offset + offset, length)
+                for key_id, encoding, offset, length in FILE_ENTRY.iter_unpack(table)
+            }
+        return self._file_tables[index]
+
+    def read(self, index, key):
+        files = self.frame_files(index)
+        if key not in files:
+            return None
+        encoding, offset, length = files[key]
+        return encoding, self._view[offset : offset + length]
+
+    def load(self, index, key):
+        content = self.read(index, key)
+        if content is None:
+            return None
+        encoding, data = content
+        if encoding == ENCODING_MESSAGES:
+            return LazyMessageList(data)
+        if encoding == ENCODING_HISTORY_DELTA:
+            base_index, base_length = HISTORY_DELTA.unpack_from(data)
+            return DeltaMessageList(
+                self,
+                key,
+                base_index,
+                base_length,
+                LazyMessageList(data[HISTORY_DELTA.size :]),
+            )
+        if FILE_FORMATS[key] == FORMAT_JSON:
+            return json.loads(bytes(data))
+        return Frame.decode_text(bytes(data))
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # Frames still hold views into the archive, let the GC unmap it
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pack Auto-GPT DEBUG sessions into single file replay archives."
+    )
+    parser.add_argument("sessions", nargs="+", help="Session folder names")
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=CHECKPOINT_EVERY,
+        help="Store a full message history every N frames (default: 32)",
+    )
+    parser.add_argument(
+        "--session-dir",
+        default=os.path.join(os.getcwd(), "logs", "DEBUG"),
+        help="Folder containing the sessions (default: logs/DEBUG)",
+    )
+    args = parser.parse_args()
+
+    for session in args.sessions:
+        print(
+            pack_session(
+                args.session_dir, session, checkpoint_every=args.checkpoint_every
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
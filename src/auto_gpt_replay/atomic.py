@@ -0,0 +1,21 @@
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def open_atomic(path, mode="wb", encoding=None):
+    # Written to a temporary file first, so readers never see a half written file
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as fp:
+            yield fp
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def write_atomic(path, data):
+    with open_atomic(path) as fp:
+        fp.write(data)
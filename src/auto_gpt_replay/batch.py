@@ -0,0 +1,206 @@
+"""Replay many sessions in parallel, e.g. after every change to the agent.
+
+    python -m auto_gpt_replay.batch --all --workers 8 -- --ai-settings ai_settings.yaml
+
+The replay patches openai, input and Auto-GPT globally, so every session runs
+in its own headless replay process, with its own workspace; ``--workers`` of
+them run at a time.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from auto_gpt_replay.console import OUTPUT_SUMMARY
+from auto_gpt_replay.headless import (
+    default_session_dir,
+    parse_frames,
+    split_autogpt_args,
+)
+from auto_gpt_replay.report import (
+    MISS_FAIL,
+    MISS_POLICIES,
+    STATUS_DIVERGED,
+    STATUS_ERROR,
+    STATUS_INCOMPLETE,
+    STATUS_PASSED,
+)
+from auto_gpt_replay.session_index import SessionIndex
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKSPACE_OPTIONS = ("--workspace-directory", "-w")
+
+
+def _workspace_args(workspace, autogpt_args):
+    # Commands run live and restored snapshots write to the workspace, every
+    # worker gets its own unless one is given for all of them
+    for arg in autogpt_args:
+        if arg.partition("=")[0] in WORKSPACE_OPTIONS:
+            return list(autogpt_args)
+    return ["--workspace-directory", workspace, *autogpt_args]
+
+
+def _replay_command(session, summary_path, workspace, options):
+    command = [
+        sys.executable,
+        "-m",
+        "auto_gpt_replay.headless",
+        session,
+        "--frames",
+        options["frames"],
+        "--on-miss",
+        options["on_miss"],
+        "--session-dir",
+        options["session_dir"],
+        "--summary",
+        summary_path,
+        # The output of the workers is discarded, don't format it at all
+        "--console",
+        OUTPUT_SUMMARY,
+    ]
+    if options["max_misses"] is not None:
+        command += ["--max-misses", str(options["max_misses"])]
+    return command + ["--", *_workspace_args(workspace, options["autogpt_args"])]
+
+
+def replay_session(session, options):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (PACKAGE_ROOT, env.get("PYTHONPATH")) if path
+    )
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        summary_path = os.path.join(tmp_dir, "summary.json")
+        workspace = os.path.join(tmp_dir, "auto_gpt_workspace")
+        os.makedirs(workspace)
+        try:
+            completed = subprocess.run(
+                _replay_command(session, summary_path, workspace, options),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                env=env,
+                timeout=options["timeout"],
+            )
+        except subprocess.TimeoutExpired:
+            return {
+                "session": session,
+                "status": STATUS_ERROR,
+                "reason": "timeout",
+                "duration": round(time.perf_counter() - started, 3),
+            }
+
+        try:
+            with open(summary_path, "r", encoding="utf-8") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            stderr = completed.stderr.decode("utf-8", errors="replace")
+            return {
+                "session": session,
+                "status": STATUS_ERROR,
+                "reason": f"exit code {completed.returncode}",
+                "stderr": stderr[-2000:],
+                "duration": round(time.perf_counter() - started, 3),
+            }
+
+
+def run_batch(
+    sessions,
+    workers=None,
+    frames="1-",
+    on_miss=MISS_FAIL,
+    max_misses=None,
+    autogpt_args=(),
+    session_dir=None,
+    timeout=None,
+):
+    options = {
+        "frames": frames,
+        "on_miss": on_miss,
+        "max_misses": max_misses,
+        "autogpt_args": list(autogpt_args),
+        "session_dir": session_dir or default_session_dir(),
+        "timeout": timeout,
+    }
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(lambda session: replay_session(session, options), sessions)
+        )
+    wall_clock = time.perf_counter() - started
+
+    statuses = (STATUS_PASSED, STATUS_DIVERGED, STATUS_INCOMPLETE, STATUS_ERROR)
+    replay_time = sum(result.get("duration", 0) for result in results)
+    return {
+        "sessions": len(results),
+        **{
+            status: sum(1 for result in results if result["status"] == status)
+            for status in statuses
+        },
+        "workers": workers,
+        "wall_clock": round(wall_clock, 3),
+        "replay_time": round(replay_time, 3),
+        "speedup": round(replay_time / wall_clock, 2) if wall_clock else None,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay many sessions in parallel.",
+        epilog="Arguments after -- are passed on to Auto-GPT.",
+    )
+    parser.add_argument("sessions", nargs="*", help="Session folder names")
+    parser.add_argument(
+        "--all", action="store_true", help="Replay every session in the index"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--frames", default="1-")
+    parser.add_argument("--on-miss", choices=MISS_POLICIES, default=MISS_FAIL)
+    parser.add_argument("--max-misses", type=int, default=None)
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="Seconds allowed per session"
+    )
+    parser.add_argument("--session-dir", default=default_session_dir())
+    parser.add_argument("--summary", help="Write the JSON results to this file")
+    argv, autogpt_args = split_autogpt_args(sys.argv[1:])
+    args = parser.parse_intermixed_args(argv)
+
+    sessions = list(args.sessions)
+    if args.all:
+        sessions += [entry["name"] for entry in SessionIndex(args.session_dir).update()]
+    if not sessions:
+        parser.error("no sessions given, pass session names or --all")
+    try:
+        parse_frames(args.frames)
+    except ValueError as error:
+        parser.error(str(error))
+
+    results = run_batch(
+        sessions,
+        workers=args.workers,
+        frames=args.frames,
+        on_miss=args.on_miss,
+        max_misses=args.max_misses,
+        autogpt_args=autogpt_args,
+        session_dir=args.session_dir,
+        timeout=args.timeout,
+    )
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=2)
+    else:
+        print(json.dumps(results))
+    sys.exit(0 if results[STATUS_PASSED] == results["sessions"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Compressed frame files.
+
+Frame files can be stored as ``<name>.gz`` or ``<name>.zst`` and are
+decompressed while they are read. zstd needs the optional ``zstandard``
+package; a session compacted with a shared dictionary keeps it in
+``<session>/replay.zdict``.
+
+    python -m auto_gpt_replay.compression <session> --method zstd --dictionary
+"""
+import argparse
+import functools
+import gzip
+import io
+import os
+
+from auto_gpt_replay.atomic import write_atomic
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_SUFFIXES = {".gz": COMPRESSION_GZIP, ".zst": COMPRESSION_ZSTD}
+SUFFIXES = {compression: suffix for suffix, compression in COMPRESSION_SUFFIXES.items()}
+DEFAULT_LEVELS = {COMPRESSION_GZIP: 6, COMPRESSION_ZSTD: 10}
+
+DICTIONARY_NAME = "replay.zdict"
+DICTIONARY_SIZE = 112640
+DICTIONARY_SAMPLES = 2000
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as error:
+        raise ImportError(
+            "Reading or writing zstd compressed sessions requires the zstandard "
+            "package: pip install zstandard"
+        ) from error
+    return zstandard
+
+
+def split_compression(name):
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            return name[: -len(suffix)], compression
+    return name, None
+
+
+def dictionary_path(session_path):
+    return os.path.join(session_path, DICTIONARY_NAME)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_dictionary(path, mtime_ns):
+    with open(path, "rb") as fp:
+        return _zstandard().ZstdCompressionDict(fp.read())
+
+
+def session_dictionary(frame_file_path):
+    # Frame files live in <session>/<frame>/, the dictionary in <session>/
+    session_path = os.path.dirname(os.path.dirname(frame_file_path))
+    path = dictionary_path(session_path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_dictionary(path, mtime_ns)
+
+
+def _zstd_decompressor(path):
+    dictionary = session_dictionary(path)
+    if dictionary is None:
+        return _zstandard().ZstdDecompressor()
+    return _zstandard().ZstdDecompressor(dict_data=dictionary)
+
+
+def open_binary(path, compression):
+    if compression is None:
+        return open(path, "rb")
+    if compression == COMPRESSION_GZIP:
+        return gzip.open(path, "rb")
+    return _zstd_decompressor(path).stream_reader(open(path, "rb"), closefd=True)
+
+
+def open_text(path, compression):
+    if compression is None:
+        return open(path, "r", encoding="utf-8")
+    return io.TextIOWrapper(open_binary(path, compression), encoding="utf-8")
+
+
+def read_bytes(path, compression):
+    with open_binary(path, compression) as fp:
+        return fp.read()
+
+
+def _compressor(compression, level, dictionary):
+    if compression == COMPRESSION_GZIP:
+        return lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+    zstandard = _zstandard()
+    if dictionary is None:
+        return zstandard.ZstdCompressor(level=level).compress
+    return zstandard.ZstdCompressor(level=level, dict_data=dictionary).compress
+
+
+def _train_dictionary(frame_files, size):
+    samples = []
+    for frame_file in frame_files[:DICTIONARY_SAMPLES]:
+        samples.append(read_bytes(frame_file.path, frame_file.compression))
+    return _zstandard().train_dictionary(size, samples)
+
+
+def compact_session(
+    session_dir,
+    session,
+    compression=COMPRESSION_GZIP,
+    level=None,
+    use_dictionary=False,
+    dictionary_size=DICTIONARY_SIZE,
+):
+    # The manifest resolves compressed names through this module
+    from auto_gpt_replay.manifest import SessionManifest
+
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+    manifest = SessionManifest(session_dir, session).scan()
+    frame_files = [
+        frame_file
+        for index in sorted(manifest.frames)
+        for frame_file in manifest.frames[index].files.values()
+    ]
+    pending = [frame_file for frame_file in frame_files if not frame_file.compression]
+    if not pending:
+        return 0
+
+    dictionary = None
+    if use_dictionary and compression == COMPRESSION_ZSTD:
+        path = dictionary_path(os.path.join(session_dir, session))
+        if os.path.exists(path):
+            dictionary = session_dictionary(pending[0].path)
+        else:
+            dictionary = _train_dictionary(pending, dictionary_size)
+            with open(path, "wb") as fp:
+                fp.write(dictionary.as_bytes())
+
+    compress = _compressor(compression, level, dictionary)
+    for frame_file in pending:
+        with open(frame_file.path, "rb") as fp:
+            data = compress(fp.read())
+        write_atomic(frame_file.path + SUFFIXES[compression], data)
+        os.remove(frame_file.path)
+    return len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compress the frame files of sessions in place."
+    )
+    parser.add_argument("sessions", nargs="+", help="Session folder names")
+    parser.add_argument(
+        "--method",
+        choices=[COMPRESSION_GZIP, COMPRESSION_ZSTD],
+        default=COMPRESSION_GZIP,
+    )
+    parser.add_argument("--level", type=int, default=None)
+    parser.add_argument(
+        "--dictionary",
+        action="store_true",
+        help="Train a shared zstd dictionary for each session",
+    )
+    parser.add_argument(
+        "--session-dir",
+        default=os.path.join(os.getcwd(), "logs", "DEBUG"),
+        help="Folder containing the sessions (default: logs/DEBUG)",
+    )
+    args = parser.parse_args()
+
+    for session in args.sessions:
+        count = compact_session(
+            args.session_dir,
+            session,
+            compression=args.method,
+            level=args.level,
+            use_dictionary=args.dictionary,
+        )
+        print(f"{session}: compressed {count} files")
+
+
+if __name__ == "__main__":
+    main()
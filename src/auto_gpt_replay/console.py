@@ -0,0 +1,168 @@
+"""Console output while a session is replayed.
+
+Auto-GPT types its console output out word by word. During a replay its
+console handlers are swapped for ones that write whole records into a shared
+buffer, written out in blocks, so a log-heavy session replays at disk speed.
+``REPLAY_OUTPUT`` in the .env file picks what is shown:
+
+    buffered  every record, written out in blocks (default)
+    quiet     only warnings and errors
+    summary   nothing, only the summary at the end of the replay
+    typing    Auto-GPT's own typing output, without its delay between words
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+
+OUTPUT_BUFFERED = "buffered"
+OUTPUT_QUIET = "quiet"
+OUTPUT_SUMMARY = "summary"
+OUTPUT_TYPING = "typing"
+OUTPUT_MODES = (OUTPUT_BUFFERED, OUTPUT_QUIET, OUTPUT_SUMMARY, OUTPUT_TYPING)
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+# The handlers of Auto-GPT's logger that write to the console
+CONSOLE_HANDLERS = ("typing_console_handler", "console_handler")
+
+
+class ConsoleBuffer:
+    def __init__(self, stream=None, size=DEFAULT_BUFFER_SIZE):
+        self.stream = stream
+        self.size = size
+        self.parts = []
+        self.length = 0
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            self.parts.append(text)
+            self.length += len(text)
+            if self.length >= self.size:
+                self._write_out()
+
+    def flush(self):
+        with self.lock:
+            self._write_out()
+
+    def _write_out(self):
+        # sys.stdout is looked up late, it may be replaced after the replay starts
+        stream = self.stream if self.stream is not None else sys.stdout
+        if self.parts:
+            stream.write("".join(self.parts))
+            self.parts = []
+            self.length = 0
+        stream.flush()
+
+
+class BufferedConsoleHandler(logging.Handler):
+    def __init__(self, buffer, level=logging.NOTSET):
+        super().__init__(level)
+        self.buffer = buffer
+
+    def emit(self, record):
+        try:
+            self.buffer.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+class NoTypingDelay:
+    """Stands in for the random module Auto-GPT's typing handler picks its
+    delay between words from."""
+
+    def __init__(self, random):
+        self.random = random
+
+    def uniform(self, a, b):
+        return 0
+
+    def __getattr__(self, name):
+        return getattr(self.random, name)
+
+
+class ReplayConsole:
+    def __init__(self, mode=OUTPUT_BUFFERED, stream=None, buffer_size=None):
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode {mode}, use one of {OUTPUT_MODES}")
+        self.mode = mode
+        self.buffer = ConsoleBuffer(stream, buffer_size or DEFAULT_BUFFER_SIZE)
+        # (logger, Auto-GPT's handler, its replacement or None)
+        self.replaced = []
+        # Auto-GPT's logs module while its typing delay is taken out
+        self.typing_module = None
+        self.installed = False
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("REPLAY_OUTPUT", OUTPUT_BUFFERED),
+            buffer_size=int(os.getenv("REPLAY_OUTPUT_BUFFER", DEFAULT_BUFFER_SIZE)),
+        )
+
+    def _replacement(self, handler):
+        if self.mode == OUTPUT_SUMMARY:
+            return None
+        level = handler.level
+        if self.mode == OUTPUT_QUIET:
+            level = max(level, logging.WARNING)
+        replacement = BufferedConsoleHandler(self.buffer, level)
+        replacement.setFormatter(handler.formatter)
+        return replacement
+
+    def _remove_typing_delay(self, autogpt_logger):
+        handler = getattr(autogpt_logger, "typing_console_handler", None)
+        if handler is None:
+            return
+        module = sys.modules.get(type(handler).__module__)
+        if module is None or not hasattr(module, "random"):
+            return
+        module.random = NoTypingDelay(module.random)
+        self.typing_module = module
+
+    def _replace_handlers(self, autogpt_logger):
+        handlers = [getattr(autogpt_logger, name, None) for name in CONSOLE_HANDLERS]
+        for log in (autogpt_logger.typing_logger, autogpt_logger.logger):
+            for handler in handlers:
+                if handler is None or handler not in log.handlers:
+                    continue
+                replacement = self._replacement(handler)
+                log.removeHandler(handler)
+                if replacement is not None:
+                    log.addHandler(replacement)
+                self.replaced.append((log, handler, replacement))
+
+    def install(self, autogpt_logger=None):
+        if self.installed:
+            return self
+        if autogpt_logger is None:
+            from autogpt.logs import logger as autogpt_logger
+
+        if self.mode == OUTPUT_TYPING:
+            self._remove_typing_delay(autogpt_logger)
+        else:
+            self._replace_handlers(autogpt_logger)
+        self.installed = True
+        atexit.register(self.restore)
+        return self
+
+    def flush(self):
+        self.buffer.flush()
+
+    def restore(self):
+        # Auto-GPT's own console again, e.g. once the replay has gone live
+        if not self.installed:
+            return
+        atexit.unregister(self.restore)
+        self.flush()
+        for log, handler, replacement in self.replaced:
+            if replacement is not None:
+                log.removeHandler(replacement)
+            log.addHandler(handler)
+        self.replaced = []
+        if self.typing_module is not None:
+            self.typing_module.random = self.typing_module.random.random
+            self.typing_module = None
+        self.installed = False
@@ -0,0 +1,141 @@
+"""Recorded text embeddings of a session.
+
+Embeddings are stored as one contiguous float32 matrix
+(``<session>/embeddings.npy``, memory mapped when replaying) with the
+blake2b digests of their texts in ``<session>/embeddings.keys.npy``, so a
+replayed lookup is a dictionary hit and a row read, and similarity searches
+run over the whole matrix at once.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from auto_gpt_replay.atomic import open_atomic
+from auto_gpt_replay.fingerprint import DIGEST_SIZE
+
+EMBEDDINGS_NAME = "embeddings.npy"
+KEYS_NAME = "embeddings.keys.npy"
+
+
+def text_digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class EmbeddingStore:
+    def __init__(self, session_path):
+        self.vectors_path = os.path.join(session_path, EMBEDDINGS_NAME)
+        self.keys_path = os.path.join(session_path, KEYS_NAME)
+        self.vectors = None
+        self.rows = {}
+        self.pending = []
+        self._unit_vectors = None
+
+    @classmethod
+    def open(cls, session_dir, session):
+        store = cls(os.path.join(session_dir, session))
+        if not os.path.exists(store.vectors_path):
+            return None
+        return store.load()
+
+    @classmethod
+    def for_session(cls, session_dir, session):
+        store = cls(os.path.join(session_dir, session))
+        if os.path.exists(store.vectors_path):
+            store.load()
+        return store
+
+    def load(self):
+        self.vectors = np.load(self.vectors_path, mmap_mode="r")
+        keys = np.load(self.keys_path)
+        self.rows = {key.tobytes(): row for row, key in enumerate(keys)}
+        return self
+
+    def __len__(self):
+        return len(self.rows)
+
+    def has(self, text):
+        return text_digest(text) in self.rows
+
+    def _row(self, row):
+        stored = 0 if self.vectors is None else len(self.vectors)
+        if row < stored:
+            return self.vectors[row]
+        return self.pending[row - stored]
+
+    def get(self, text):
+        row = self.rows.get(text_digest(text))
+        if row is None:
+            return None
+        # Auto-GPT expects a plain list of floats
+        return self._row(row).tolist()
+
+    def get_many(self, texts):
+        rows = [self.rows.get(text_digest(text)) for text in texts]
+        found = np.array([row is not None for row in rows], dtype=bool)
+        if not found.any():
+            return None, found
+        matrix = np.stack([self._row(row) for row in rows if row is not None])
+        return matrix, found
+
+    def add(self, text, embedding):
+        digest = text_digest(text)
+        if digest in self.rows:
+            return
+        self.rows[digest] = len(self.rows)
+        self.pending.append(np.asarray(embedding, dtype=np.float32))
+        self._unit_vectors = None
+
+    def save(self):
+        if not self.pending:
+            return
+        pending = np.stack(self.pending)
+        if self.vectors is None:
+            vectors = pending
+        else:
+            vectors = np.concatenate([np.asarray(self.vectors), pending])
+        # Let go of the memory map before the file is replaced
+        self.vectors = None
+        keys = np.zeros((len(self.rows), DIGEST_SIZE), dtype=np.uint8)
+        for digest, row in self.rows.items():
+            keys[row] = np.frombuffer(digest, dtype=np.uint8)
+        os.makedirs(os.path.dirname(self.vectors_path), exist_ok=True)
+        with open_atomic(self.vectors_path) as fp:
+            np.save(fp, vectors)
+        with open_atomic(self.keys_path) as fp:
+            np.save(fp, keys)
+        self.pending = []
+        self.load()
+
+    def _unit_matrix(self):
+        # Normalised once, every similarity search is then one matrix product
+        if self._unit_vectors is None:
+            parts = [] if self.vectors is None else [np.asarray(self.vectors)]
+            if self.pending:
+                parts.append(np.stack(self.pending))
+            matrix = np.concatenate(parts).astype(np.float32, copy=False)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._unit_vectors = matrix / np.maximum(norms, 1e-12)
+        return self._unit_vectors
+
+    def nearest(self, queries, k=1):
+        # Rows and cosine similarities of the k most similar stored embeddings
+        # for each query, best first
+        if not len(self.rows):
+            return None, None
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        queries = queries / np.maximum(
+            np.linalg.norm(queries, axis=1, keepdims=True), 1e-12
+        )
+        scores = queries @ self._unit_matrix().T
+        k = min(k, scores.shape[1])
+        rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        row_scores = np.take_along_axis(scores, rows, axis=1)
+        order = np.argsort(-row_scores, axis=1)
+        return (
+            np.take_along_axis(rows, order, axis=1),
+            np.take_along_axis(row_scores, order, axis=1),
+        )
+
+    def vector(self, row):
+        return self._row(row).tolist()
@@ -0,0 +1,54 @@
+import hashlib
+import json
+
+DIGEST_SIZE = 16
+
+
+def fingerprint_message(message):
+    # Canonical JSON, so equal messages hash equally regardless of key order
+    encoded = json.dumps(
+        message, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode()
+    return hashlib.blake2b(encoded, digest_size=DIGEST_SIZE).digest()
+
+
+def fingerprint_messages(messages):
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for message in messages:
+        digest.update(fingerprint_message(message))
+    return digest.digest()
+
+
+class MessagesFingerprint:
+    """Fingerprints of an incoming message list, computed at most once."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self._message_fingerprints = None
+        self._last = None
+        self._whole = None
+
+    @property
+    def message_fingerprints(self):
+        if self._message_fingerprints is None:
+            self._message_fingerprints = [
+                fingerprint_message(message) for message in self.messages
+            ]
+        return self._message_fingerprints
+
+    @property
+    def last(self):
+        if self._last is None and len(self.messages) > 0:
+            if self._message_fingerprints is not None:
+                self._last = self._message_fingerprints[-1]
+            else:
+                self._last = fingerprint_message(self.messages[-1])
+        return self._last
+
+    @property
+    def whole(self):
+        if self._whole is None:
+            self._whole = hashlib.blake2b(
+                b"".join(self.message_fingerprints), digest_size=DIGEST_SIZE
+            ).digest()
+        return self._whole
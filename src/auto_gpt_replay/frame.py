@@ -1,101 +1,220 @@
 import json
-import os
+
+from auto_gpt_replay.compression import open_text
+from auto_gpt_replay.fingerprint import (
+    MessagesFingerprint,
+    fingerprint_message,
+    fingerprint_messages,
+)
+from auto_gpt_replay.manifest import (
+    COMMAND_RESULT,
+    FILE_FORMATS,
+    FORMAT_JSON,
+    SESSION_FILES,
+    FrameFile,
+    frame_folder,
+    scan_frame_folder,
+)
+from auto_gpt_replay.normalize import ArgumentNormalizer
+
+NOT_LOADED = object()
+
+COMMAND_RESULT_PREFIX = "Command "
+COMMAND_RESULT_SEPARATOR = " returned: "
+
+SUMMARY_PROMPT = (
+    "Your task is to create a concise running summary of actions and information results in "
+    "the provided text, focusing on key and potentially important information to remember."
+)
+
+
+def is_summary_prompt(messages, expected_content=SUMMARY_PROMPT):
+    # Auto-GPT's running summary prompt, recognised by its first sentence
+    if len(messages) != 1:
+        return False
+    message = messages[0]
+    if not isinstance(message, dict) or message.get("role") != "user":
+        return False
+    first_actual_sentence = str(message.get("content")).split(".")[0]
+    return first_actual_sentence == expected_content.split(".")[0]
+
+
+def parse_command_result(message):
+    # "Command <name> returned: <result>", as Auto-GPT adds it to the history
+    if not message.startswith(COMMAND_RESULT_PREFIX):
+        return None
+    name, separator, result = message[len(COMMAND_RESULT_PREFIX) :].partition(
+        COMMAND_RESULT_SEPARATOR
+    )
+    if not separator:
+        return None
+    return {"name": name, "result": result}
 
 
 class Frame:
-    session_files = {
-        "next_action": "_next_action.json",
-        "summary": "_summary.txt",
-        "prompt_summary": "_prompt_summary.json",
-        "full_message_history": "_full_message_history.json",
-        "current_context": "_current_context.json",
-        "user_input": "_user_input.txt",
-    }
-
-    summary_prompt_backup = (
-        "Your task is to create a concise running summary of actions and information results in "
-        "the provided text, focusing on key and potentially important information to remember."
+    __slots__ = (
+        "user_input_replayed",
+        "next_action_replayed",
+        "summary_replayed",
+        "command_replayed",
+        "next_command",
+        "workspace_root",
+        "index",
+        "session_dir",
+        "session",
+        "archive",
+        "pool",
+        "frame_folder",
+        "files",
+        "can_replay",
+        "summary_prompt",
+        "summary",
+        "summary_prompt_fingerprint",
+        "current_context",
+        "last_context_fingerprint",
+        "current_user_input",
+        "_full_message_history",
+        "_next_action",
+        "_command_result",
+        "normalizer",
+        "_replay_action",
     )
 
+    session_files = SESSION_FILES
+
+    summary_prompt_backup = SUMMARY_PROMPT
+
     @staticmethod
-    def read_text_file(file):
-        with open(
-            file,
-            "r",
-            encoding="utf-8",
-        ) as fp:
+    def read_text_file(file, compression=None):
+        with open_text(file, compression) as fp:
             return fp.read()
 
     @staticmethod
-    def read_json_file(file):
-        with open(
-            file,
-            "r",
-            encoding="utf-8",
-        ) as fp:
+    def read_json_file(file, compression=None):
+        with open_text(file, compression) as fp:
             return json.load(fp)
 
-    def __init__(self, index, session_dir, session, log, skip_input, workspace_root):
+    @staticmethod
+    def decode_text(data):
+        # Match the newline translation done when reading text files
+        return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+    def __init__(
+        self,
+        index,
+        session_dir,
+        session,
+        log,
+        skip_input,
+        workspace_root,
+        archive=None,
+        manifest=None,
+        pool=None,
+        normalizer=None,
+    ):
         self.user_input_replayed = False
         self.next_action_replayed = False
         self.summary_replayed = False
         self.command_replayed = False
         self.next_command = None
         self.workspace_root = workspace_root
+        # Shared by the frames of a replay, so relative paths are computed once
+        if normalizer is None:
+            normalizer = ArgumentNormalizer(workspace_root)
+        self.normalizer = normalizer
         self.index = index
         self.session_dir = session_dir
         self.session = session
-        self.frame_folder = os.path.join(
-            self.session_dir, self.session, str(self.index).zfill(3)
-        )
-        if not self._check_frame_exists():
+        # Frames missing from the archive fall back to the loose frame folder
+        if archive is not None and not archive.has_frame(index):
+            archive = None
+        self.archive = archive
+        # Messages of loose frames are shared with other frames through the pool
+        self.pool = pool
+        self.frame_folder = frame_folder(self.session_dir, self.session, self.index)
+        # Set before any early return, frames that cannot be replayed are still
+        # asked for their recorded data (e.g. the frame after the last one)
+        self.summary_prompt = None
+        self.summary = None
+        self.summary_prompt_fingerprint = None
+        self.current_context = None
+        self.last_context_fingerprint = None
+        self.current_user_input = None
+        # The full history is only needed when replaying a command result
+        self._full_message_history = NOT_LOADED
+        self._next_action = NOT_LOADED
+        self._command_result = NOT_LOADED
+        self._replay_action = NOT_LOADED
+        self.files = self._load_files(manifest)
+        if self.files is None:
             log(
                 f"Replay frame {self.index} not found! Running live now!",
             )
             self.can_replay = False
             return
 
-        self._load_files()
         self.summary_prompt, self.summary = self._load_summary()
+        if self.summary_prompt is not None:
+            self.summary_prompt_fingerprint = fingerprint_messages(self.summary_prompt)
 
         self.current_context = self._load_frame_context()
         # We cannot replay if we don't have a context
         if self.current_context is None:
             self.can_replay = False
             return
+        self.last_context_fingerprint = fingerprint_message(
+            self._get_last_context_message()
+        )
 
-        if skip_input:
-            self.current_user_input = None
-        else:
+        if not skip_input:
             self.current_user_input = self._load_user_input()
 
-        self.full_message_history = self._load_full_message_history()
-
         self.can_replay = True
 
-    def _check_frame_exists(self):
-        return os.path.exists(self.frame_folder)
+    @property
+    def full_message_history(self):
+        if self._full_message_history is NOT_LOADED:
+            self._full_message_history = self._load_full_message_history()
+        return self._full_message_history
+
+    @property
+    def command_result(self):
+        if not self.can_replay:
+            return None
+        if self._command_result is NOT_LOADED:
+            self._command_result = self._load_command_result()
+        return self._command_result
 
     def _get_file_content(self, file):
-        # check if class has attribute file
-        if not hasattr(self, file):
+        if self.files is None:
+            return None
+        frame_file = self.files.get(file)
+        if frame_file is None:
             return None
-        file_path = os.path.join(self.frame_folder, getattr(self, file))
-        # extract file type from session_files
-        file_type = self.session_files[file].split(".")[-1]
-        if file_type == "json":
-            return self.read_json_file(file_path)
-        return self.read_text_file(file_path)
-
-    def _load_files(self):
-        # walk the frame folder and find the files
-        for root, dirs, files in os.walk(self.frame_folder):
-            for file in files:
-                for key, value in self.session_files.items():
-                    if file.endswith(value):
-                        setattr(self, key, file)
-
-    def try_replay_message(self, messages):
+        if self.archive is not None:
+            return self.archive.load(self.index, file)
+        if frame_file.format == FORMAT_JSON:
+            content = self.read_json_file(frame_file.path, frame_file.compression)
+            if self.pool is not None:
+                return self.pool.messages(content)
+            return content
+        return self.read_text_file(frame_file.path, frame_file.compression)
+
+    def _load_files(self, manifest):
+        if self.archive is not None:
+            return {
+                key: FrameFile(key, None, FILE_FORMATS[key])
+                for key in self.archive.frame_files(self.index)
+            }
+        if manifest is not None:
+            record = manifest.get(self.index)
+        else:
+            record = scan_frame_folder(self.index, self.frame_folder)
+        if record is None:
+            return None
+        return record.files
+
+    def try_replay_message(self, messages, fingerprint=None):
         if not self.can_replay:
             return False
 
@@ -103,22 +222,24 @@ class Frame:
             # What is this?
             return False
 
+        if fingerprint is None:
+            fingerprint = MessagesFingerprint(messages)
+
+        # Compare fingerprints first, full equality is only checked on a match
         if (
             self.summary_replayed is False
             and self.summary is not None
+            and len(messages) == len(self.summary_prompt)
+            and fingerprint.whole == self.summary_prompt_fingerprint
             and messages == self.summary_prompt
         ):
-            self.summary_replayed = True
-            return self.summary
+            return self.replay_summary()
 
-        if self._get_last_context_message() == messages[-1]:
-            self.next_action_replayed = True
-            next_action = self._get_next_action()
-            if next_action is None:
-                return False
-            next_action = self._filter_command_arguments(next_action)
-            self._note_next_command(next_action)
-            return json.dumps(next_action)
+        if (
+            fingerprint.last == self.last_context_fingerprint
+            and self._get_last_context_message() == messages[-1]
+        ):
+            return self.replay_next_action()
 
         if self._check_if_should_be_summary(messages):
             self.summary_replayed = True
@@ -127,6 +248,19 @@ class Frame:
 
         return False
 
+    def replay_summary(self):
+        self.summary_replayed = True
+        return self.summary
+
+    def replay_next_action(self):
+        self.next_action_replayed = True
+        replay_action = self._get_replay_action()
+        if replay_action is None:
+            return False
+        next_action, response = replay_action
+        self._note_next_command(next_action)
+        return response
+
     def try_replay_input(self):
         if not self.can_replay:
             return False
@@ -153,6 +287,17 @@ class Frame:
 
         return False
 
+    def _load_command_result(self):
+        # Packed sessions store the result, otherwise it is found in the history
+        record = self._get_file_content(COMMAND_RESULT)
+        if record is not None:
+            # Older archives also stored the arguments, nothing reads them
+            return {"name": record["name"], "result": record["result"]}
+        message = self.try_replay_command_for_prev_frame()
+        if message is False:
+            return None
+        return parse_command_result(message)
+
     def is_end_of_frame(self):
         if not self.can_replay:
             return False
@@ -168,6 +313,9 @@ class Frame:
             return None
         return frame_context
 
+    def context_fingerprint(self):
+        return fingerprint_messages(self.current_context)
+
     def _get_last_context_message(self):
         return self.current_context[-1]
 
@@ -180,10 +328,20 @@ class Frame:
         return summary_prompt, summary
 
     def _get_next_action(self):
-        next_action = self._get_file_content("next_action")
-        if next_action is None:
-            return None
-        return next_action
+        if self._next_action is NOT_LOADED:
+            self._next_action = self._get_file_content("next_action")
+        return self._next_action
+
+    def _get_replay_action(self):
+        # Normalised and serialised once, however often the frame is replayed
+        if self._replay_action is NOT_LOADED:
+            next_action = self._get_next_action()
+            if next_action is None:
+                self._replay_action = None
+            else:
+                next_action = self._filter_command_arguments(next_action)
+                self._replay_action = next_action, json.dumps(next_action)
+        return self._replay_action
 
     def _load_user_input(self):
         user_input = self._get_file_content("user_input")
@@ -226,33 +384,22 @@ class Frame:
         return self.next_command
 
     def _check_if_should_be_summary(self, messages):
-        if len(messages) > 1 or len(messages) == 0:
-            return False
-        message = messages[0]
-        if message["role"] != "user":
-            return False
-
         if self.summary_prompt is not None:
-            expected_content = self.summary_prompt[0]["content"]
-        else:
-            expected_content = self.summary_prompt_backup
-
-        first_actual_sentence = message["content"].split(".")[0]
-        first_expected_sentence = expected_content.split(".")[0]
-
-        return first_actual_sentence == first_expected_sentence
+            return is_summary_prompt(messages, self.summary_prompt[0]["content"])
+        return is_summary_prompt(messages, self.summary_prompt_backup)
 
     def _filter_command_arguments(self, next_action):
         if (
             "command" in next_action
             and type(next_action["command"]) is dict
-            and "args" in next_action["command"]
+            and type(next_action["command"].get("args")) is dict
         ):
-            command_args = next_action["command"]["args"]
-            for pathlike in ["filename", "directory", "clone_path"]:
-                if pathlike in command_args:
-                    command_args[pathlike] = os.path.relpath(
-                        command_args[pathlike], self.workspace_root
-                    )
-            next_action["command"]["args"] = command_args
+            # The parsed next action is kept for the frame, so filter a copy
+            command_args = self.normalizer.normalize(
+                next_action["command"].get("name"), next_action["command"]["args"]
+            )
+            next_action = {
+                **next_action,
+                "command": {**next_action["command"], "args": command_args},
+            }
         return next_action
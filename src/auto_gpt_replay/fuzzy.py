@@ -0,0 +1,193 @@
+"""Tolerant matching of prompts that differ slightly from the recording.
+
+Volatile parts of the messages (the current time, ids, token budgets) are
+normalised first, which is enough for most prompts. For the rest every
+recorded prompt gets a MinHash signature of the word shingles of its last few
+messages, bucketed with LSH, so a prompt is only compared with the few
+recorded prompts that share a bucket with it. The most similar one above the
+threshold is replayed.
+"""
+import hashlib
+import os
+import random
+import re
+
+from auto_gpt_replay.fingerprint import fingerprint_messages
+
+VOLATILE_PATTERNS = (
+    (re.compile(r"(The current time and date is ).*"), r"\1<now>"),
+    (
+        re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?"),
+        "<datetime>",
+    ),
+    (
+        re.compile(
+            r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I
+        ),
+        "<uuid>",
+    ),
+    (re.compile(r"\b\d+ tokens\b"), "<n> tokens"),
+)
+WHITESPACE = re.compile(r"\s+")
+
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_WORDS = 3
+# The prompts of neighbouring frames share all but their latest messages
+RECENT_MESSAGES = 4
+PERMUTATIONS = 64
+BANDS = 16
+
+KIND_CONTEXT = "context"
+KIND_SUMMARY = "summary"
+
+
+def shingle_hash(shingle):
+    # Unlike hash(), the same in every process
+    digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class FuzzyMatcher:
+    def __init__(
+        self,
+        threshold=DEFAULT_THRESHOLD,
+        patterns=VOLATILE_PATTERNS,
+        recent_messages=RECENT_MESSAGES,
+    ):
+        self.threshold = threshold
+        self.patterns = patterns
+        self.recent_messages = recent_messages
+        # XOR with random masks stands in for the hash permutations, it is
+        # several times cheaper than (a * x + b) mod p in Python
+        rng = random.Random(PERMUTATIONS)
+        self.masks = [rng.getrandbits(64) for _ in range(PERMUTATIONS)]
+        self.rows = PERMUTATIONS // BANDS
+        self._message_signatures = {}
+
+    @classmethod
+    def from_env(cls):
+        # Fuzzy matching is off unless a threshold is set
+        threshold = os.getenv("REPLAY_FUZZY_THRESHOLD")
+        if not threshold:
+            return None
+        return cls(float(threshold))
+
+    def normalize_text(self, text):
+        for pattern, replacement in self.patterns:
+            text = pattern.sub(replacement, text)
+        return WHITESPACE.sub(" ", text).strip()
+
+    def normalize(self, messages):
+        return [
+            {
+                "role": message.get("role"),
+                "content": self.normalize_text(message.get("content") or ""),
+            }
+            for message in messages
+        ]
+
+    def fingerprint(self, normalized):
+        return fingerprint_messages(normalized)
+
+    def message_signature(self, role, content):
+        key = (role, content)
+        signature = self._message_signatures.get(key)
+        if signature is None:
+            words = f"{role}: {content}".split(" ")
+            shingles = {
+                shingle_hash(" ".join(words[i : i + SHINGLE_WORDS]))
+                for i in range(max(len(words) - SHINGLE_WORDS + 1, 1))
+            }
+            signature = tuple(
+                min([shingle ^ mask for shingle in shingles]) for mask in self.masks
+            )
+            self._message_signatures[key] = signature
+        return signature
+
+    def signature(self, normalized):
+        # Only the latest messages, with the whole history the prompt just
+        # replayed would look most like any prompt after it. The MinHash of a
+        # union is the minimum of the MinHashes, and most messages repeat from
+        # prompt to prompt, so each is hashed only once
+        signatures = [
+            self.message_signature(message["role"], message["content"])
+            for message in normalized[-self.recent_messages :]
+        ]
+        return tuple(map(min, zip(*signatures)))
+
+    def bands(self, signature):
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows])
+            for band in range(BANDS)
+        ]
+
+    @staticmethod
+    def similarity(signature, other):
+        return sum(a == b for a, b in zip(signature, other)) / len(signature)
+
+
+class FuzzyIndex:
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.exact = {}
+        self.signatures = {}
+        self.buckets = {}
+
+    def add(self, messages, frame_index, kind):
+        normalized = self.matcher.normalize(messages)
+        self.exact.setdefault(self.matcher.fingerprint(normalized), []).append(
+            (frame_index, kind)
+        )
+        signature = self.matcher.signature(normalized)
+        self.signatures[(frame_index, kind)] = signature
+        for band in self.matcher.bands(signature):
+            self.buckets.setdefault(band, set()).add((frame_index, kind))
+
+    @classmethod
+    def build(cls, matcher, frames):
+        index = cls(matcher)
+        for frame in frames:
+            if not frame.can_replay:
+                continue
+            index.add(frame.current_context, frame.index, KIND_CONTEXT)
+            if frame.summary_prompt is not None:
+                index.add(frame.summary_prompt, frame.index, KIND_SUMMARY)
+        return index
+
+    @staticmethod
+    def _distance(frame_index, current_frame):
+        # The current frame first, then frames ahead, the agent drifts forward
+        if frame_index >= current_frame:
+            return frame_index - current_frame
+        return current_frame - frame_index + 0.5
+
+    def lookup(self, messages, current_frame, exclude=()):
+        # (frame index, kind, similarity) of the most similar recorded prompt
+        # that is not excluded, e.g. for having been replayed already. The
+        # threshold is up to the caller so it can log near misses
+        normalized = self.matcher.normalize(messages)
+        exact = [
+            entry
+            for entry in self.exact.get(self.matcher.fingerprint(normalized), ())
+            if entry not in exclude
+        ]
+        if exact:
+            frame_index, kind = min(
+                exact, key=lambda entry: self._distance(entry[0], current_frame)
+            )
+            return frame_index, kind, 1.0
+
+        signature = self.matcher.signature(normalized)
+        candidates = set()
+        for band in self.matcher.bands(signature):
+            candidates.update(self.buckets.get(band, ()))
+        candidates.difference_update(exclude)
+        best = None
+        best_key = None
+        for candidate in candidates:
+            similarity = self.matcher.similarity(signature, self.signatures[candidate])
+            key = (-similarity, self._distance(candidate[0], current_frame))
+            if best_key is None or key < best_key:
+                best = (*candidate, similarity)
+                best_key = key
+        return best
@@ -0,0 +1,182 @@
+"""Run a replay without any prompts, e.g. as a regression run in CI.
+
+    python -m auto_gpt_replay.headless <session> --frames 1-50 --on-miss fail \\
+        -- --ai-settings ai_settings.yaml
+
+Everything after ``--`` is passed on to Auto-GPT. The summary of the run is
+printed as JSON (or written to ``--summary``) and the exit code is 0 when
+every call was replayed, 1 when the agent diverged and 2 when the replay did
+not reach its last frame.
+"""
+import argparse
+import json
+import os
+import sys
+
+from auto_gpt_replay import load_env
+from auto_gpt_replay.console import OUTPUT_MODES, ReplayConsole
+from auto_gpt_replay.report import (
+    MISS_FAIL,
+    MISS_POLICIES,
+    STATUS_INCOMPLETE,
+    STATUS_PASSED,
+    ReplayFinished,
+)
+
+EXIT_CODES = {STATUS_PASSED: 0, STATUS_INCOMPLETE: 2}
+
+
+def default_session_dir():
+    return os.path.join(os.getcwd(), "logs", "DEBUG")
+
+
+def parse_frames(frames):
+    start, separator, end = frames.partition("-")
+    try:
+        start_frame = int(start) if start else 1
+        end_frame = start_frame
+        if separator:
+            end_frame = int(end) if end else None
+    except ValueError:
+        raise ValueError(
+            f"invalid frame range {frames!r}, use e.g. 1-50, 5- or 7"
+        ) from None
+    if start_frame < 1 or (end_frame is not None and end_frame < start_frame):
+        raise ValueError(
+            f"invalid frame range {frames!r}, frames start at 1 and a range "
+            "cannot end before it starts"
+        )
+    return start_frame, end_frame
+
+
+def frame_range(frames):
+    # For --frames, a bad range is a usage error instead of a traceback
+    try:
+        return parse_frames(frames)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from None
+
+
+def split_autogpt_args(argv):
+    # Everything after "--" is Auto-GPT's. argparse.REMAINDER would also take
+    # the replay's own options when they follow the session name
+    if "--" not in argv:
+        return list(argv), []
+    index = argv.index("--")
+    return argv[:index], argv[index + 1 :]
+
+
+def run_headless(
+    session,
+    start_frame=1,
+    end_frame=None,
+    on_miss=MISS_FAIL,
+    max_misses=None,
+    autogpt_args=(),
+    session_dir=None,
+    console_mode=None,
+):
+    if on_miss not in MISS_POLICIES:
+        raise ValueError(f"Unknown miss policy {on_miss}, use one of {MISS_POLICIES}")
+    if start_frame < 1 or (end_frame is not None and end_frame < start_frame):
+        raise ValueError(f"Frame range {start_frame}-{end_frame} is empty")
+    if session_dir is None:
+        session_dir = default_session_dir()
+    if not os.path.exists(os.path.join(session_dir, session)):
+        raise FileNotFoundError(f"Session {session} not found in {session_dir}")
+
+    load_env()
+
+    from autogpt.cli import main as autogpt_main
+
+    from auto_gpt_replay.main import skip_prompt
+    from auto_gpt_replay.mock import MockIOFunctions
+
+    skip_prompt()
+    console = ReplayConsole(console_mode) if console_mode else ReplayConsole.from_env()
+    console.install()
+
+    openai_mock = MockIOFunctions(
+        session_dir,
+        session,
+        start_frame=start_frame,
+        end_frame=end_frame,
+        on_miss=on_miss,
+        max_misses=max_misses,
+        interactive=False,
+        console=console,
+    )
+    # Active before Auto-GPT loads the plugin, which then leaves the replay
+    # to this one instead of starting another
+    openai_mock.mock_start_interaction_loop()
+
+    try:
+        autogpt_main.main(
+            args=["--skip-reprompt", *autogpt_args], standalone_mode=False
+        )
+    except ReplayFinished as finished:
+        return finished.summary
+    except SystemExit:
+        pass
+    finally:
+        console.restore()
+    return openai_mock.summary(STATUS_INCOMPLETE)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a session without prompts.",
+        epilog="Arguments after -- are passed on to Auto-GPT.",
+    )
+    parser.add_argument("session", help="Session folder name")
+    parser.add_argument(
+        "--frames",
+        type=frame_range,
+        default="1-",
+        help="Frame range to replay, e.g. 1-50 (default: all)",
+    )
+    parser.add_argument(
+        "--on-miss",
+        choices=MISS_POLICIES,
+        default=MISS_FAIL,
+        help="What to do with calls that cannot be replayed (default: fail)",
+    )
+    parser.add_argument(
+        "--max-misses",
+        type=int,
+        default=None,
+        help="Stop as diverged after this many unmatched calls",
+    )
+    parser.add_argument("--session-dir", default=default_session_dir())
+    parser.add_argument(
+        "--console",
+        choices=OUTPUT_MODES,
+        default=None,
+        help="Console output during the replay (default: REPLAY_OUTPUT or buffered)",
+    )
+    parser.add_argument("--summary", help="Write the JSON summary to this file")
+    argv, autogpt_args = split_autogpt_args(sys.argv[1:])
+    args = parser.parse_args(argv)
+    start_frame, end_frame = args.frames
+
+    summary = run_headless(
+        args.session,
+        start_frame=start_frame,
+        end_frame=end_frame,
+        on_miss=args.on_miss,
+        max_misses=args.max_misses,
+        autogpt_args=autogpt_args,
+        session_dir=args.session_dir,
+        console_mode=args.console,
+    )
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as fp:
+            json.dump(summary, fp, indent=2)
+    else:
+        print(json.dumps(summary))
+    sys.exit(EXIT_CODES.get(summary["status"], 1))
+
+
+if __name__ == "__main__":
+    main()
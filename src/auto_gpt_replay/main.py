@@ -1,56 +1,57 @@
 import os
-import re
-from datetime import datetime
 from pathlib import Path
 
+from auto_gpt_replay.console import ReplayConsole
+from auto_gpt_replay.session_index import SessionIndex
+
+
+def skip_prompt():
+    from autogpt.config.config import Config
+
+    cfg = Config()
+    cfg.skip_reprompt = True
+
+
+def defer_replay(create_replay):
+    # The replay machinery (frames, openai, the mocks) is only loaded when the
+    # agent starts its interaction loop, not while the plugins are loaded
+    from autogpt.agent.agent import Agent
+
+    start_interaction_loop = Agent.start_interaction_loop
+
+    def replay_start_interaction_loop(agent):
+        Agent.start_interaction_loop = start_interaction_loop
+        create_replay().mock_start_interaction_loop()
+        return Agent.start_interaction_loop(agent)
+
+    Agent.start_interaction_loop = replay_start_interaction_loop
+
 
 class Replay:
     def __init__(self):
-        self.pattern = r"^([0-9]{8})_([0-9]{6})_"
         self.session_dir = os.path.join(Path(os.getcwd()), "logs", "DEBUG")
+        self.session_index = SessionIndex(self.session_dir)
 
     def find_last_session(self):
-        if not os.path.exists(self.session_dir):
-            return None
-
-        sessions = os.listdir(self.session_dir)
-
-        last_session = None
-        last_session_time = datetime(1970, 1, 1, 0, 0, 0)
-        for session in sessions:
-            match = re.match(self.pattern, session)
-            if match:
-                date_str, time_str = match.groups()
-                year, month, day = (
-                    int(date_str[:4]),
-                    int(date_str[4:6]),
-                    int(date_str[6:]),
-                )
-                hour, minute, second = (
-                    int(time_str[:2]),
-                    int(time_str[2:4]),
-                    int(time_str[4:]),
-                )
-                dt = datetime(year, month, day, hour, minute, second)
-                if dt > last_session_time:
-                    last_session_time = dt
-                    last_session = session
-
-        return last_session
+        return self.session_index.latest()
 
     def run_replay(self):
         from autogpt.logs import logger
         from colorama import Fore
 
+        skip_prompt()
+
         logger.typewriter_log("WARNING:", Fore.RED, "Running in Replay mode")
 
-        last_session = self.find_last_session()
+        # A session picked in the .env file is replayed without asking
+        selected_session = os.getenv("REPLAY_SESSION")
+        last_session = selected_session or self.find_last_session()
 
         if last_session is None:
             logger.typewriter_log("WARNING:", Fore.RED, "No previous sessions found!")
             return
 
-        while True:
+        while not selected_session:
             logger.typewriter_log(
                 f"REPLAY found - {last_session}, run?",
                 Fore.GREEN,
@@ -68,10 +69,18 @@ class Replay:
 
         logger.typewriter_log("Replaying session:", Fore.GREEN, last_session)
 
-        from auto_gpt_replay.mock import MockIOFunctions, skip_prompt, speed_up_replay
+        # Start further into the session without running the frames before it
+        start_frame = int(os.getenv("REPLAY_START_FRAME", "1"))
 
-        skip_prompt()
-        speed_up_replay()
+        def create_replay():
+            from auto_gpt_replay.mock import MockIOFunctions
+
+            # Whole records instead of typed out words until the replay is over.
+            # Installed once Auto-GPT has asked its startup questions, those
+            # prompts are shown before input() waits for the answer.
+            console = ReplayConsole.from_env().install(logger)
+            return MockIOFunctions(
+                self.session_dir, last_session, start_frame=start_frame, console=console
+            )
 
-        openai_mock = MockIOFunctions(self.session_dir, last_session)
-        openai_mock.mock_start_interaction_loop()
+        defer_replay(create_replay)
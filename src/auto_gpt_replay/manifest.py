@@ -0,0 +1,117 @@
+"""Manifest of the frame folders and files of a recorded session.
+
+Built with one ``scandir`` per folder, it resolves every frame file to its
+path and format once, so frames do not walk their folders or dispatch on file
+name suffixes while replaying. Compressed files (``.gz``/``.zst``) map to the
+same keys and carry their compression.
+"""
+import os
+
+from auto_gpt_replay.compression import split_compression
+
+SESSION_FILES = {
+    "next_action": "_next_action.json",
+    "summary": "_summary.txt",
+    "prompt_summary": "_prompt_summary.json",
+    "full_message_history": "_full_message_history.json",
+    "current_context": "_current_context.json",
+    "user_input": "_user_input.txt",
+}
+
+FORMAT_JSON = "json"
+FORMAT_TEXT = "text"
+
+# Extracted from the full message history when a session is packed
+COMMAND_RESULT = "command_result"
+
+FILE_FORMATS = {
+    key: FORMAT_JSON if suffix.endswith(".json") else FORMAT_TEXT
+    for key, suffix in SESSION_FILES.items()
+}
+FILE_FORMATS[COMMAND_RESULT] = FORMAT_JSON
+# Auto-GPT names frame files "<n>_<file name>", which maps straight to a key
+SUFFIX_KEYS = {suffix: key for key, suffix in SESSION_FILES.items()}
+
+
+class FrameFile:
+    __slots__ = ("key", "path", "format", "compression")
+
+    def __init__(self, key, path, file_format, compression=None):
+        self.key = key
+        self.path = path
+        self.format = file_format
+        self.compression = compression
+
+
+class FrameRecord:
+    __slots__ = ("index", "folder", "files")
+
+    def __init__(self, index, folder, files):
+        self.index = index
+        self.folder = folder
+        self.files = files
+
+
+def _file_key(name):
+    _, separator, rest = name.partition("_")
+    if separator:
+        key = SUFFIX_KEYS.get("_" + rest)
+        if key is not None:
+            return key
+    for suffix, key in SUFFIX_KEYS.items():
+        if name.endswith(suffix):
+            return key
+    return None
+
+
+def scan_frame_folder(index, folder):
+    files = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                name, compression = split_compression(entry.name)
+                key = _file_key(name)
+                if key is not None:
+                    files[key] = FrameFile(
+                        key, entry.path, FILE_FORMATS[key], compression
+                    )
+    except FileNotFoundError:
+        return None
+    return FrameRecord(index, folder, files)
+
+
+def list_frame_folders(session_path):
+    frames = []
+    with os.scandir(session_path) as entries:
+        for entry in entries:
+            if entry.is_dir() and entry.name.isdigit():
+                frames.append((int(entry.name), entry.path))
+    return sorted(frames)
+
+
+def frame_folder(session_dir, session, index):
+    return os.path.join(session_dir, session, str(index).zfill(3))
+
+
+class SessionManifest:
+    def __init__(self, session_dir, session):
+        self.session_dir = session_dir
+        self.session = session
+        self.frames = {}
+
+    def scan(self):
+        session_path = os.path.join(self.session_dir, self.session)
+        if os.path.exists(session_path):
+            for index, folder in list_frame_folders(session_path):
+                self.frames[index] = scan_frame_folder(index, folder)
+        return self
+
+    def get(self, index):
+        # Frames written after the scan (or never scanned) are looked up on demand
+        if self.frames.get(index) is None:
+            self.frames[index] = scan_frame_folder(
+                index, frame_folder(self.session_dir, self.session, index)
+            )
+        return self.frames[index]
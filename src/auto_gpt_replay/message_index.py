@@ -0,0 +1,30 @@
+class MessageIndex:
+    def __init__(self):
+        self.entries = {}
+
+    def add(self, fingerprint, frame_index):
+        self.entries.setdefault(fingerprint, []).append(frame_index)
+
+    @classmethod
+    def build(cls, frames):
+        index = cls()
+        for frame in frames:
+            if not frame.can_replay:
+                continue
+            index.add(frame.context_fingerprint(), frame.index)
+            if frame.summary_prompt_fingerprint is not None:
+                index.add(frame.summary_prompt_fingerprint, frame.index)
+        return index
+
+    def lookup(self, fingerprint, current_frame):
+        candidates = self.entries.get(fingerprint)
+        if not candidates:
+            return None
+        # Prefer the closest frame ahead, the agent usually drifts forward
+        for frame_index in candidates:
+            if frame_index > current_frame:
+                return frame_index
+        for frame_index in candidates:
+            if frame_index != current_frame:
+                return frame_index
+        return None
@@ -0,0 +1,48 @@
+import sys
+
+
+class MessagePool:
+    """Shares role strings, contents and whole messages between frames.
+
+    Every frame's full message history repeats the messages of the previous
+    frames, so interning them keeps one copy per distinct message however
+    many frames hold it.
+    """
+
+    def __init__(self):
+        self._contents = {}
+        self._messages = {}
+
+    def content(self, content):
+        if not isinstance(content, str):
+            return content
+        return self._contents.setdefault(content, content)
+
+    def message(self, message):
+        if not isinstance(message, dict):
+            return message
+        role = message.get("role")
+        content = self.content(message.get("content"))
+        if len(message) == 2 and isinstance(role, str) and isinstance(content, str):
+            key = (role, content)
+            shared = self._messages.get(key)
+            if shared is None:
+                shared = self._messages.setdefault(
+                    key, {"role": sys.intern(role), "content": content}
+                )
+            return shared
+
+        compact = dict(message)
+        if isinstance(role, str):
+            compact["role"] = sys.intern(role)
+        if "content" in compact:
+            compact["content"] = content
+        return compact
+
+    def messages(self, messages):
+        if not isinstance(messages, list):
+            return messages
+        return [self.message(message) for message in messages]
+
+    def __len__(self):
+        return len(self._messages)
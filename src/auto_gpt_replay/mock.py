@@ -1,64 +1,145 @@
+import atexit
 import builtins
-import copy
+import logging
 import os
 import re
 from datetime import datetime
 
+import autogpt.agent.agent
 import openai
-from _pytest.monkeypatch import MonkeyPatch
 from autogpt.agent.agent import Agent
 from autogpt.app import execute_command
-from autogpt.config.config import Config
+
 try:
     from autogpt.llm.token_counter import count_message_tokens, count_string_tokens
 except ImportError:
-    from autogpt.llm.utils.token_counter import count_message_tokens, count_string_tokens
-from autogpt.logs import TypingConsoleHandler, logger
+    from autogpt.llm.utils.token_counter import (
+        count_message_tokens,
+        count_string_tokens,
+    )
+
+from autogpt.logs import logger
 from colorama import Fore
 
+from auto_gpt_replay.archive import SessionArchive, session_frame_indexes
+from auto_gpt_replay.fingerprint import MessagesFingerprint, fingerprint_message
 from auto_gpt_replay.frame import Frame
-
-monkeypatch = MonkeyPatch()
-
-
-def skip_prompt():
-    cfg = Config()
-    cfg.skip_reprompt = True
-
-
-def speed_up_replay():
-    def replay_TypingConsoleHandler_emit(emit):
-        def new_TypingConsoleHandler_emit(self, record):
-            monkeypatch.setattr("random.uniform", lambda a, b: 0)
-            emit(self, record)
-
-        return new_TypingConsoleHandler_emit
-
-    TypingConsoleHandler.emit = replay_TypingConsoleHandler_emit(
-        TypingConsoleHandler.emit
-    )
+from auto_gpt_replay.fuzzy import KIND_CONTEXT, KIND_SUMMARY, FuzzyIndex, FuzzyMatcher
+from auto_gpt_replay.manifest import SessionManifest
+from auto_gpt_replay.message_index import MessageIndex
+from auto_gpt_replay.message_pool import MessagePool
+from auto_gpt_replay.normalize import ArgumentNormalizer
+from auto_gpt_replay.prefetch import FramePrefetcher
+from auto_gpt_replay.report import (
+    MISS_FAIL,
+    MISS_LIVE,
+    MISS_STUB,
+    STATUS_DIVERGED,
+    STATUS_PASSED,
+    STUB_COMMAND_RESULT,
+    STUB_EMBEDDING_DIMENSIONS,
+    STUB_NEXT_ACTION,
+    STUB_USER_INPUT,
+    TIMELINE_CHROME,
+    ReplayFinished,
+    ReplayReport,
+)
+from auto_gpt_replay.seek import apply_state, frame_state
+from auto_gpt_replay.snapshot import WorkspaceSnapshots
+from auto_gpt_replay.token_cache import TokenCountCache
+
+HOOK_NAMES = {
+    "replay_ChatCompletion_create": "chat",
+    "replay_input": "input",
+    "replay_execute_command": "command",
+}
 
 
 def log(msg):
-    logger.typewriter_log("WARNING:", Fore.RED, msg)
+    # At warning level, so a quiet replay console still shows it
+    logger.typewriter_log("WARNING:", Fore.RED, msg, level=logging.WARNING)
 
 
 class MockIOFunctions:
-    def __init__(self, session_dir, last_session):
+    # The replay driving Auto-GPT, for the plugin hooks to serve from
+    active = None
+
+    def __init__(
+        self,
+        session_dir,
+        last_session,
+        start_frame=1,
+        end_frame=None,
+        on_miss=MISS_LIVE,
+        max_misses=None,
+        interactive=True,
+        console=None,
+    ):
         self.workspace_root = "/"
+        self.normalizer = ArgumentNormalizer.from_env(self.workspace_root)
         self.skip_inputs_next_n_frames = 0
         self.frames = {}
-        self.current_frame = 1
+        self.start_frame = start_frame
+        self.current_frame = start_frame
         self.session_dir = session_dir
         self.last_session = last_session
+        self.archive = SessionArchive.open(session_dir, last_session)
+        # Packed sessions only need the folders of frames missing from the archive
+        self.manifest = SessionManifest(session_dir, last_session)
+        if self.archive is None:
+            self.manifest.scan()
+        self.message_pool = MessagePool()
+        self.last_recorded_frame = max(
+            session_frame_indexes(session_dir, last_session, self.archive),
+            default=start_frame,
+        )
+        # Without anyone at the keyboard the replay stops after the last frame
+        if end_frame is None and not interactive:
+            end_frame = self.last_recorded_frame
+        self.end_frame = end_frame
+        self.on_miss = on_miss
+        self.max_misses = max_misses
+        self.interactive = interactive
+        self.console = console
+        self.report = ReplayReport(last_session, start_frame, end_frame)
+        self.timeline_path = os.getenv("REPLAY_TIMELINE")
+        self.timeline_format = os.getenv("REPLAY_TIMELINE_FORMAT", TIMELINE_CHROME)
+        atexit.register(self.export_timeline)
+        self.prefetcher = FramePrefetcher(
+            self._load_frame, int(os.getenv("REPLAY_PREFETCH_FRAMES", "2")), log
+        )
+        self.content_addressed = (
+            os.getenv("REPLAY_CONTENT_ADDRESSED", "False") == "True"
+        )
+        self.message_index = None
+        self.fuzzy = FuzzyMatcher.from_env()
+        self.fuzzy_index = None
+        # (frame index, kind) of the recorded prompts already replayed
+        self.replayed_prompts = set()
+        self.workspace_snapshots = None
+        if os.getenv("REPLAY_WORKSPACE") == "restore":
+            self.workspace_snapshots = WorkspaceSnapshots.open(
+                session_dir, last_session
+            )
+        self.embeddings = self._open_embeddings(session_dir, last_session)
+        self.token_cache = TokenCountCache.for_session(session_dir, last_session)
+        atexit.register(self.token_cache.save)
         self.original_create = openai.ChatCompletion.create
         self.original_input = builtins.input
         self.original_execute_command = execute_command
         self.cnt_mode_pattern = r"^y \-(\d+)"
 
     @staticmethod
-    def format_response(frame_response, prompt_tokens, model):
-        completion_tokens = count_string_tokens(frame_response, model)
+    def _open_embeddings(session_dir, session):
+        try:
+            from auto_gpt_replay.embeddings import EmbeddingStore
+        except ImportError:
+            # Without NumPy there are no recorded embeddings to replay
+            return None
+        return EmbeddingStore.open(session_dir, session)
+
+    @staticmethod
+    def format_response(frame_response, prompt_tokens, completion_tokens):
         response = {
             "choices": [{"message": {"content": frame_response}}],
             "usage": {
@@ -72,34 +153,46 @@ class MockIOFunctions:
     @staticmethod
     def increment_frame(func):
         def wrapper(self, *args, **kwargs):
-            result = func(self, *args, **kwargs)
+            self.report.begin(HOOK_NAMES[func.__name__], self.current_frame)
+            try:
+                result = func(self, *args, **kwargs)
+            finally:
+                self.report.end()
             current_frame = self._get_frame()
 
             if current_frame.is_end_of_frame():
+                if self.end_frame == self.current_frame:
+                    self.finish()
                 self.current_frame += 1
                 if self.skip_inputs_next_n_frames > 0:
                     self.skip_inputs_next_n_frames -= 1
+                # Keep the read-ahead window ahead of every frame, not only of
+                # frames that had to be loaded on the spot
+                self.prefetcher.schedule(
+                    self.current_frame, self.skip_inputs_next_n_frames
+                )
+                if self.current_frame == self.last_recorded_frame + 1:
+                    self.finish_console()
 
             return result
 
         return wrapper
 
     def mock_start_interaction_loop(self):
+        MockIOFunctions.active = self
+
         def replay_start_interaction_loop(start_interaction_loop):
             def new_start_interaction_loop(_self):
                 _self.created_at = "REPLAY_" + datetime.now().strftime("%Y%m%d_%H%M%S")
 
                 self.workspace_root = _self.workspace.root
+                self.normalizer.set_workspace_root(self.workspace_root)
+                if self.start_frame > 1:
+                    self.fast_forward(_self)
 
-                monkeypatch.setattr(
-                    "openai.ChatCompletion.create", self.replay_ChatCompletion_create
-                )
-
-                monkeypatch.setattr("builtins.input", self.replay_input)
-
-                monkeypatch.setattr(
-                    "autogpt.agent.agent.execute_command", self.replay_execute_command
-                )
+                openai.ChatCompletion.create = self.replay_ChatCompletion_create
+                builtins.input = self.replay_input
+                autogpt.agent.agent.execute_command = self.replay_execute_command
 
                 start_interaction_loop(_self)
 
@@ -109,58 +202,152 @@ class MockIOFunctions:
             Agent.start_interaction_loop
         )
 
+    def fast_forward(self, agent):
+        with self.report.phase("load"):
+            state = frame_state(self._get_frame())
+        if state is None:
+            log(f"Cannot fast-forward to frame {self.start_frame}, starting fresh")
+            return
+        apply_state(agent, state)
+        self._restore_workspace(self.start_frame - 1)
+        log(
+            f"Fast-forwarded to frame {self.start_frame} "
+            f"({len(state.full_message_history)} messages in history)"
+        )
+
+    def summary(self, status):
+        return self.report.summary(
+            status, self.current_frame, prefetch=self.prefetcher.stats()
+        )
+
+    def finish(self, status=None):
+        if status is None:
+            status = STATUS_PASSED if self.report.total_misses == 0 else STATUS_DIVERGED
+        summary = self.summary(status)
+        self.prefetcher.shutdown()
+        self.token_cache.save()
+        self.export_timeline()
+        raise ReplayFinished(summary)
+
+    def finish_console(self):
+        # Past the recording Auto-GPT runs live, with its own console again
+        if self.console is None or not self.console.installed:
+            return
+        self.console.restore()
+        log(
+            f"Replay reached the end of the recording: {sum(self.report.hits.values())}"
+            f" calls replayed, {self.report.total_misses} missed"
+        )
+
+    def _miss(self, hook, reason, live, stub):
+        self.report.miss(self.current_frame, hook, reason)
+        if self.on_miss == MISS_FAIL:
+            self.finish(STATUS_DIVERGED)
+        if self.max_misses is not None and self.report.total_misses > self.max_misses:
+            self.finish(STATUS_DIVERGED)
+        if self.on_miss == MISS_STUB:
+            return stub()
+        # Everything logged so far is shown before anything runs live
+        if self.console is not None:
+            self.console.flush()
+        with self.report.phase("live"):
+            return live()
+
+    def export_timeline(self):
+        if self.timeline_path is None or not self.report.calls:
+            return
+        self.report.export(self.timeline_path, self.timeline_format)
+
+    def _restore_workspace(self, frame):
+        # The workspace as the recorded session left it after the frame's command
+        if self.workspace_snapshots is None:
+            return False
+        with self.report.phase("load"):
+            self.workspace_snapshots.restore(frame, self.workspace_root)
+        return True
+
     @increment_frame
     def replay_execute_command(self, *args, **kwargs):
+        def live():
+            return self.original_execute_command(*args, **kwargs)
+
+        def restore():
+            # The recorded command with other arguments, bring the workspace to
+            # the recorded state instead of running it
+            recorded = self._get_next_frame().command_result
+            if (
+                self.workspace_snapshots is None
+                or not self.workspace_snapshots.has_frame(self.current_frame)
+                or recorded is None
+                or recorded["name"] != command_name
+            ):
+                return live()
+            self._restore_workspace(self.current_frame)
+            return recorded["result"]
+
+        def stub():
+            return STUB_COMMAND_RESULT
+
         current_frame = self._get_frame()
         expected_command = current_frame.get_next_command()
-        if expected_command is None:
-            return self.original_execute_command(*args, **kwargs)
+        if not expected_command:
+            return self._miss("command", "no recorded command", live, stub)
 
         command_name = kwargs.get("command_name")
         if command_name is None:
             command_name = args[1]
         command_args = kwargs.get("arguments")
         if command_args is None:
-            command_args = copy.deepcopy(args[2])
+            command_args = args[2]
 
         if command_name != expected_command["name"]:
+            return self._miss("command", "command name differs", live, stub)
+
+        # Compared in place, the arguments are passed on untouched when run live
+        if not self.normalizer.matches(
+            command_name, command_args, expected_command["args"]
+        ):
+            return self._miss("command", "command arguments differ", restore, stub)
+
+        recorded = self._get_next_frame().command_result
+        if recorded is None and self.current_frame == self.last_recorded_frame:
+            # The recording ends before the result of its last command
+            self.report.hit("command")
+            if self.end_frame == self.current_frame:
+                self.finish()
             return self.original_execute_command(*args, **kwargs)
+        if recorded is None:
+            return self._miss("command", "no recorded command result", live, stub)
 
-        for pathlike in ["filename", "directory", "clone_path"]:
-            if pathlike in command_args:
-                command_args[pathlike] = os.path.relpath(
-                    command_args[pathlike], self.workspace_root
-                )
-
-        if command_args != expected_command["args"]:
-            return self.original_execute_command(*args, **kwargs)
-
-        next_frame = self._get_next_frame()
-
-        replay = next_frame.try_replay_command_for_prev_frame()
-        if replay is False:
-            return self.original_execute_command(*args, **kwargs)
-
-        cmd_message_pattern = rf"^Command {command_name} returned: (.*)$"
-        command_result = re.match(cmd_message_pattern, replay, re.MULTILINE | re.DOTALL)
-
-        if command_result:
-            return command_result.groups()[0]
+        if recorded["name"] != command_name:
+            return self._miss(
+                "command", "recorded result is for another command", live, stub
+            )
 
-        return self.original_execute_command(*args, **kwargs)
+        self._restore_workspace(self.current_frame)
+        self.report.hit("command")
+        return recorded["result"]
 
     @increment_frame
     def replay_input(self, *args, **kwargs):
-        current_frame = self._get_frame()
-
-        replay = current_frame.try_replay_input()
-        if replay is False:
+        def live():
+            if not self.interactive:
+                return STUB_USER_INPUT
             user_input = self.original_input(*args, **kwargs)
             if match := re.match(self.cnt_mode_pattern, user_input.lower()):
                 cnt = match.groups()[0]
                 self.skip_inputs_next_n_frames = int(cnt)
             return user_input
 
+        current_frame = self._get_frame()
+
+        replay = current_frame.try_replay_input()
+        if replay is False:
+            return self._miss(
+                "input", "no recorded input", live, lambda: STUB_USER_INPUT
+            )
+
+        self.report.hit("input")
         return replay
 
     @increment_frame
@@ -170,25 +357,149 @@ class MockIOFunctions:
 
         current_frame = self._get_frame()
 
-        replay = current_frame.try_replay_message(messages)
+        fingerprint = MessagesFingerprint(messages)
+        replay = current_frame.try_replay_message(messages, fingerprint)
+        if replay is False:
+            replay = self._try_replay_message_anywhere(messages, fingerprint)
         if replay is False:
-            return self.original_create(*args, **kwargs)
+            replay = self._try_replay_message_fuzzy(messages)
+        if replay is False:
+            reason = "messages differ" if current_frame.can_replay else "no frame"
+            return self._miss(
+                "chat",
+                reason,
+                lambda: self.original_create(*args, **kwargs),
+                lambda: self.format_response(STUB_NEXT_ACTION, 0, 0),
+            )
 
-        prompt_tokens = count_message_tokens(messages, model)
-        return self.format_response(replay, prompt_tokens, model)
+        # Replayed prompts and responses repeat across replays, count them once
+        prompt_tokens = self.token_cache.count(
+            fingerprint.whole, model, lambda: count_message_tokens(messages, model)
+        )
+        completion_tokens = self.token_cache.count(
+            fingerprint_message(replay),
+            model,
+            lambda: count_string_tokens(replay, model),
+        )
+        self.report.hit("chat", prompt_tokens + completion_tokens)
+        self._note_replayed_prompt()
+        return self.format_response(replay, prompt_tokens, completion_tokens)
+
+    def can_replay_embedding(self, text):
+        # A call of its own, it may be asked for while another one is running
+        self.report.begin("embedding", self.current_frame)
+        try:
+            if self.embeddings is not None and self.embeddings.has(text):
+                self.report.hit("embedding")
+                return True
+            # Run live, Auto-GPT asks the embedding API for it, stubbed the
+            # plugin serves a zero vector
+            return self._miss(
+                "embedding", "no recorded embedding", lambda: False, lambda: True
+            )
+        finally:
+            self.report.end()
+
+    def replay_embedding(self, text):
+        embedding = None
+        if self.embeddings is not None:
+            embedding = self.embeddings.get(text)
+        if embedding is None:
+            return [0.0] * self._embedding_dimensions()
+        return embedding
+
+    def _embedding_dimensions(self):
+        if self.embeddings is None or not len(self.embeddings.vectors):
+            return STUB_EMBEDDING_DIMENSIONS
+        return self.embeddings.vectors.shape[1]
+
+    def _try_replay_message_anywhere(self, messages, fingerprint):
+        if not self.content_addressed:
+            return False
+
+        if self.message_index is None:
+            self.message_index = MessageIndex.build(self._session_frames())
+
+        frame_index = self.message_index.lookup(fingerprint.whole, self.current_frame)
+        if frame_index is None:
+            return False
+
+        self._resynchronise(frame_index)
+        return self._get_frame().try_replay_message(messages, fingerprint)
+
+    def _try_replay_message_fuzzy(self, messages):
+        if self.fuzzy is None:
+            return False
+
+        if self.fuzzy_index is None:
+            self.fuzzy_index = FuzzyIndex.build(self.fuzzy, self._session_frames())
+
+        match = self.fuzzy_index.lookup(
+            messages, self.current_frame, self.replayed_prompts
+        )
+        if match is None:
+            log(f"Fuzzy match: no recorded prompt like frame {self.current_frame}'s")
+            return False
+        frame_index, kind, similarity = match
+        if similarity < self.fuzzy.threshold:
+            log(
+                f"Fuzzy match rejected: {kind} of frame {frame_index} is "
+                f"{similarity:.2f} similar, below {self.fuzzy.threshold}"
+            )
+            return False
+
+        log(f"Fuzzy match: {kind} of frame {frame_index}, {similarity:.2f} similar")
+        if frame_index != self.current_frame:
+            self._resynchronise(frame_index)
+        if kind == KIND_SUMMARY:
+            return self._get_frame().replay_summary()
+        return self._get_frame().replay_next_action()
+
+    def _note_replayed_prompt(self):
+        # Served once, a recorded reply is not the closest match for later prompts
+        frame = self._get_frame()
+        if frame.summary_replayed:
+            self.replayed_prompts.add((frame.index, KIND_SUMMARY))
+        if frame.next_action_replayed:
+            self.replayed_prompts.add((frame.index, KIND_CONTEXT))
+
+    def _session_frames(self):
+        return (
+            self._load_frame(index, True, lambda msg: None)
+            for index in session_frame_indexes(
+                self.session_dir, self.last_session, self.archive
+            )
+        )
+
+    def _resynchronise(self, frame_index):
+        log(f"Replay resynchronised from frame {self.current_frame} to {frame_index}")
+        self.current_frame = frame_index
+        # Frames that were already (partly) replayed must not be reused
+        self.frames.clear()
+
+    def _load_frame(self, index, skip_input, frame_log=log):
+        return Frame(
+            index,
+            self.session_dir,
+            self.last_session,
+            frame_log,
+            skip_input,
+            self.workspace_root,
+            self.archive,
+            self.manifest,
+            self.message_pool,
+            self.normalizer,
+        )
 
     def _get_frame(self):
         # check if frame exists
         if self.current_frame not in self.frames:
             # if not, create it
-            self.frames[self.current_frame] = Frame(
-                self.current_frame,
-                self.session_dir,
-                self.last_session,
-                log,
-                self._should_skip_input(),
-                self.workspace_root,
-            )
+            with self.report.phase("load"):
+                self.frames[self.current_frame] = self.prefetcher.get(
+                    self.current_frame, self._should_skip_input()
+                )
+            self.prefetcher.schedule(self.current_frame, self.skip_inputs_next_n_frames)
 
         # Remove old frames if exists
         if self.current_frame - 1 in self.frames:
@@ -202,12 +513,10 @@ class MockIOFunctions:
     def _get_next_frame(self):
         next_index = self.current_frame + 1
         if next_index not in self.frames:
-            self.frames[next_index] = Frame(
-                next_index,
-                self.session_dir,
-                self.last_session,
-                log,
-                self._should_skip_input(),
-                self.workspace_root,
-            )
+            # Inputs are skipped for one frame less once the replay gets there,
+            # which is also what the prefetcher loaded it with
+            with self.report.phase("load"):
+                self.frames[next_index] = self.prefetcher.get(
+                    next_index, self.skip_inputs_next_n_frames - 1 > 0
+                )
         return self.frames[next_index]
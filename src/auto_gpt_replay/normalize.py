@@ -0,0 +1,83 @@
+"""Normalisation of command arguments before they are compared.
+
+Path arguments are recorded as absolute paths in the workspace of the
+recorded session, so they are compared relative to the workspace root. Which
+arguments are paths can be set per command, e.g. in the .env file:
+
+    REPLAY_PATH_ARGUMENTS=clone_repository:clone_path;my_command:source,target
+"""
+import os
+
+DEFAULT_PATH_KEYS = ("filename", "directory", "clone_path")
+DEFAULT_COMMAND = "*"
+
+
+def parse_path_keys(spec):
+    command_path_keys = {}
+    for rule in filter(None, (part.strip() for part in spec.split(";"))):
+        command, _, keys = rule.partition(":")
+        command_path_keys[command.strip()] = tuple(
+            key.strip() for key in keys.split(",") if key.strip()
+        )
+    return command_path_keys
+
+
+class ArgumentNormalizer:
+    def __init__(self, workspace_root, command_path_keys=None):
+        self.workspace_root = workspace_root
+        self.command_path_keys = {DEFAULT_COMMAND: DEFAULT_PATH_KEYS}
+        self.command_path_keys.update(command_path_keys or {})
+        self._relative = {}
+
+    @classmethod
+    def from_env(cls, workspace_root):
+        spec = os.getenv("REPLAY_PATH_ARGUMENTS", "")
+        return cls(workspace_root, parse_path_keys(spec))
+
+    def set_workspace_root(self, workspace_root):
+        if str(workspace_root) != str(self.workspace_root):
+            self.workspace_root = workspace_root
+            self._relative.clear()
+
+    def register_path_keys(self, command_name, keys):
+        self.command_path_keys[command_name] = tuple(keys)
+
+    def path_keys(self, command_name):
+        return self.command_path_keys.get(
+            command_name, self.command_path_keys[DEFAULT_COMMAND]
+        )
+
+    def relative(self, path):
+        if not isinstance(path, (str, os.PathLike)):
+            return path
+        # The same few paths come up over and over during a replay
+        relative = self._relative.get(path)
+        if relative is None:
+            relative = os.path.relpath(path, self.workspace_root)
+            self._relative[path] = relative
+        return relative
+
+    def normalize(self, command_name, args):
+        # Only the path arguments are replaced, everything else is shared
+        path_keys = [key for key in self.path_keys(command_name) if key in args]
+        if not path_keys:
+            return args
+        normalized = dict(args)
+        for key in path_keys:
+            normalized[key] = self.relative(args[key])
+        return normalized
+
+    def matches(self, command_name, args, expected):
+        if not isinstance(args, dict) or not isinstance(expected, dict):
+            return args == expected
+        if len(args) != len(expected):
+            return False
+        path_keys = self.path_keys(command_name)
+        for key, value in args.items():
+            if key not in expected:
+                return False
+            if key in path_keys:
+                value = self.relative(value)
+            if value != expected[key]:
+                return False
+        return True
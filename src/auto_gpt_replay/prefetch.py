@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FramePrefetcher:
+    def __init__(self, load_frame, window, log, max_workers=2):
+        self.load_frame = load_frame
+        self.window = window
+        self.log = log
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._executor = None
+        if window > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="replay-prefetch"
+            )
+
+    def _prefetch(self, index, skip_input):
+        # Buffer warnings so they are shown when the frame is reached, not ahead of it
+        messages = []
+        frame = self.load_frame(index, skip_input, messages.append)
+        return frame, messages
+
+    def get(self, index, skip_input):
+        pending = self._pending.pop(index, None)
+        if pending is not None:
+            expected_skip_input, future = pending
+            if expected_skip_input == skip_input:
+                frame, messages = future.result()
+                for message in messages:
+                    self.log(message)
+                self.hits += 1
+                return frame
+            future.cancel()
+
+        self.misses += 1
+        return self.load_frame(index, skip_input, self.log)
+
+    def schedule(self, current_index, skip_inputs_left):
+        if self._executor is None:
+            return
+
+        # Drop frames the replay has already moved past
+        for index in [index for index in self._pending if index < current_index]:
+            self._pending.pop(index)[1].cancel()
+
+        for offset in range(1, self.window + 1):
+            index = current_index + offset
+            if index in self._pending:
+                continue
+            # Inputs are skipped for the next n frames, one frame at a time
+            skip_input = skip_inputs_left - offset > 0
+            self._pending[index] = (
+                skip_input,
+                self._executor.submit(self._prefetch, index, skip_input),
+            )
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def shutdown(self):
+        if self._executor is None:
+            return
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=False)
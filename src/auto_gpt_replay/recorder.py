@@ -0,0 +1,170 @@
+"""Record sessions through the plugin hooks instead of Auto-GPT's DEBUG logs.
+
+The hooks only hand their arguments to a queue; a background thread writes
+the frames in the layout ``Frame`` reads, including the message history
+Auto-GPT would log at the start of every cycle, and the session is packed
+into an archive when the recorder is closed.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+import openai
+
+from auto_gpt_replay.archive import pack_session
+from auto_gpt_replay.frame import COMMAND_RESULT_PREFIX, COMMAND_RESULT_SEPARATOR
+from auto_gpt_replay.manifest import FILE_FORMATS, FORMAT_JSON, SESSION_FILES
+
+STOP = object()
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+class SessionRecorder:
+    def __init__(
+        self,
+        session_dir,
+        name="Recording",
+        pack=True,
+        embedding_model=DEFAULT_EMBEDDING_MODEL,
+    ):
+        self.session_dir = session_dir
+        self.session = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{name}"
+        self.pack = pack
+        self.embedding_model = embedding_model
+        # Created with the first embedding, only then is NumPy needed
+        self.embeddings = None
+        self.frame = 0
+        self.frame_files = 0
+        self.history = []
+        self.context = None
+        self.reply = None
+        self.summary = None
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(
+            target=self._write_behind, name="replay-recorder", daemon=True
+        )
+        self.writer.start()
+        self.closed = False
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, session_dir):
+        return cls(
+            session_dir,
+            os.getenv("REPLAY_RECORD_NAME", "Recording"),
+            os.getenv("REPLAY_RECORD_PACK", "True") == "True",
+            os.getenv("REPLAY_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+        )
+
+    def _write(self, key, content):
+        path = os.path.join(
+            self.session_dir,
+            self.session,
+            str(self.frame).zfill(3),
+            f"{self.frame_files}{SESSION_FILES[key]}",
+        )
+        self.frame_files += 1
+        self.queue.put((path, FILE_FORMATS[key], content))
+
+    def _write_behind(self):
+        while True:
+            item = self.queue.get()
+            if item is STOP:
+                return
+            path, file_format, content = item
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fp:
+                if file_format == FORMAT_JSON:
+                    json.dump(content, fp, ensure_ascii=False)
+                else:
+                    fp.write(content)
+
+    def _end_cycle(self):
+        # The prompt and the reply go into the history once the cycle is over
+        if self.context is not None and self.reply is not None:
+            self.history.append(self.context[-1])
+            self.history.append({"role": "assistant", "content": self.reply})
+        self.context = None
+        self.reply = None
+
+    def start_frame(self, messages):
+        self._end_cycle()
+        self.frame += 1
+        self.frame_files = 0
+        self.context = list(messages)
+        # Auto-GPT summarises before it sends the prompt of the frame
+        if self.summary is not None:
+            summary_prompt, summary = self.summary
+            self.summary = None
+            self._write("prompt_summary", summary_prompt)
+            self._write("summary", summary)
+        self._write("full_message_history", list(self.history))
+        self._write("current_context", self.context)
+
+    def record_reply(self, reply):
+        if self.context is None:
+            return
+        if isinstance(reply, str):
+            self.reply = reply
+            try:
+                next_action = json.loads(reply)
+            except ValueError:
+                next_action = reply
+        else:
+            self.reply = json.dumps(reply)
+            next_action = reply
+        self._write("next_action", next_action)
+
+    def record_user_input(self, user_input):
+        if self.context is None:
+            return
+        self._write("user_input", user_input)
+
+    def record_command_result(self, command_name, result):
+        if not result.startswith(COMMAND_RESULT_PREFIX):
+            result = (
+                f"{COMMAND_RESULT_PREFIX}{command_name}{COMMAND_RESULT_SEPARATOR}"
+                f"{result}"
+            )
+        self._end_cycle()
+        self.history.append({"role": "system", "content": result})
+
+    def record_summary(self, messages, model, temperature, max_tokens):
+        kwargs = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        response = openai.ChatCompletion.create(**kwargs)
+        summary = response["choices"][0]["message"]["content"]
+        self.summary = (list(messages), summary)
+        return summary
+
+    def _embedding_store(self):
+        if self.embeddings is None:
+            from auto_gpt_replay.embeddings import EmbeddingStore
+
+            self.embeddings = EmbeddingStore.for_session(self.session_dir, self.session)
+        return self.embeddings
+
+    def record_embedding(self, text):
+        store = self._embedding_store()
+        embedding = store.get(text)
+        if embedding is None:
+            response = openai.Embedding.create(input=[text], model=self.embedding_model)
+            embedding = response["data"][0]["embedding"]
+            store.add(text, embedding)
+        return embedding
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(STOP)
+        self.writer.join()
+        if self.embeddings is not None:
+            self.embeddings.save()
+        if self.pack and self.frame:
+            pack_session(self.session_dir, self.session)
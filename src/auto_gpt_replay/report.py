@@ -0,0 +1,208 @@
+import json
+import time
+from contextlib import contextmanager
+
+HOOKS = ("chat", "input", "command", "embedding")
+PHASES = ("load", "match", "live")
+
+MISS_FAIL = "fail"
+MISS_LIVE = "live"
+MISS_STUB = "stub"
+MISS_POLICIES = (MISS_FAIL, MISS_LIVE, MISS_STUB)
+
+STUB_NEXT_ACTION = json.dumps(
+    {
+        "thoughts": {
+            "text": "Replay stub",
+            "reasoning": "",
+            "plan": "",
+            "criticism": "",
+            "speak": "",
+        },
+        "command": {"name": "do_nothing", "args": {}},
+    }
+)
+STUB_USER_INPUT = "y"
+STUB_COMMAND_RESULT = "Command skipped by replay."
+# Stubbed embeddings are zero vectors of the size ada-002 returns
+STUB_EMBEDDING_DIMENSIONS = 1536
+
+STATUS_PASSED = "passed"
+STATUS_DIVERGED = "diverged"
+STATUS_INCOMPLETE = "incomplete"
+STATUS_ERROR = "error"
+
+TIMELINE_JSON = "json"
+TIMELINE_CHROME = "chrome"
+
+
+class ReplayFinished(SystemExit):
+    def __init__(self, summary):
+        super().__init__(0 if summary["status"] == STATUS_PASSED else 1)
+        self.summary = summary
+
+
+class ReplayReport:
+    def __init__(self, session, start_frame, end_frame):
+        self.session = session
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.hits = dict.fromkeys(HOOKS, 0)
+        self.misses = dict.fromkeys(HOOKS, 0)
+        self.divergences = []
+        self.tokens_replayed = 0
+        self.calls = []
+        # Hooks can nest, e.g. a live command that asks for a chat completion
+        self._active_calls = []
+        self.started = time.perf_counter()
+
+    def _now(self):
+        return time.perf_counter() - self.started
+
+    def begin(self, hook, frame):
+        self._active_calls.append(
+            {
+                "hook": hook,
+                "frame": frame,
+                "start": self._now(),
+                "duration": None,
+                "outcome": None,
+                "reason": None,
+                "phases": [],
+            }
+        )
+
+    def end(self):
+        call = self._active_calls.pop()
+        call["duration"] = self._now() - call["start"]
+        self.calls.append(call)
+
+    @contextmanager
+    def phase(self, name):
+        started = self._now()
+        try:
+            yield
+        finally:
+            if self._active_calls:
+                self._active_calls[-1]["phases"].append(
+                    (name, started, self._now() - started)
+                )
+
+    def _outcome(self, outcome, reason=None):
+        if self._active_calls:
+            self._active_calls[-1]["outcome"] = outcome
+            self._active_calls[-1]["reason"] = reason
+
+    def hit(self, hook, tokens=0):
+        self.hits[hook] += 1
+        self.tokens_replayed += tokens
+        self._outcome("hit")
+
+    def miss(self, frame, hook, reason):
+        self.misses[hook] += 1
+        self.divergences.append({"frame": frame, "hook": hook, "reason": reason})
+        self._outcome("miss", reason)
+
+    @property
+    def total_misses(self):
+        return sum(self.misses.values())
+
+    def phase_totals(self, calls=None):
+        totals = dict.fromkeys(PHASES, 0.0)
+        for call in self.calls if calls is None else calls:
+            measured = 0.0
+            for name, _, duration in call["phases"]:
+                totals[name] += duration
+                measured += duration
+            # Whatever is not spent loading frames or running live is matching
+            totals["match"] += max(call["duration"] - measured, 0.0)
+        return totals
+
+    def savings(self):
+        # A replayed chat completion saves about as long as a live one takes
+        live_chats = [
+            call
+            for call in self.calls
+            if call["hook"] == "chat" and call["outcome"] == "miss"
+        ]
+        chat_seconds = None
+        if live_chats:
+            live_time = self.phase_totals(live_chats)["live"]
+            chat_seconds = round(live_time / len(live_chats) * self.hits["chat"], 3)
+        return {"tokens": self.tokens_replayed, "chat_seconds": chat_seconds}
+
+    def summary(self, status, last_frame, **extra):
+        return {
+            "session": self.session,
+            "status": status,
+            "start_frame": self.start_frame,
+            "end_frame": self.end_frame,
+            "last_frame": last_frame,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "divergences": list(self.divergences),
+            "duration": round(self._now(), 3),
+            "time": {
+                name: round(total, 6) for name, total in self.phase_totals().items()
+            },
+            "saved": self.savings(),
+            **extra,
+        }
+
+    def timeline(self):
+        return {
+            "session": self.session,
+            "calls": [
+                {
+                    "hook": call["hook"],
+                    "frame": call["frame"],
+                    "outcome": call["outcome"],
+                    "reason": call["reason"],
+                    "start": round(call["start"], 6),
+                    "duration": round(call["duration"], 6),
+                    "time": {
+                        name: round(total, 6)
+                        for name, total in self.phase_totals([call]).items()
+                    },
+                }
+                for call in self.calls
+            ],
+        }
+
+    def chrome_trace(self):
+        events = []
+        for call in self.calls:
+            events.append(
+                {
+                    "name": f"{call['hook']} {call['outcome'] or ''}".strip(),
+                    "cat": call["hook"],
+                    "ph": "X",
+                    "ts": call["start"] * 1e6,
+                    "dur": call["duration"] * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                    "args": {"frame": call["frame"], "reason": call["reason"]},
+                }
+            )
+            for name, started, duration in call["phases"]:
+                events.append(
+                    {
+                        "name": name,
+                        "cat": call["hook"],
+                        "ph": "X",
+                        "ts": started * 1e6,
+                        "dur": duration * 1e6,
+                        "pid": 1,
+                        "tid": 1,
+                        "args": {"frame": call["frame"]},
+                    }
+                )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path, timeline_format=TIMELINE_CHROME):
+        if timeline_format == TIMELINE_CHROME:
+            content = self.chrome_trace()
+        else:
+            content = self.timeline()
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(content, fp)
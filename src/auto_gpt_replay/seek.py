@@ -0,0 +1,73 @@
+"""Fast-forward a replay to a frame without running the frames before it.
+
+The agent state a frame starts from is in its recorded files: the full
+message history is logged at the start of the cycle and the context sent to
+the model carries the running summary. Restoring both, together with the
+cycle count, lets the interaction loop continue from that frame.
+"""
+
+SUMMARY_PREFIX = "This reminds you of these events from your past:"
+
+
+class AgentState:
+    __slots__ = ("frame", "full_message_history", "summary", "last_trimmed_index")
+
+    def __init__(self, frame, full_message_history, summary, last_trimmed_index):
+        self.frame = frame
+        self.full_message_history = full_message_history
+        self.summary = summary
+        self.last_trimmed_index = last_trimmed_index
+
+
+def _context_summary(context):
+    for message in context:
+        if message["role"] == "system" and message["content"].startswith(
+            SUMMARY_PREFIX
+        ):
+            return message["content"][len(SUMMARY_PREFIX) :].lstrip(" \n")
+    return None
+
+
+def _kept_messages(history, context):
+    # The newest messages of the history that still made it into the context,
+    # everything before them was trimmed and went into the summary
+    kept = 0
+    for message in reversed(history):
+        if message not in context:
+            break
+        kept += 1
+    return kept
+
+
+def frame_state(frame):
+    if not frame.can_replay:
+        return None
+    history = [dict(message) for message in frame.full_message_history or ()]
+    context = list(frame.current_context)
+    trimmed = len(history) - _kept_messages(history, context)
+    return AgentState(
+        frame.index, history, _context_summary(context), max(trimmed - 1, 0)
+    )
+
+
+def apply_state(agent, state):
+    # Logged cycles keep their numbering, the next cycle is the frame itself
+    agent.cycle_count = state.frame - 1
+    if hasattr(agent, "history"):
+        from autogpt.llm.base import Message
+
+        agent.history.messages = [
+            Message(message["role"], message["content"], message.get("type"))
+            for message in state.full_message_history
+        ]
+        if state.summary is not None:
+            agent.history.summary = state.summary
+        agent.history.last_trimmed_index = state.last_trimmed_index
+    else:
+        agent.full_message_history = state.full_message_history
+        if state.summary is not None:
+            agent.summary_memory = {
+                "role": "system",
+                "content": f"{SUMMARY_PREFIX} \n{state.summary}",
+            }
+        agent.last_memory_index = state.last_trimmed_index
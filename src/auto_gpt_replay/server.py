@@ -0,0 +1,509 @@
+"""An OpenAI-compatible HTTP server answering from recorded sessions.
+
+    python -m auto_gpt_replay.server --all --port 8080 --on-miss stub
+
+Point a client at it (e.g. ``OPENAI_API_BASE=http://127.0.0.1:8080/v1``) and
+``/v1/chat/completions`` and ``/v1/embeddings`` are answered from the
+recordings. Every session is loaded once into an in-memory index, keyed by the
+fingerprint of the whole prompt, that all connections share. Requests that
+cannot be answered are failed, stubbed or forwarded to the real API, like the
+misses of a headless replay. ``GET /replay/stats`` returns the hits and misses
+so far.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from auto_gpt_replay import load_env
+from auto_gpt_replay.archive import SessionArchive, session_frame_indexes
+from auto_gpt_replay.fingerprint import MessagesFingerprint, fingerprint_message
+from auto_gpt_replay.frame import Frame
+from auto_gpt_replay.fuzzy import KIND_CONTEXT, KIND_SUMMARY, FuzzyIndex, FuzzyMatcher
+from auto_gpt_replay.headless import default_session_dir
+from auto_gpt_replay.manifest import SessionManifest
+from auto_gpt_replay.message_pool import MessagePool
+from auto_gpt_replay.normalize import ArgumentNormalizer
+from auto_gpt_replay.report import (
+    MISS_FAIL,
+    MISS_POLICIES,
+    MISS_STUB,
+    STUB_EMBEDDING_DIMENSIONS,
+    STUB_NEXT_ACTION,
+)
+from auto_gpt_replay.session_index import SessionIndex
+from auto_gpt_replay.token_cache import TokenCountCache
+
+CHAT_PATH = "/chat/completions"
+EMBEDDINGS_PATH = "/embeddings"
+STATS_PATH = "/replay/stats"
+
+DEFAULT_UPSTREAM = "https://api.openai.com"
+FORWARDED_HEADERS = ("authorization", "content-type", "openai-organization")
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+}
+
+
+def count_tokens(text, model):
+    # Only used for the usage of a response, 0 without tiktoken
+    try:
+        import tiktoken
+    except ImportError:
+        return 0
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages, model):
+    return (
+        sum(
+            count_tokens(str(message.get("content") or ""), model) + 3
+            for message in messages
+        )
+        + 3
+    )
+
+
+class ReplayIndex:
+    """The responses of one or more sessions, shared by every connection."""
+
+    def __init__(self, workspace_root, fuzzy=None):
+        self.workspace_root = workspace_root
+        self.normalizer = ArgumentNormalizer.from_env(workspace_root)
+        self.responses = {}
+        self.fuzzy = fuzzy
+        self.fuzzy_index = FuzzyIndex(fuzzy) if fuzzy is not None else None
+        self.fuzzy_responses = {}
+        self.embeddings = {}
+        self.embedding_dimensions = STUB_EMBEDDING_DIMENSIONS
+        self.text_digest = None
+        # Token counts of earlier replays, keyed like TokenCountCache
+        self.token_counts = {}
+        self.sessions = []
+
+    @classmethod
+    def build(cls, session_dir, sessions, workspace_root, fuzzy=None):
+        index = cls(workspace_root, fuzzy)
+        for session in sessions:
+            index.add_session(session_dir, session)
+        return index
+
+    def _add(self, messages, response, kind):
+        self.responses.setdefault(MessagesFingerprint(messages).whole, response)
+        if self.fuzzy_index is not None:
+            key = len(self.fuzzy_responses)
+            self.fuzzy_responses[(key, kind)] = response
+            self.fuzzy_index.add(messages, key, kind)
+
+    def add_session(self, session_dir, session):
+        archive = SessionArchive.open(session_dir, session)
+        manifest = SessionManifest(session_dir, session)
+        if archive is None:
+            manifest.scan()
+        pool = MessagePool()
+        for frame_index in session_frame_indexes(session_dir, session, archive):
+            frame = Frame(
+                frame_index,
+                session_dir,
+                session,
+                lambda msg: None,
+                True,
+                self.workspace_root,
+                archive,
+                manifest,
+                pool,
+                self.normalizer,
+            )
+            if not frame.can_replay:
+                continue
+            next_action = frame.replay_next_action()
+            if next_action is not False:
+                self._add(frame.current_context, next_action, KIND_CONTEXT)
+            if frame.summary_prompt is not None and frame.summary is not None:
+                self._add(frame.summary_prompt, frame.summary, KIND_SUMMARY)
+        if archive is not None:
+            archive.close()
+        self._add_embeddings(session_dir, session)
+        self.token_counts.update(
+            TokenCountCache.for_session(session_dir, session).counts
+        )
+        self.sessions.append(session)
+
+    def _add_embeddings(self, session_dir, session):
+        try:
+            from auto_gpt_replay.embeddings import EmbeddingStore, text_digest
+        except ImportError:
+            # Without NumPy there are no recorded embeddings to serve
+            return
+        store = EmbeddingStore.open(session_dir, session)
+        if store is None:
+            return
+        self.text_digest = text_digest
+        if len(store.vectors):
+            self.embedding_dimensions = store.vectors.shape[1]
+        for digest, row in store.rows.items():
+            self.embeddings.setdefault(digest, (store, row))
+
+    def chat(self, messages, fingerprint=None):
+        if fingerprint is None:
+            fingerprint = MessagesFingerprint(messages)
+        response = self.responses.get(fingerprint.whole)
+        if response is not None or self.fuzzy_index is None:
+            return response
+        match = self.fuzzy_index.lookup(messages, 0)
+        if match is None or match[2] < self.fuzzy.threshold:
+            return None
+        return self.fuzzy_responses[match[:2]]
+
+    def embedding(self, text):
+        if self.text_digest is None or not isinstance(text, str):
+            return None
+        entry = self.embeddings.get(self.text_digest(text))
+        if entry is None:
+            return None
+        store, row = entry
+        return store.vector(row)
+
+    def count_tokens(self, fingerprint, model, count):
+        key = f"{model}:{fingerprint.hex()}"
+        if key not in self.token_counts:
+            self.token_counts[key] = count()
+        return self.token_counts[key]
+
+
+def chat_response(content, model, prompt_tokens, completion_tokens, request_id):
+    return {
+        "id": f"chatcmpl-replay-{request_id}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def embeddings_response(embeddings, model):
+    return {
+        "object": "list",
+        "data": [
+            {"object": "embedding", "index": i, "embedding": embedding}
+            for i, embedding in enumerate(embeddings)
+        ],
+        "model": model,
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+def error_response(message, error_type="invalid_request_error"):
+    return {"error": {"message": message, "type": error_type, "code": None}}
+
+
+def valid_messages(messages):
+    if not isinstance(messages, list) or not messages:
+        return False
+    return all(
+        isinstance(message, dict)
+        and isinstance(message.get("role"), str)
+        and isinstance(message.get("content"), (str, type(None)))
+        for message in messages
+    )
+
+
+class ReplayServer:
+    def __init__(
+        self, index, on_miss=MISS_FAIL, upstream=DEFAULT_UPSTREAM, timeout=600
+    ):
+        if on_miss not in MISS_POLICIES:
+            raise ValueError(
+                f"Unknown miss policy {on_miss}, use one of {MISS_POLICIES}"
+            )
+        self.index = index
+        self.on_miss = on_miss
+        self.upstream = upstream.rstrip("/")
+        self.timeout = timeout
+        self.requests = 0
+        self.hits = {"chat": 0, "embedding": 0}
+        self.misses = {"chat": 0, "embedding": 0}
+
+    async def start(self, host="127.0.0.1", port=8080):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 with keep-alive, load tests reuse their connections
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, path, version = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload, replay = await self.dispatch(
+                        method, path.split("?", 1)[0], headers, body
+                    )
+                except Exception as error:
+                    # Answer the request, the client and its connection go on
+                    status, payload, replay = self._json(
+                        500, error_response(repr(error), "server_error")
+                    )
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(payload)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        f"X-Replay: {replay}\r\n\r\n"
+                    ).encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, headers, body):
+        if path == STATS_PATH:
+            return self._json(200, self.stats())
+        if not (path.endswith(CHAT_PATH) or path.endswith(EMBEDDINGS_PATH)):
+            return self._json(404, error_response(f"Unknown path {path}"))
+        if method != "POST":
+            return self._json(405, error_response(f"{method} is not supported"))
+        self.requests += 1
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return self._json(400, error_response("The body is not valid JSON"))
+        if not isinstance(request, dict):
+            return self._json(400, error_response("The body is not a JSON object"))
+        if path.endswith(CHAT_PATH):
+            return await self.chat_completion(request, path, headers, body)
+        return await self.create_embeddings(request, path, headers, body)
+
+    @staticmethod
+    def _json(status, response, replay="none"):
+        return status, json.dumps(response).encode("utf-8"), replay
+
+    async def chat_completion(self, request, path, headers, body):
+        messages = request.get("messages")
+        if not valid_messages(messages):
+            return self._json(
+                400,
+                error_response(
+                    "messages must be a non-empty list of objects with a role and "
+                    "a text content"
+                ),
+            )
+        if request.get("stream"):
+            return self._json(400, error_response("Streaming is not replayed"))
+        model = request.get("model", "")
+
+        fingerprint = MessagesFingerprint(messages)
+        content = self.index.chat(messages, fingerprint)
+        if content is None:
+            return await self._miss(
+                "chat",
+                path,
+                headers,
+                body,
+                lambda: chat_response(STUB_NEXT_ACTION, model, 0, 0, self.requests),
+            )
+
+        self.hits["chat"] += 1
+        prompt_tokens = self.index.count_tokens(
+            fingerprint.whole, model, lambda: count_message_tokens(messages, model)
+        )
+        completion_tokens = self.index.count_tokens(
+            fingerprint_message(content), model, lambda: count_tokens(content, model)
+        )
+        return self._json(
+            200,
+            chat_response(
+                content, model, prompt_tokens, completion_tokens, self.requests
+            ),
+            "hit",
+        )
+
+    async def create_embeddings(self, request, path, headers, body):
+        texts = request.get("input")
+        if isinstance(texts, str):
+            texts = [texts]
+        if not isinstance(texts, list) or not texts:
+            return self._json(400, error_response("input must be text or a list"))
+        model = request.get("model", "")
+
+        embeddings = [self.index.embedding(text) for text in texts]
+        if any(embedding is None for embedding in embeddings):
+            zeros = [0.0] * self.index.embedding_dimensions
+            return await self._miss(
+                "embedding",
+                path,
+                headers,
+                body,
+                lambda: embeddings_response(
+                    [embedding or zeros for embedding in embeddings], model
+                ),
+            )
+
+        self.hits["embedding"] += 1
+        return self._json(200, embeddings_response(embeddings, model), "hit")
+
+    async def _miss(self, hook, path, headers, body, stub):
+        self.misses[hook] += 1
+        if self.on_miss == MISS_STUB:
+            return self._json(200, stub(), "stub")
+        if self.on_miss == MISS_FAIL:
+            return self._json(
+                404,
+                error_response(f"No recorded {hook} response", "replay_miss"),
+                "miss",
+            )
+        # The real API is called on a thread, other clients keep being served
+        loop = asyncio.get_running_loop()
+        status, payload = await loop.run_in_executor(
+            None, self._forward, path, headers, body
+        )
+        return status, payload, "live"
+
+    def _forward(self, path, headers, body):
+        request = urllib.request.Request(
+            self.upstream + path,
+            data=body,
+            method="POST",
+            headers={
+                name: headers[name] for name in FORWARDED_HEADERS if name in headers
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+        except (urllib.error.URLError, OSError) as error:
+            return 502, json.dumps(
+                error_response(f"Upstream {self.upstream} failed: {error}", "api_error")
+            ).encode("utf-8")
+
+    def stats(self):
+        return {
+            "sessions": list(self.index.sessions),
+            "responses": len(self.index.responses),
+            "embeddings": len(self.index.embeddings),
+            "requests": self.requests,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve recorded sessions as an OpenAI-compatible API."
+    )
+    parser.add_argument("sessions", nargs="*", help="Session folder names")
+    parser.add_argument(
+        "--all", action="store_true", help="Serve every session in the index"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--on-miss",
+        choices=MISS_POLICIES,
+        default=MISS_FAIL,
+        help="Fail, stub or forward requests that were not recorded (default: fail)",
+    )
+    parser.add_argument(
+        "--upstream",
+        default=DEFAULT_UPSTREAM,
+        help="API that --on-miss live forwards to",
+    )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        default=None,
+        help="Also answer prompts this similar (default: REPLAY_FUZZY_THRESHOLD)",
+    )
+    parser.add_argument(
+        "--workspace-root",
+        default=os.path.join(os.getcwd(), "auto_gpt_workspace"),
+        help="Workspace the recorded path arguments are made relative to",
+    )
+    parser.add_argument("--session-dir", default=default_session_dir())
+    args = parser.parse_args()
+
+    load_env()
+    session_index = SessionIndex(args.session_dir)
+    sessions = list(args.sessions)
+    if args.all:
+        sessions += [entry["name"] for entry in session_index.update()]
+    if not sessions:
+        latest = session_index.latest()
+        if latest is None:
+            parser.error(f"no sessions found in {args.session_dir}")
+        sessions = [latest]
+
+    if args.fuzzy_threshold is not None:
+        fuzzy = FuzzyMatcher(args.fuzzy_threshold)
+    else:
+        fuzzy = FuzzyMatcher.from_env()
+
+    started = time.perf_counter()
+    index = ReplayIndex.build(args.session_dir, sessions, args.workspace_root, fuzzy)
+    print(
+        f"Serving {len(index.responses)} responses and {len(index.embeddings)} "
+        f"embeddings from {len(sessions)} sessions on "
+        f"http://{args.host}:{args.port}/v1 "
+        f"(loaded in {time.perf_counter() - started:.2f}s)",
+        file=sys.stderr,
+    )
+    server = ReplayServer(index, args.on_miss, args.upstream)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Newest-first index of the recorded sessions in logs/DEBUG.
+
+The index lives next to the DEBUG folder (so writing it does not change the
+folder's mtime) as JSON lines: a header with the mtime of the DEBUG folder the
+index was built from, followed by one entry per session, newest first. While
+the folder is unchanged the last session is read from the first entry without
+listing the folder.
+"""
+import argparse
+import json
+import os
+import re
+
+from auto_gpt_replay.atomic import open_atomic
+
+INDEX_NAME = "replay_sessions.index"
+INDEX_VERSION = 1
+SESSION_PATTERN = re.compile(r"^([0-9]{8})_([0-9]{6})_")
+
+
+def session_stats(session_path):
+    frames = 0
+    size = 0
+    for root, dirs, files in os.walk(session_path):
+        if root == session_path:
+            frames = sum(1 for folder in dirs if folder.isdigit())
+        for file in files:
+            try:
+                size += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                pass
+    return frames, size
+
+
+def _sort_key(entry):
+    return entry["created"], entry["name"]
+
+
+class SessionIndex:
+    def __init__(self, session_dir):
+        self.session_dir = session_dir
+        self.path = os.path.join(os.path.dirname(session_dir), INDEX_NAME)
+
+    def _entry(self, name):
+        frames, size = session_stats(os.path.join(self.session_dir, name))
+        # The name starts with the creation time, so it sorts chronologically
+        return {"name": name, "created": name[:15], "frames": frames, "size": size}
+
+    def _read_head(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                header = json.loads(fp.readline())
+                newest = fp.readline()
+        except (OSError, ValueError):
+            return None, None
+        if header.get("version") != INDEX_VERSION:
+            return None, None
+        return header, json.loads(newest) if newest else None
+
+    def read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                header = json.loads(fp.readline())
+                entries = [json.loads(line) for line in fp if line.strip()]
+        except (OSError, ValueError):
+            return None, []
+        if header.get("version") != INDEX_VERSION:
+            return None, []
+        return header, entries
+
+    def _write(self, mtime_ns, entries):
+        try:
+            with open_atomic(self.path, "w", encoding="utf-8") as fp:
+                fp.write(json.dumps({"version": INDEX_VERSION, "mtime_ns": mtime_ns}))
+                fp.write("\n")
+                for entry in entries:
+                    fp.write(json.dumps(entry))
+                    fp.write("\n")
+        except OSError:
+            # A read-only log volume still gets a correct, just unsaved, result
+            pass
+
+    def update(self, rebuild=False):
+        # Stat before listing, so sessions created meanwhile make the index stale
+        mtime_ns = os.stat(self.session_dir).st_mtime_ns
+        names = os.listdir(self.session_dir)
+
+        known = {}
+        if not rebuild:
+            _, entries = self.read()
+            known = {entry["name"]: entry for entry in entries}
+            # The newest session may still have been recording when it was indexed
+            if entries:
+                known.pop(entries[0]["name"], None)
+
+        entries = []
+        for name in names:
+            if name in known:
+                entries.append(known[name])
+            elif SESSION_PATTERN.match(name):
+                entries.append(self._entry(name))
+        entries.sort(key=_sort_key, reverse=True)
+
+        self._write(mtime_ns, entries)
+        return entries
+
+    def latest(self):
+        if not os.path.exists(self.session_dir):
+            return None
+
+        header, newest = self._read_head()
+        mtime_ns = os.stat(self.session_dir).st_mtime_ns
+        if header is None or header["mtime_ns"] != mtime_ns:
+            entries = self.update()
+            newest = entries[0] if entries else None
+
+        if newest is None:
+            return None
+        return newest["name"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the replay session index.")
+    parser.add_argument("command", choices=["rebuild", "list"])
+    parser.add_argument(
+        "--session-dir",
+        default=os.path.join(os.getcwd(), "logs", "DEBUG"),
+        help="Folder containing the sessions (default: logs/DEBUG)",
+    )
+    args = parser.parse_args()
+
+    index = SessionIndex(args.session_dir)
+    if args.command == "rebuild":
+        entries = index.update(rebuild=True)
+        print(f"Indexed {len(entries)} sessions in {index.path}")
+        return
+
+    entries = index.update()
+    for entry in entries:
+        print(f"{entry['name']}\t{entry['frames']} frames\t{entry['size']} bytes")
+
+
+if __name__ == "__main__":
+    main()
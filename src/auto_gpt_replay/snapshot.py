@@ -0,0 +1,180 @@
+"""Workspace snapshots of a recorded session.
+
+After each command the files of the workspace that changed are stored as
+content-addressed blobs, shared by every frame of the session, and the frame
+gets a small diff: ``<session>/workspace/NNN.json`` with the changed paths and
+their digests and the deleted paths. A replay can then bring the workspace to
+the state after any frame by writing the blobs, instead of running the
+commands again.
+"""
+import hashlib
+import json
+import os
+
+from auto_gpt_replay.atomic import write_atomic
+from auto_gpt_replay.fingerprint import DIGEST_SIZE
+from auto_gpt_replay.manifest import list_frame_folders
+from auto_gpt_replay.session_index import SessionIndex
+
+SNAPSHOT_FOLDER = "workspace"
+BLOB_FOLDER = "blobs"
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WorkspaceSnapshots:
+    def __init__(self, session_path):
+        self.path = os.path.join(session_path, SNAPSHOT_FOLDER)
+        self.blob_path = os.path.join(self.path, BLOB_FOLDER)
+        self.diffs = {}
+        self.loaded = {}
+        # Files known to match a digest, by their (size, mtime), to skip hashing
+        self.known = {}
+        self.state = {}
+
+    @classmethod
+    def open(cls, session_dir, session):
+        snapshots = cls(os.path.join(session_dir, session))
+        if not os.path.isdir(snapshots.path):
+            return None
+        return snapshots.scan()
+
+    def scan(self):
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                name, extension = os.path.splitext(entry.name)
+                if extension == ".json" and name.isdigit():
+                    self.diffs[int(name)] = entry.path
+        return self
+
+    def has_frame(self, frame):
+        return frame in self.diffs
+
+    def _blob(self, digest):
+        return os.path.join(self.blob_path, digest[:2], digest)
+
+    def _read_diff(self, frame):
+        if frame not in self.loaded:
+            with open(self.diffs[frame], "r", encoding="utf-8") as fp:
+                self.loaded[frame] = json.load(fp)
+        return self.loaded[frame]
+
+    def _stat_digest(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        known = self.known.get(path)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        digest = file_digest(path)
+        self.known[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def _workspace_files(self, workspace_root):
+        for root, dirs, files in os.walk(workspace_root):
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.isfile(path) and not os.path.islink(path):
+                    yield os.path.relpath(path, workspace_root), path
+
+    def record(self, frame, workspace_root):
+        current = {}
+        changed = {}
+        for relative, path in self._workspace_files(workspace_root):
+            digest = self._stat_digest(path)
+            current[relative] = digest
+            if self.state.get(relative) == digest:
+                continue
+            changed[relative] = digest
+            blob = self._blob(digest)
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                with open(path, "rb") as fp:
+                    write_atomic(blob, fp.read())
+        deleted = sorted(set(self.state) - set(current))
+        self.state = current
+        if not changed and not deleted:
+            return False
+        diff_path = os.path.join(self.path, f"{str(frame).zfill(3)}.json")
+        os.makedirs(self.path, exist_ok=True)
+        write_atomic(
+            diff_path,
+            json.dumps({"files": changed, "deleted": deleted}).encode("utf-8"),
+        )
+        self.diffs[frame] = diff_path
+        self.loaded[frame] = {"files": changed, "deleted": deleted}
+        return True
+
+    def state_at(self, frame):
+        state = {}
+        for index in sorted(self.diffs):
+            if index > frame:
+                break
+            diff = self._read_diff(index)
+            state.update(diff["files"])
+            for relative in diff["deleted"]:
+                state.pop(relative, None)
+        return state
+
+    def restore(self, frame, workspace_root):
+        target = self.state_at(frame)
+        # Only files the session has written are removed, anything else stays
+        tracked = set(target)
+        for index in self.diffs:
+            diff = self._read_diff(index)
+            tracked.update(diff["files"])
+            tracked.update(diff["deleted"])
+
+        written = 0
+        for relative in tracked:
+            path = os.path.join(workspace_root, relative)
+            digest = target.get(relative)
+            if digest is None:
+                if os.path.lexists(path):
+                    os.remove(path)
+                    self.known.pop(path, None)
+                continue
+            if self._stat_digest(path) == digest:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(self._blob(digest), "rb") as fp:
+                write_atomic(path, fp.read())
+            stat = os.stat(path)
+            self.known[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            written += 1
+        return written
+
+
+class WorkspaceRecorder:
+    """Records a snapshot of the workspace after every command of the session
+    Auto-GPT is currently logging."""
+
+    def __init__(self, session_dir, workspace_root):
+        self.session_dir = session_dir
+        self.workspace_root = workspace_root
+        self.session_index = SessionIndex(session_dir)
+        self.session = None
+        self.snapshots = None
+
+    def record(self, session=None, frame=None):
+        # Without a session and frame, snapshot the latest frame Auto-GPT logged
+        if session is None:
+            session = self.session_index.latest()
+            if session is None:
+                return False
+        if session != self.session:
+            self.session = session
+            self.snapshots = WorkspaceSnapshots(os.path.join(self.session_dir, session))
+        if frame is None:
+            frames = list_frame_folders(os.path.join(self.session_dir, session))
+            if not frames:
+                return False
+            frame = frames[-1][0]
+        return self.snapshots.record(frame, self.workspace_root)
@@ -0,0 +1,39 @@
+import json
+import os
+
+from auto_gpt_replay.atomic import open_atomic
+
+TOKEN_CACHE_NAME = "token_counts.json"
+
+
+class TokenCountCache:
+    def __init__(self, path):
+        self.path = path
+        self.counts = {}
+        self.dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as fp:
+                self.counts = json.load(fp)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_session(cls, session_dir, session):
+        return cls(os.path.join(session_dir, session, TOKEN_CACHE_NAME))
+
+    def count(self, fingerprint, model, count_tokens):
+        key = f"{model}:{fingerprint.hex()}"
+        if key not in self.counts:
+            self.counts[key] = count_tokens()
+            self.dirty = True
+        return self.counts[key]
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open_atomic(self.path, "w", encoding="utf-8") as fp:
+                json.dump(self.counts, fp)
+            self.dirty = False
+        except OSError:
+            pass
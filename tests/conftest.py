@@ -0,0 +1,122 @@
+"""Fixtures for the tests: recorded sessions, and the parts of Auto-GPT, openai
+and colorama the replay patches, so a replay can run without them."""
+import builtins
+import logging
+import os
+import sys
+import types
+
+import pytest
+
+from helpers import WORKSPACE_ROOT, FakeAgent, write_session
+
+
+@pytest.fixture
+def session_dir(tmp_path):
+    path = tmp_path / "logs" / "DEBUG"
+    path.mkdir(parents=True)
+    return str(path)
+
+
+@pytest.fixture
+def recorded(session_dir):
+    return write_session(session_dir)
+
+
+@pytest.fixture
+def autogpt(monkeypatch):
+    """Stand-ins for the modules the replay imports and patches. The live calls
+    are recorded, and the replay modules are imported again against them."""
+    live = types.SimpleNamespace(chats=[], commands=[], inputs=[], embeddings=[])
+    logged = []
+
+    def chat_create(*args, **kwargs):
+        live.chats.append(kwargs.get("messages"))
+        return {"choices": [{"message": {"content": "live reply"}}]}
+
+    def embedding_create(input, model):
+        live.embeddings.append(input)
+        return {"data": [{"embedding": [1.0, 0.0, 0.0]}]}
+
+    def execute_command(*args, **kwargs):
+        live.commands.append(kwargs.get("command_name"))
+        return "live result"
+
+    def live_input(prompt=""):
+        live.inputs.append(prompt)
+        return "live input"
+
+    class Logger:
+        def __init__(self):
+            self.typing_logger = logging.getLogger("replay-test-typer")
+            self.logger = logging.getLogger("replay-test-logger")
+
+        def typewriter_log(
+            self, title="", title_color="", content="", level=logging.INFO
+        ):
+            logged.append(f"{title} {content}".strip())
+
+    class Config:
+        instance = None
+
+        def __new__(cls):
+            if cls.instance is None:
+                cls.instance = super().__new__(cls)
+                cls.instance.skip_reprompt = False
+                cls.instance.workspace_path = WORKSPACE_ROOT
+            return cls.instance
+
+    modules = {
+        "openai": {
+            "ChatCompletion": type(
+                "ChatCompletion", (), {"create": staticmethod(chat_create)}
+            ),
+            "Embedding": type(
+                "Embedding", (), {"create": staticmethod(embedding_create)}
+            ),
+        },
+        "openai.openai_object": {
+            "OpenAIObject": type(
+                "OpenAIObject", (), {"construct_from": staticmethod(dict)}
+            )
+        },
+        "colorama": {
+            "Fore": types.SimpleNamespace(RED="", GREEN="", YELLOW="", CYAN="")
+        },
+        "autogpt": {},
+        "autogpt.agent": {},
+        "autogpt.agent.agent": {
+            "Agent": FakeAgent,
+            "execute_command": execute_command,
+        },
+        "autogpt.app": {"execute_command": execute_command},
+        "autogpt.config": {"Config": Config},
+        "autogpt.config.config": {"Config": Config},
+        "autogpt.llm": {},
+        "autogpt.llm.token_counter": {
+            "count_message_tokens": lambda messages, model: 10 * len(messages),
+            "count_string_tokens": lambda text, model: len(text.split()),
+        },
+        "autogpt.logs": {"logger": Logger(), "TypingConsoleHandler": object},
+    }
+    for name, attributes in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        monkeypatch.setitem(sys.modules, name, module)
+    for name, module in modules.items():
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, sys.modules[name])
+
+    for name in ("auto_gpt_replay.mock", "auto_gpt_replay.recorder"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    # The replay patches input() and the agent for good, put them back after
+    monkeypatch.setattr(builtins, "input", live_input)
+    monkeypatch.setattr(
+        FakeAgent, "start_interaction_loop", FakeAgent.start_interaction_loop
+    )
+    for name in os.environ:
+        if name.startswith("REPLAY_"):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv("REPLAY_PREFETCH_FRAMES", "2")
+    return types.SimpleNamespace(live=live, logged=logged, Agent=FakeAgent)
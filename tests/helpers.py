@@ -0,0 +1,148 @@
+"""Sessions written in the layout Auto-GPT's DEBUG logs use, and an agent that
+runs them, for the tests."""
+import builtins
+import json
+import os
+import sys
+import types
+
+NEXT_COMMAND_PROMPT = (
+    "Determine which next command to use, and respond using the format specified "
+    "above:"
+)
+SUMMARY_PROMPT = (
+    "Your task is to create a concise running summary of actions and information "
+    "results in the provided text, focusing on key and potentially important "
+    "information to remember."
+)
+WORKSPACE_ROOT = "/workspace"
+SESSION = "20230501_120000_TestGPT"
+
+
+def next_action(index):
+    if index % 2:
+        command = {
+            "name": "write_to_file",
+            "args": {
+                "filename": f"{WORKSPACE_ROOT}/file_{index}.txt",
+                "text": f"text {index}",
+            },
+        }
+    else:
+        command = {"name": "google", "args": {"query": f"query {index}"}}
+    return {
+        "thoughts": {
+            "text": f"thought {index}",
+            "reasoning": f"reasoning {index}",
+            "plan": f"- plan {index}",
+            "criticism": f"criticism {index}",
+            "speak": f"speak {index}",
+        },
+        "command": command,
+    }
+
+
+def write_session(session_dir, frames=5, session=SESSION, summary_every=0):
+    """Writes a session like Auto-GPT logs it: the history at the start of every
+    cycle, then the prompt, the reply and, in the first frame, the user input
+    instead of a command. Returns what the agent did in each frame."""
+    history = []
+    recorded = []
+    for index in range(1, frames + 1):
+        folder = os.path.join(session_dir, session, str(index).zfill(3))
+        os.makedirs(folder)
+        count = 0
+
+        def write(name, content):
+            nonlocal count
+            with open(
+                os.path.join(folder, f"{count}_{name}"), "w", encoding="utf-8"
+            ) as fp:
+                json.dump(content, fp)
+            count += 1
+
+        summary_prompt = None
+        if summary_every and index % summary_every == 0:
+            summary_prompt = [
+                {"role": "user", "content": f"{SUMMARY_PROMPT} Events {index}"}
+            ]
+            write("prompt_summary.json", summary_prompt)
+            write("summary.txt", f"summary {index}")
+        write("full_message_history.json", list(history))
+        context = [
+            {"role": "system", "content": "You are Test-GPT."},
+            {"role": "system", "content": f"The current time and date is {index}"},
+            *history[-6:],
+            {"role": "user", "content": NEXT_COMMAND_PROMPT},
+        ]
+        write("current_context.json", context)
+        action = next_action(index)
+        write("next_action.json", action)
+        user_input = None
+        if index == 1:
+            user_input = "y"
+            write("user_input.txt", user_input)
+
+        history.append({"role": "user", "content": NEXT_COMMAND_PROMPT})
+        history.append({"role": "assistant", "content": json.dumps(action)})
+        # Frames that asked the user run no command
+        result = None
+        if user_input is None:
+            result = f"result {index}"
+            history.append(
+                {
+                    "role": "system",
+                    "content": f"Command {action['command']['name']} returned: "
+                    f"{result}",
+                }
+            )
+        recorded.append(
+            {
+                "index": index,
+                "context": context,
+                "action": action,
+                "user_input": user_input,
+                "result": result,
+                "summary_prompt": summary_prompt,
+            }
+        )
+    return recorded
+
+
+class FakeAgent:
+    """Runs the recorded frames like Auto-GPT's interaction loop would."""
+
+    def __init__(self, frames, workspace_root=WORKSPACE_ROOT):
+        self.frames = frames
+        self.workspace = types.SimpleNamespace(root=workspace_root)
+        self.replies = []
+        self.inputs = []
+        self.results = []
+        # Arguments the agent changes in the commands of a frame, by frame index
+        self.changed_arguments = {}
+
+    def start_interaction_loop(self):
+        openai = sys.modules["openai"]
+        agent_module = sys.modules["autogpt.agent.agent"]
+        for frame in self.frames:
+            response = openai.ChatCompletion.create(
+                model="gpt-4", messages=frame["context"]
+            )
+            reply = response["choices"][0]["message"]["content"]
+            self.replies.append(reply)
+            if frame["user_input"] is not None:
+                self.inputs.append(builtins.input("Input: "))
+                continue
+            command = json.loads(reply)["command"]
+            # Replies name files relative to the workspace, the agent resolves them
+            arguments = dict(command["args"])
+            if "filename" in arguments:
+                arguments["filename"] = os.path.join(
+                    self.workspace.root, arguments["filename"]
+                )
+            arguments.update(self.changed_arguments.get(frame["index"], {}))
+            self.results.append(
+                agent_module.execute_command(
+                    command_name=command["name"], arguments=arguments
+                )
+            )
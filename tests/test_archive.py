@@ -0,0 +1,87 @@
+import pytest
+
+from auto_gpt_replay.archive import (
+    DeltaMessageList,
+    LazyMessageList,
+    SessionArchive,
+    pack_session,
+    session_frame_indexes,
+)
+from auto_gpt_replay.frame import Frame
+
+from helpers import SESSION, WORKSPACE_ROOT, write_session
+
+
+def load_frame(session_dir, index, archive=None):
+    return Frame(
+        index, session_dir, SESSION, lambda msg: None, False, WORKSPACE_ROOT, archive
+    )
+
+
+@pytest.fixture
+def packed(session_dir):
+    recorded = write_session(session_dir, frames=10, summary_every=4)
+    archive = SessionArchive(pack_session(session_dir, SESSION, checkpoint_every=3))
+    yield session_dir, recorded, archive
+    archive.close()
+
+
+def test_frames_read_the_same_from_the_archive(packed):
+    session_dir, recorded, archive = packed
+
+    assert session_frame_indexes(session_dir, SESSION, archive) == list(range(1, 11))
+    for frame in recorded:
+        loose = load_frame(session_dir, frame["index"])
+        unpacked = load_frame(session_dir, frame["index"], archive)
+        assert unpacked.current_context == loose.current_context == frame["context"]
+        assert unpacked.full_message_history == loose.full_message_history
+        assert unpacked.summary_prompt == loose.summary_prompt
+        assert unpacked.summary == loose.summary
+        assert unpacked.current_user_input == loose.current_user_input
+        assert unpacked.command_result == loose.command_result
+
+
+def test_histories_are_stored_as_deltas_with_checkpoints(packed):
+    session_dir, recorded, archive = packed
+
+    assert isinstance(archive.load(1, "full_message_history"), LazyMessageList)
+    assert isinstance(archive.load(2, "full_message_history"), DeltaMessageList)
+    # A full history again after checkpoint_every deltas
+    assert isinstance(archive.load(5, "full_message_history"), LazyMessageList)
+
+    history = archive.load(7, "full_message_history")
+    loose = load_frame(session_dir, 7).full_message_history
+    assert len(history) == len(loose)
+    assert history[0] == loose[0]
+    assert history[-1] == loose[-1]
+    assert history[2:5] == loose[2:5]
+    with pytest.raises(IndexError):
+        history[len(loose)]
+
+
+def test_command_results_are_extracted_when_packing(packed):
+    session_dir, recorded, archive = packed
+
+    assert archive.load(3, "command_result") == {
+        "name": "google",
+        "result": recorded[1]["result"],
+    }
+    # The first frame asked the user and ran no command
+    assert archive.load(2, "command_result") is None
+
+
+def test_frames_missing_from_the_archive_are_read_from_their_folder(packed):
+    session_dir, recorded, archive = packed
+
+    frame = load_frame(session_dir, 11, archive)
+
+    assert frame.archive is None
+    assert not frame.can_replay
+
+
+def test_other_files_are_not_archives(tmp_path):
+    path = tmp_path / "session.replay"
+    path.write_bytes(b"NOPE" + bytes(12))
+
+    with pytest.raises(ValueError):
+        SessionArchive(str(path))
@@ -0,0 +1,31 @@
+import pytest
+
+from auto_gpt_replay.atomic import open_atomic, write_atomic
+
+
+def test_replaces_the_file_once_written(tmp_path):
+    path = str(tmp_path / "data.bin")
+    write_atomic(path, b"old")
+
+    with open_atomic(path) as fp:
+        fp.write(b"new")
+        with open(path, "rb") as old:
+            assert old.read() == b"old"
+
+    with open(path, "rb") as fp:
+        assert fp.read() == b"new"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.bin"]
+
+
+def test_a_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "data.txt")
+    write_atomic(path, b"old")
+
+    with pytest.raises(RuntimeError):
+        with open_atomic(path, "w", encoding="utf-8") as fp:
+            fp.write("half")
+            raise RuntimeError("interrupted")
+
+    with open(path, "rb") as fp:
+        assert fp.read() == b"old"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.txt"]
@@ -0,0 +1,91 @@
+import sys
+
+import pytest
+
+from auto_gpt_replay import batch
+from auto_gpt_replay.report import (
+    MISS_FAIL,
+    STATUS_DIVERGED,
+    STATUS_ERROR,
+    STATUS_PASSED,
+)
+
+OPTIONS = {
+    "frames": "1-",
+    "on_miss": MISS_FAIL,
+    "max_misses": None,
+    "session_dir": "/logs/DEBUG",
+    "autogpt_args": ["--ai-settings", "ai_settings.yaml"],
+}
+
+
+def test_every_worker_gets_its_own_workspace():
+    command = batch._replay_command("session", "/tmp/summary.json", "/tmp/ws", OPTIONS)
+
+    assert command[command.index("--") + 1 :] == [
+        "--workspace-directory",
+        "/tmp/ws",
+        "--ai-settings",
+        "ai_settings.yaml",
+    ]
+    assert "--max-misses" not in command
+
+
+def test_a_given_workspace_is_shared():
+    for args in (["-w", "/shared"], ["--workspace-directory=/shared"]):
+        assert batch._workspace_args("/tmp/ws", args) == args
+
+
+def test_results_are_counted_by_status(monkeypatch):
+    statuses = {"a": STATUS_PASSED, "b": STATUS_DIVERGED, "c": STATUS_PASSED}
+    replayed = []
+
+    def replay_session(session, options):
+        replayed.append(session)
+        return {"session": session, "status": statuses[session], "duration": 1.0}
+
+    monkeypatch.setattr(batch, "replay_session", replay_session)
+    results = batch.run_batch(["a", "b", "c"], workers=2, session_dir="/logs")
+
+    assert sorted(replayed) == ["a", "b", "c"]
+    assert [result["session"] for result in results["results"]] == ["a", "b", "c"]
+    assert results["sessions"] == 3
+    assert results[STATUS_PASSED] == 2
+    assert results[STATUS_DIVERGED] == 1
+    assert results[STATUS_ERROR] == 0
+    assert results["replay_time"] == 3.0
+    assert results["workers"] == 2
+
+
+def test_sessions_that_do_not_replay_are_errors(tmp_path):
+    options = dict(OPTIONS, session_dir=str(tmp_path), timeout=60)
+
+    result = batch.replay_session("missing", options)
+
+    assert result["status"] == STATUS_ERROR
+    assert result["reason"] == "exit code 1"
+    assert "missing" in result["stderr"]
+
+
+def test_options_are_parsed_around_the_sessions(monkeypatch, capsys):
+    calls = []
+
+    def run_batch(sessions, **kwargs):
+        calls.append((sessions, kwargs))
+        return {"sessions": len(sessions), STATUS_PASSED: len(sessions)}
+
+    monkeypatch.setattr(batch, "run_batch", run_batch)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["batch", "a", "--frames", "2-4", "b", "--", "--ai-settings", "a.yaml"],
+    )
+
+    with pytest.raises(SystemExit) as exited:
+        batch.main()
+
+    assert exited.value.code == 0
+    [(sessions, kwargs)] = calls
+    assert sessions == ["a", "b"]
+    assert kwargs["frames"] == "2-4"
+    assert kwargs["autogpt_args"] == ["--ai-settings", "a.yaml"]
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from auto_gpt_replay.compression import (
+    COMPRESSION_GZIP,
+    COMPRESSION_ZSTD,
+    DICTIONARY_NAME,
+    compact_session,
+    split_compression,
+)
+from auto_gpt_replay.frame import Frame
+from auto_gpt_replay.manifest import SessionManifest
+
+from helpers import SESSION, WORKSPACE_ROOT, write_session
+
+
+def frames(session_dir, count):
+    # Read in full, the files of loose frames are gone once compacted
+    return [
+        {
+            "context": frame.current_context,
+            "history": frame.full_message_history,
+            "summary": frame.summary,
+            "user_input": frame.current_user_input,
+            "command_result": frame.command_result,
+        }
+        for frame in (
+            Frame(index, session_dir, SESSION, lambda msg: None, False, WORKSPACE_ROOT)
+            for index in range(1, count + 1)
+        )
+    ]
+
+
+def test_split_compression():
+    assert split_compression("1_next_action.json.gz") == (
+        "1_next_action.json",
+        COMPRESSION_GZIP,
+    )
+    assert split_compression("1_summary.txt.zst") == ("1_summary.txt", COMPRESSION_ZSTD)
+    assert split_compression("1_summary.txt") == ("1_summary.txt", None)
+
+
+def test_gzip_sessions_replay_the_same(session_dir):
+    write_session(session_dir, frames=4, summary_every=2)
+    loose = frames(session_dir, 4)
+
+    assert compact_session(session_dir, SESSION, COMPRESSION_GZIP) == 17
+    assert compact_session(session_dir, SESSION, COMPRESSION_GZIP) == 0
+
+    manifest = SessionManifest(session_dir, SESSION).scan()
+    assert {
+        frame_file.compression
+        for record in manifest.frames.values()
+        for frame_file in record.files.values()
+    } == {COMPRESSION_GZIP}
+    assert frames(session_dir, 4) == loose
+
+
+def test_zstd_sessions_with_a_dictionary_replay_the_same(session_dir):
+    pytest.importorskip("zstandard")
+    write_session(session_dir, frames=40, summary_every=5)
+    loose = frames(session_dir, 40)
+
+    compact_session(
+        session_dir,
+        SESSION,
+        COMPRESSION_ZSTD,
+        use_dictionary=True,
+        dictionary_size=4096,
+    )
+
+    assert os.path.exists(os.path.join(session_dir, SESSION, DICTIONARY_NAME))
+    assert frames(session_dir, 40) == loose
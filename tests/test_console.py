@@ -0,0 +1,155 @@
+import io
+import logging
+import random
+import sys
+import types
+
+import pytest
+
+from auto_gpt_replay import console
+from auto_gpt_replay.console import (
+    OUTPUT_BUFFERED,
+    OUTPUT_QUIET,
+    OUTPUT_SUMMARY,
+    OUTPUT_TYPING,
+    BufferedConsoleHandler,
+    ReplayConsole,
+)
+
+
+@pytest.fixture
+def logs_module(monkeypatch):
+    # Auto-GPT's logs, its typing handler waits a random time between words
+    module = types.ModuleType("replay_test_logs")
+    module.random = random
+    module.delays = []
+
+    class TypingConsoleHandler(logging.StreamHandler):
+        def emit(self, record):
+            module.delays.append(module.random.uniform(0.05, 0.01))
+            super().emit(record)
+
+    TypingConsoleHandler.__module__ = module.__name__
+    module.TypingConsoleHandler = TypingConsoleHandler
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    return module
+
+
+@pytest.fixture
+def autogpt_logger(logs_module):
+    typed = io.StringIO()
+    typing_console_handler = logs_module.TypingConsoleHandler(typed)
+    console_handler = logging.StreamHandler(typed)
+    typing_logger = logging.getLogger("replay-test-console-typer")
+    logger = logging.getLogger("replay-test-console-logger")
+    for log, handler in (
+        (typing_logger, typing_console_handler),
+        (logger, console_handler),
+    ):
+        log.setLevel(logging.DEBUG)
+        log.propagate = False
+        log.addHandler(handler)
+    yield types.SimpleNamespace(
+        typing_logger=typing_logger,
+        logger=logger,
+        typing_console_handler=typing_console_handler,
+        console_handler=console_handler,
+        typed=typed,
+    )
+    for log, handler in (
+        (typing_logger, typing_console_handler),
+        (logger, console_handler),
+    ):
+        for installed in list(log.handlers):
+            if installed is handler or isinstance(installed, BufferedConsoleHandler):
+                log.removeHandler(installed)
+
+
+@pytest.fixture
+def exit_hooks(monkeypatch):
+    hooks = []
+    monkeypatch.setattr(
+        console,
+        "atexit",
+        types.SimpleNamespace(register=hooks.append, unregister=hooks.remove),
+    )
+    return hooks
+
+
+def log_both(autogpt_logger):
+    autogpt_logger.typing_logger.info("typed")
+    autogpt_logger.logger.warning("warned")
+
+
+@pytest.mark.parametrize(
+    "mode, shown",
+    [
+        (OUTPUT_BUFFERED, "typed\nwarned\n"),
+        (OUTPUT_QUIET, "warned\n"),
+        (OUTPUT_SUMMARY, ""),
+    ],
+)
+def test_output_modes(autogpt_logger, exit_hooks, mode, shown):
+    stream = io.StringIO()
+    replay_console = ReplayConsole(mode, stream).install(autogpt_logger)
+
+    log_both(autogpt_logger)
+    # Written out in blocks, not record by record
+    assert stream.getvalue() == ""
+    replay_console.flush()
+
+    assert stream.getvalue() == shown
+    assert autogpt_logger.typed.getvalue() == ""
+
+
+def test_typing_keeps_auto_gpt_console_without_delay(
+    autogpt_logger, logs_module, exit_hooks
+):
+    stream = io.StringIO()
+    replay_console = ReplayConsole(OUTPUT_TYPING, stream).install(autogpt_logger)
+
+    log_both(autogpt_logger)
+    replay_console.restore()
+    autogpt_logger.typing_logger.info("typed live")
+
+    assert autogpt_logger.typed.getvalue() == "typed\nwarned\ntyped live\n"
+    assert stream.getvalue() == ""
+    assert logs_module.delays[0] == 0
+    # Auto-GPT types at its own speed again once restored
+    assert logs_module.delays[1] > 0
+    assert logs_module.random is random
+    assert exit_hooks == []
+
+
+def test_full_buffers_are_written_out(autogpt_logger, exit_hooks):
+    stream = io.StringIO()
+    ReplayConsole(OUTPUT_BUFFERED, stream, buffer_size=10).install(autogpt_logger)
+
+    log_both(autogpt_logger)
+
+    assert stream.getvalue() == "typed\nwarned\n"
+
+
+def test_restore_gives_auto_gpt_its_console_back(autogpt_logger, exit_hooks):
+    stream = io.StringIO()
+    replay_console = ReplayConsole(OUTPUT_BUFFERED, stream).install(autogpt_logger)
+    assert exit_hooks == [replay_console.restore]
+    autogpt_logger.typing_logger.info("buffered")
+
+    replay_console.restore()
+    replay_console.restore()
+    log_both(autogpt_logger)
+
+    assert stream.getvalue() == "buffered\n"
+    assert autogpt_logger.typed.getvalue() == "typed\nwarned\n"
+    for log in (autogpt_logger.typing_logger, autogpt_logger.logger):
+        assert not any(
+            isinstance(handler, BufferedConsoleHandler) for handler in log.handlers
+        )
+    # Nothing left to restore when Python exits
+    assert exit_hooks == []
+
+
+def test_unknown_modes():
+    with pytest.raises(ValueError):
+        ReplayConsole("loud")
@@ -0,0 +1,130 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from auto_gpt_replay.embeddings import EmbeddingStore  # noqa: E402
+from auto_gpt_replay.report import (  # noqa: E402
+    MISS_FAIL,
+    MISS_STUB,
+    STATUS_DIVERGED,
+    ReplayFinished,
+)
+
+from helpers import SESSION  # noqa: E402
+
+
+def test_embeddings_are_saved_and_read_back(tmp_path):
+    store = EmbeddingStore.for_session(str(tmp_path), "session")
+    store.add("a", [1.0, 0.0])
+    store.add("b", [0.0, 2.0])
+    # Only the first embedding of a text is kept
+    store.add("a", [5.0, 5.0])
+    assert store.get("b") == [0.0, 2.0]
+    store.save()
+    store.add("c", [1.0, 1.0])
+    store.save()
+
+    reopened = EmbeddingStore.open(str(tmp_path), "session")
+    assert len(reopened) == 3
+    assert reopened.has("a")
+    assert reopened.get("a") == [1.0, 0.0]
+    assert reopened.get("c") == [1.0, 1.0]
+    assert reopened.get("d") is None
+    assert EmbeddingStore.open(str(tmp_path), "other") is None
+
+
+def test_get_many_stacks_the_recorded_embeddings(tmp_path):
+    store = EmbeddingStore.for_session(str(tmp_path), "session")
+    store.add("a", [1.0, 0.0])
+    store.add("b", [0.0, 2.0])
+
+    matrix, found = store.get_many(["b", "x", "a"])
+
+    assert found.tolist() == [True, False, True]
+    assert matrix.tolist() == [[0.0, 2.0], [1.0, 0.0]]
+    assert store.get_many(["x"])[0] is None
+
+
+def test_nearest_ranks_by_cosine_similarity(tmp_path):
+    store = EmbeddingStore.for_session(str(tmp_path), "session")
+    for text, embedding in (("a", [1.0, 0.0]), ("b", [0.0, 3.0]), ("c", [1, 1])):
+        store.add(text, embedding)
+
+    rows, scores = store.nearest([[0.0, 1.0], [2.0, 0.1]], k=2)
+
+    assert rows.tolist() == [[1, 2], [0, 2]]
+    assert np.allclose(scores[0], [1.0, np.sqrt(0.5)])
+    assert store.vector(int(rows[0][0])) == [0.0, 3.0]
+    assert EmbeddingStore(str(tmp_path / "empty")).nearest([1.0, 0.0]) == (None, None)
+
+
+def test_embeddings_are_requested_once(autogpt, session_dir):
+    from auto_gpt_replay.recorder import SessionRecorder
+
+    recorder = SessionRecorder(session_dir, "TestGPT", pack=False)
+    assert recorder.record_embedding("hello") == [1.0, 0.0, 0.0]
+    assert recorder.record_embedding("hello") == [1.0, 0.0, 0.0]
+    recorder.close()
+
+    assert autogpt.live.embeddings == [["hello"]]
+    store = EmbeddingStore.open(session_dir, recorder.session)
+    assert store.get("hello") == [1.0, 0.0, 0.0]
+
+
+def test_replay_returns_recorded_embeddings(autogpt, session_dir, recorded):
+    from auto_gpt_replay.mock import MockIOFunctions
+
+    store = EmbeddingStore.for_session(session_dir, SESSION)
+    store.add("hello", [0.5, 0.5])
+    store.save()
+
+    openai_mock = MockIOFunctions(session_dir, SESSION, interactive=False)
+    openai_mock.prefetcher.shutdown()
+
+    assert openai_mock.can_replay_embedding("hello")
+    assert openai_mock.replay_embedding("hello") == [0.5, 0.5]
+    assert not openai_mock.can_replay_embedding("other")
+    assert openai_mock.report.misses["embedding"] == 1
+
+
+def test_unrecorded_embeddings_follow_the_miss_policy(autogpt, session_dir, recorded):
+    from auto_gpt_replay.mock import MockIOFunctions
+
+    store = EmbeddingStore.for_session(session_dir, SESSION)
+    store.add("hello", [0.5, 0.5, 0.5])
+    store.save()
+
+    stubbed = MockIOFunctions(session_dir, SESSION, on_miss=MISS_STUB)
+    stubbed.prefetcher.shutdown()
+    assert stubbed.can_replay_embedding("other")
+    assert stubbed.replay_embedding("other") == [0.0, 0.0, 0.0]
+
+    failing = MockIOFunctions(session_dir, SESSION, on_miss=MISS_FAIL)
+    failing.prefetcher.shutdown()
+    with pytest.raises(ReplayFinished) as finished:
+        failing.can_replay_embedding("other")
+    assert finished.value.summary["status"] == STATUS_DIVERGED
+    assert autogpt.live.embeddings == []
+
+
+def test_embeddings_do_not_change_the_outcome_of_other_calls(
+    autogpt, session_dir, recorded
+):
+    from auto_gpt_replay.mock import MockIOFunctions
+
+    store = EmbeddingStore.for_session(session_dir, SESSION)
+    store.add("hello", [0.5, 0.5])
+    store.save()
+    openai_mock = MockIOFunctions(session_dir, SESSION)
+    openai_mock.prefetcher.shutdown()
+
+    # A command run live asks for a recorded embedding
+    openai_mock.report.begin("command", 1)
+    openai_mock.report.miss(1, "command", "command name differs")
+    assert openai_mock.can_replay_embedding("hello")
+    openai_mock.report.end()
+
+    embedding, command = openai_mock.report.calls
+    assert (embedding["hook"], embedding["outcome"]) == ("embedding", "hit")
+    assert (command["hook"], command["outcome"]) == ("command", "miss")
+    assert openai_mock.report.hits["embedding"] == 1
@@ -0,0 +1,40 @@
+from auto_gpt_replay.fingerprint import (
+    MessagesFingerprint,
+    fingerprint_message,
+    fingerprint_messages,
+)
+
+MESSAGES = [
+    {"role": "system", "content": "You are Test-GPT."},
+    {"role": "user", "content": "Determine which next command to use"},
+]
+
+
+def test_key_order_does_not_matter():
+    assert fingerprint_message({"role": "user", "content": "a"}) == (
+        fingerprint_message({"content": "a", "role": "user"})
+    )
+    assert fingerprint_message({"role": "user", "content": "a"}) != (
+        fingerprint_message({"role": "user", "content": "b"})
+    )
+
+
+def test_incoming_messages_fingerprint_like_recorded_ones():
+    fingerprint = MessagesFingerprint(MESSAGES)
+
+    assert fingerprint.whole == fingerprint_messages(MESSAGES)
+    assert fingerprint.last == fingerprint_message(MESSAGES[-1])
+    assert fingerprint.message_fingerprints == [
+        fingerprint_message(message) for message in MESSAGES
+    ]
+
+
+def test_order_of_messages_matters():
+    assert fingerprint_messages(MESSAGES) != fingerprint_messages(MESSAGES[::-1])
+
+
+def test_no_messages():
+    fingerprint = MessagesFingerprint([])
+
+    assert fingerprint.last is None
+    assert fingerprint.whole == fingerprint_messages([])
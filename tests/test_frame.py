@@ -0,0 +1,115 @@
+import json
+
+from auto_gpt_replay.frame import Frame, parse_command_result
+from auto_gpt_replay.message_pool import MessagePool
+
+from helpers import SESSION, WORKSPACE_ROOT, write_session
+
+
+def load_frame(session_dir, index, skip_input=False, **kwargs):
+    logged = []
+    frame = Frame(
+        index,
+        session_dir,
+        SESSION,
+        logged.append,
+        skip_input,
+        WORKSPACE_ROOT,
+        **kwargs,
+    )
+    return frame, logged
+
+
+def test_replays_the_recorded_action_for_its_context(session_dir):
+    recorded = write_session(session_dir)
+    frame, _ = load_frame(session_dir, 2)
+
+    reply = json.loads(frame.try_replay_message(recorded[1]["context"]))
+
+    assert reply["thoughts"] == recorded[1]["action"]["thoughts"]
+    assert frame.get_next_command() == {
+        "name": "google",
+        "args": {"query": "query 2"},
+    }
+    assert frame.is_end_of_frame()
+
+
+def test_path_arguments_are_relative_to_the_workspace(session_dir):
+    recorded = write_session(session_dir)
+    frame, _ = load_frame(session_dir, 3)
+
+    reply = json.loads(frame.try_replay_message(recorded[2]["context"]))
+
+    assert reply["command"]["args"]["filename"] == "file_3.txt"
+    # The recorded action itself is left alone
+    assert frame.try_replay_message(recorded[2]["context"]) == json.dumps(reply)
+
+
+def test_other_prompts_are_not_replayed(session_dir):
+    write_session(session_dir)
+    frame, _ = load_frame(session_dir, 2)
+
+    assert frame.try_replay_message([{"role": "user", "content": "Hi"}]) is False
+    assert not frame.next_action_replayed
+
+
+def test_user_input_is_replayed_unless_skipped(session_dir):
+    write_session(session_dir)
+
+    frame, _ = load_frame(session_dir, 1)
+    assert frame.try_replay_input() == "y"
+    skipped, _ = load_frame(session_dir, 1, skip_input=True)
+    assert skipped.try_replay_input() is False
+
+
+def test_summaries_are_replayed(session_dir):
+    recorded = write_session(session_dir, summary_every=2)
+    frame, _ = load_frame(session_dir, 2)
+
+    assert frame.try_replay_message(recorded[1]["summary_prompt"]) == "summary 2"
+    assert frame.summary_replayed
+
+
+def test_command_result_comes_from_the_next_frame(session_dir):
+    recorded = write_session(session_dir)
+
+    frame, _ = load_frame(session_dir, 3)
+    assert frame.command_result == {
+        "name": "google",
+        "result": recorded[1]["result"],
+    }
+    # The first frame asked the user, no command ran before the second
+    second, _ = load_frame(session_dir, 2)
+    assert second.command_result is None
+
+
+def test_missing_frames_cannot_be_replayed(session_dir):
+    write_session(session_dir)
+
+    frame, logged = load_frame(session_dir, 6)
+
+    assert not frame.can_replay
+    assert logged == ["Replay frame 6 not found! Running live now!"]
+    assert frame.command_result is None
+    assert frame.current_user_input is None
+    assert frame.try_replay_message([{"role": "user", "content": "Hi"}]) is False
+    assert not frame.is_end_of_frame()
+
+
+def test_loose_frames_share_messages_through_the_pool(session_dir):
+    write_session(session_dir)
+    pool = MessagePool()
+
+    first, _ = load_frame(session_dir, 4, pool=pool)
+    second, _ = load_frame(session_dir, 5, pool=pool)
+
+    assert first.current_context[0] is second.current_context[0]
+
+
+def test_parse_command_result():
+    assert parse_command_result("Command google returned: 3 results") == {
+        "name": "google",
+        "result": "3 results",
+    }
+    assert parse_command_result("Command google failed") is None
+    assert parse_command_result("Unknown command") is None
@@ -0,0 +1,123 @@
+import subprocess
+import sys
+
+from auto_gpt_replay.fuzzy import (
+    DEFAULT_THRESHOLD,
+    KIND_CONTEXT,
+    KIND_SUMMARY,
+    FuzzyIndex,
+    FuzzyMatcher,
+)
+
+from helpers import NEXT_COMMAND_PROMPT, SUMMARY_PROMPT
+
+
+def context(index, results):
+    history = []
+    for result in results:
+        history += [
+            {"role": "user", "content": NEXT_COMMAND_PROMPT},
+            {"role": "assistant", "content": f"Running the command for {result}"},
+            {"role": "system", "content": f"Command returned: {result}"},
+        ]
+    return [
+        {"role": "system", "content": "You are Test-GPT, you write reports."},
+        {"role": "system", "content": f"The current time and date is {index}"},
+        *history,
+        {"role": "user", "content": NEXT_COMMAND_PROMPT},
+    ]
+
+
+RESULTS = [
+    "the search found three articles about solar panels on houses",
+    "the file report.txt was written with an introduction",
+    "the website of the energy agency lists the installation costs",
+    "the summary of the costs was appended to report.txt",
+]
+
+
+def build_index(matcher=None):
+    index = FuzzyIndex(matcher or FuzzyMatcher())
+    for frame_index in range(1, len(RESULTS) + 2):
+        index.add(
+            context(frame_index, RESULTS[: frame_index - 1]), frame_index, KIND_CONTEXT
+        )
+    return index
+
+
+def test_volatile_parts_match_exactly():
+    index = build_index()
+    messages = context("2023-05-01 12:00:00", RESULTS[:2])
+
+    assert index.lookup(messages, 1) == (3, KIND_CONTEXT, 1.0)
+
+
+def test_similar_prompt_matches_its_frame():
+    index = build_index()
+    results = RESULTS[:2] + [
+        "the website of the energy agency lists installation costs"
+    ]
+
+    frame_index, kind, similarity = index.lookup(context(9, results), 1)
+
+    assert (frame_index, kind) == (4, KIND_CONTEXT)
+    assert 0.5 < similarity < 1.0
+
+
+def test_replayed_prompts_are_excluded():
+    index = build_index()
+    messages = context(9, RESULTS[:3])
+
+    assert index.lookup(messages, 4)[:2] == (4, KIND_CONTEXT)
+    match = index.lookup(messages, 4, {(4, KIND_CONTEXT)})
+    assert match is None or match[0] != 4
+
+
+def test_diverged_prompt_is_not_like_the_frame_just_replayed():
+    index = build_index()
+    # After frame 3 the agent ran something that was never recorded
+    results = RESULTS[:2] + ["the weather in Berlin is sunny with light winds today"]
+
+    match = index.lookup(context(9, results), 4)
+
+    assert match is None or match[2] < DEFAULT_THRESHOLD
+
+
+def test_summary_prompts_are_matched():
+    index = build_index()
+    summary = [{"role": "user", "content": f"{SUMMARY_PROMPT} Events: {RESULTS}"}]
+    index.add(summary, 3, KIND_SUMMARY)
+    changed = [{"role": "user", "content": f"{SUMMARY_PROMPT} Events: {RESULTS[:3]}"}]
+
+    frame_index, kind, similarity = index.lookup(changed, 1)
+
+    assert (frame_index, kind) == (3, KIND_SUMMARY)
+    assert similarity > 0.5
+
+
+def test_signatures_are_the_same_in_every_process():
+    code = (
+        "from auto_gpt_replay.fuzzy import FuzzyMatcher;"
+        "print(FuzzyMatcher().message_signature('user', 'the same words here'))"
+    )
+    signatures = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env={"PYTHONHASHSEED": seed, "PYTHONPATH": ":".join(sys.path)},
+        ).stdout
+        for seed in ("1", "2")
+    }
+
+    assert len(signatures) == 1
+    assert str(FuzzyMatcher().message_signature("user", "the same words here")) in (
+        signatures.pop()
+    )
+
+
+def test_threshold_comes_from_the_environment(monkeypatch):
+    monkeypatch.delenv("REPLAY_FUZZY_THRESHOLD", raising=False)
+    assert FuzzyMatcher.from_env() is None
+    monkeypatch.setenv("REPLAY_FUZZY_THRESHOLD", "0.9")
+    assert FuzzyMatcher.from_env().threshold == 0.9
@@ -0,0 +1,120 @@
+import sys
+import types
+
+import pytest
+
+from auto_gpt_replay import headless
+from auto_gpt_replay.console import OUTPUT_SUMMARY
+from auto_gpt_replay.headless import main, parse_frames, run_headless
+from auto_gpt_replay.report import STATUS_DIVERGED, STATUS_PASSED
+
+from helpers import SESSION
+
+
+@pytest.fixture
+def autogpt_cli(autogpt, monkeypatch):
+    # Auto-GPT's command line starts the agent with the recorded frames
+    cli = types.SimpleNamespace(frames=None, args=None)
+
+    def main(args, standalone_mode):
+        cli.args = args
+        autogpt.Agent(cli.frames).start_interaction_loop()
+
+    module = types.ModuleType("autogpt.cli")
+    module.main = types.SimpleNamespace(main=main)
+    monkeypatch.setitem(sys.modules, "autogpt.cli", module)
+    return cli
+
+
+def test_parse_frames():
+    assert parse_frames("1-") == (1, None)
+    assert parse_frames("-7") == (1, 7)
+    assert parse_frames("3-7") == (3, 7)
+    assert parse_frames("4") == (4, 4)
+    for frames in ("abc", "1-x", "5-3", "0-3"):
+        with pytest.raises(ValueError):
+            parse_frames(frames)
+
+
+@pytest.mark.parametrize("frames", ["abc", "5-3"])
+def test_bad_frame_ranges_are_usage_errors(monkeypatch, capsys, frames):
+    monkeypatch.setattr(sys, "argv", ["headless", "session", "--frames", frames])
+
+    with pytest.raises(SystemExit) as exited:
+        main()
+
+    assert exited.value.code == 2
+    assert "invalid frame range" in capsys.readouterr().err
+
+
+def test_options_after_the_session_are_parsed(monkeypatch, capsys):
+    calls = []
+
+    def run_headless(session, **kwargs):
+        calls.append((session, kwargs))
+        return {"status": STATUS_PASSED}
+
+    monkeypatch.setattr(headless, "run_headless", run_headless)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["headless", "session", "--frames", "2-4", "--", "--ai-settings", "a.yaml"],
+    )
+
+    with pytest.raises(SystemExit) as exited:
+        headless.main()
+
+    assert exited.value.code == 0
+    [(session, kwargs)] = calls
+    assert session == "session"
+    assert (kwargs["start_frame"], kwargs["end_frame"]) == (2, 4)
+    assert kwargs["autogpt_args"] == ["--ai-settings", "a.yaml"]
+
+
+def test_replays_without_prompts(autogpt, autogpt_cli, session_dir, recorded):
+    autogpt_cli.frames = recorded
+
+    summary = run_headless(
+        SESSION,
+        autogpt_args=["--ai-settings", "ai.yaml"],
+        session_dir=session_dir,
+        console_mode=OUTPUT_SUMMARY,
+    )
+
+    assert summary["status"] == STATUS_PASSED
+    assert autogpt_cli.args == ["--skip-reprompt", "--ai-settings", "ai.yaml"]
+    assert sys.modules["autogpt.config.config"].Config().skip_reprompt
+    assert autogpt.live.chats == []
+
+
+def test_stops_at_the_end_frame(autogpt, autogpt_cli, session_dir, recorded):
+    autogpt_cli.frames = recorded
+
+    summary = run_headless(
+        SESSION, end_frame=3, session_dir=session_dir, console_mode=OUTPUT_SUMMARY
+    )
+
+    assert summary["status"] == STATUS_PASSED
+    assert summary["last_frame"] == 3
+
+
+def test_diverged_replays_stop(autogpt, autogpt_cli, session_dir, recorded):
+    frames = [dict(frame) for frame in recorded]
+    frames[1]["context"] = [{"role": "user", "content": "Something else"}]
+    autogpt_cli.frames = frames
+
+    summary = run_headless(
+        SESSION, session_dir=session_dir, console_mode=OUTPUT_SUMMARY
+    )
+
+    assert summary["status"] == STATUS_DIVERGED
+    assert summary["last_frame"] == 2
+
+
+def test_unknown_sessions_and_policies(session_dir):
+    with pytest.raises(FileNotFoundError):
+        run_headless("missing", session_dir=session_dir)
+    with pytest.raises(ValueError):
+        run_headless(SESSION, on_miss="retry", session_dir=session_dir)
+    with pytest.raises(ValueError):
+        run_headless(SESSION, start_frame=5, end_frame=3, session_dir=session_dir)
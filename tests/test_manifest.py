@@ -0,0 +1,77 @@
+import os
+import shutil
+
+from auto_gpt_replay.manifest import (
+    FORMAT_JSON,
+    FORMAT_TEXT,
+    SessionManifest,
+    frame_folder,
+    list_frame_folders,
+    scan_frame_folder,
+)
+
+from helpers import SESSION, write_session
+
+
+def test_scan_finds_every_frame_and_file(session_dir):
+    write_session(session_dir, frames=3, summary_every=2)
+
+    manifest = SessionManifest(session_dir, SESSION).scan()
+
+    assert sorted(manifest.frames) == [1, 2, 3]
+    assert sorted(manifest.frames[1].files) == [
+        "current_context",
+        "full_message_history",
+        "next_action",
+        "user_input",
+    ]
+    assert sorted(manifest.frames[2].files) == [
+        "current_context",
+        "full_message_history",
+        "next_action",
+        "prompt_summary",
+        "summary",
+    ]
+    summary = manifest.frames[2].files["summary"]
+    assert summary.format == FORMAT_TEXT
+    assert summary.compression is None
+    assert os.path.basename(summary.path) == "1_summary.txt"
+    assert manifest.frames[2].files["prompt_summary"].format == FORMAT_JSON
+
+
+def test_unknown_files_and_folders_are_ignored(session_dir):
+    write_session(session_dir, frames=1)
+    folder = frame_folder(session_dir, SESSION, 1)
+    open(os.path.join(folder, "notes.md"), "w").close()
+    os.makedirs(os.path.join(folder, "extra"))
+    os.makedirs(os.path.join(session_dir, SESSION, "workspace"))
+
+    record = scan_frame_folder(1, folder)
+
+    assert "notes" not in record.files
+    assert [
+        index for index, _ in list_frame_folders(os.path.join(session_dir, SESSION))
+    ] == [1]
+
+
+def test_compressed_files_keep_their_key(session_dir):
+    write_session(session_dir, frames=1)
+    folder = frame_folder(session_dir, SESSION, 1)
+    context = os.path.join(folder, "1_current_context.json")
+    os.rename(context, context + ".gz")
+
+    record = scan_frame_folder(1, folder)
+
+    assert record.files["current_context"].compression == "gzip"
+    assert record.files["current_context"].path == context + ".gz"
+
+
+def test_frames_written_after_the_scan_are_found(session_dir):
+    write_session(session_dir, frames=2)
+    manifest = SessionManifest(session_dir, SESSION).scan()
+    shutil.copytree(
+        frame_folder(session_dir, SESSION, 2), frame_folder(session_dir, SESSION, 3)
+    )
+
+    assert manifest.get(3).index == 3
+    assert manifest.get(4) is None
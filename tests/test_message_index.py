@@ -0,0 +1,39 @@
+from auto_gpt_replay.fingerprint import fingerprint_messages
+from auto_gpt_replay.frame import Frame
+from auto_gpt_replay.message_index import MessageIndex
+
+from helpers import SESSION, WORKSPACE_ROOT, write_session
+
+
+def test_prefers_the_closest_frame_ahead():
+    index = MessageIndex()
+    for frame_index in (2, 5, 9):
+        index.add(b"prompt", frame_index)
+
+    assert index.lookup(b"prompt", 1) == 2
+    assert index.lookup(b"prompt", 5) == 9
+    assert index.lookup(b"prompt", 9) == 2
+    assert index.lookup(b"other", 1) is None
+
+
+def test_the_current_frame_is_not_a_match():
+    index = MessageIndex()
+    index.add(b"prompt", 4)
+
+    assert index.lookup(b"prompt", 4) is None
+
+
+def test_build_indexes_contexts_and_summaries(session_dir):
+    recorded = write_session(session_dir, frames=4, summary_every=2)
+    frames = [
+        Frame(index, session_dir, SESSION, lambda msg: None, True, WORKSPACE_ROOT)
+        for index in range(1, 6)
+    ]
+
+    index = MessageIndex.build(frames)
+
+    for frame in recorded:
+        assert index.lookup(fingerprint_messages(frame["context"]), 0) == (
+            frame["index"]
+        )
+    assert index.lookup(fingerprint_messages(recorded[3]["summary_prompt"]), 0) == 4
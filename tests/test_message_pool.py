@@ -0,0 +1,34 @@
+from auto_gpt_replay.message_pool import MessagePool
+
+
+def test_equal_messages_are_shared():
+    pool = MessagePool()
+
+    first = pool.messages([{"role": "user", "content": "Hi"}])
+    second = pool.messages([{"role": "user", "content": "H" + "i"}])
+
+    assert first[0] is second[0]
+    assert first == [{"role": "user", "content": "Hi"}]
+    assert len(pool) == 1
+
+
+def test_messages_with_other_keys_are_copied():
+    pool = MessagePool()
+    message = {"role": "function", "name": "google", "content": "results"}
+
+    compact = pool.message(message)
+
+    assert compact == message
+    assert compact is not message
+    assert compact["content"] is pool.content("result" + "s")
+    assert len(pool) == 0
+
+
+def test_anything_else_is_left_alone():
+    pool = MessagePool()
+
+    assert pool.messages("text") == "text"
+    assert pool.message(None) is None
+    assert pool.messages([{"role": "user", "content": None}]) == [
+        {"role": "user", "content": None}
+    ]
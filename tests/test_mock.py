@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+from auto_gpt_replay.report import (
+    MISS_FAIL,
+    MISS_LIVE,
+    STATUS_DIVERGED,
+    STATUS_PASSED,
+    ReplayFinished,
+)
+from auto_gpt_replay.snapshot import WorkspaceSnapshots
+
+from helpers import SESSION, write_session
+
+
+def replay(session_dir, agent, **kwargs):
+    from auto_gpt_replay.mock import MockIOFunctions
+
+    kwargs.setdefault("on_miss", MISS_FAIL)
+    kwargs.setdefault("interactive", False)
+    openai_mock = MockIOFunctions(session_dir, SESSION, **kwargs)
+    openai_mock.mock_start_interaction_loop()
+    with pytest.raises(ReplayFinished) as finished:
+        agent.start_interaction_loop()
+    openai_mock.prefetcher.shutdown()
+    return openai_mock, finished.value.summary
+
+
+def test_replays_a_whole_session(autogpt, session_dir, recorded):
+    agent = autogpt.Agent(recorded)
+    _, summary = replay(session_dir, agent)
+
+    assert summary["status"] == STATUS_PASSED
+    assert summary["last_frame"] == len(recorded)
+    assert summary["hits"]["chat"] == len(recorded)
+    assert summary["hits"]["command"] == len(recorded) - 1
+    assert summary["hits"]["input"] == 1
+    replies = [json.loads(reply) for reply in agent.replies]
+    assert [reply["thoughts"] for reply in replies] == [
+        frame["action"]["thoughts"] for frame in recorded
+    ]
+    assert replies[0]["command"]["args"]["filename"] == "file_1.txt"
+    assert agent.inputs == ["y"]
+    # The replay finishes on the last command, its result was never recorded
+    assert agent.results == [frame["result"] for frame in recorded[1:-1]]
+    assert autogpt.live.chats == []
+    assert autogpt.live.commands == []
+
+
+def test_prefetches_every_frame_after_the_first(autogpt, session_dir):
+    recorded = write_session(session_dir, frames=30)
+    openai_mock, summary = replay(session_dir, autogpt.Agent(recorded))
+
+    assert summary["status"] == STATUS_PASSED
+    stats = openai_mock.prefetcher.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == len(recorded)
+
+
+def test_diverged_prompt_fails_the_replay(autogpt, session_dir, recorded):
+    frames = [dict(frame) for frame in recorded]
+    frames[2]["context"] = [{"role": "user", "content": "Something else entirely"}]
+    _, summary = replay(session_dir, autogpt.Agent(frames))
+
+    assert summary["status"] == STATUS_DIVERGED
+    assert summary["last_frame"] == 3
+    assert summary["misses"]["chat"] == 1
+
+
+@pytest.mark.parametrize("snapshot", [True, False])
+def test_other_arguments_restore_the_recorded_workspace(
+    autogpt, session_dir, recorded, tmp_path, monkeypatch, snapshot
+):
+    recording = tmp_path / "recording"
+    recording.mkdir()
+    (recording / "file_3.txt").write_text("text 3")
+    if snapshot:
+        WorkspaceSnapshots(os.path.join(session_dir, SESSION)).record(3, str(recording))
+    monkeypatch.setenv("REPLAY_WORKSPACE", "restore")
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    agent = autogpt.Agent(recorded, str(workspace))
+    agent.changed_arguments[3] = {"text": "other text"}
+
+    _, summary = replay(session_dir, agent, on_miss=MISS_LIVE)
+
+    assert summary["status"] == STATUS_DIVERGED
+    assert summary["misses"]["command"] == 1
+    if snapshot:
+        assert agent.results[1] == recorded[2]["result"]
+        assert (workspace / "file_3.txt").read_text() == "text 3"
+        assert autogpt.live.commands == []
+    else:
+        # Nothing to restore, the command runs live
+        assert agent.results[1] == "live result"
+        assert autogpt.live.commands == ["write_to_file"]
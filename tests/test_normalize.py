@@ -0,0 +1,61 @@
+from auto_gpt_replay.normalize import ArgumentNormalizer, parse_path_keys
+
+
+def test_path_arguments_are_compared_relative_to_the_workspace():
+    normalizer = ArgumentNormalizer("/workspace")
+
+    assert normalizer.matches(
+        "write_to_file",
+        {"filename": "/workspace/notes/a.txt", "text": "hi"},
+        {"filename": "notes/a.txt", "text": "hi"},
+    )
+    assert not normalizer.matches(
+        "write_to_file",
+        {"filename": "/workspace/notes/a.txt", "text": "hi"},
+        {"filename": "notes/a.txt", "text": "bye"},
+    )
+    assert not normalizer.matches(
+        "write_to_file", {"filename": "/workspace/a.txt"}, {"filename": "b.txt"}
+    )
+    assert not normalizer.matches("google", {"query": "a"}, {"query": "a", "n": 1})
+
+
+def test_normalize_only_copies_arguments_with_paths():
+    normalizer = ArgumentNormalizer("/workspace")
+    args = {"query": "solar panels"}
+
+    assert normalizer.normalize("google", args) is args
+    assert normalizer.normalize("read_file", {"filename": "/workspace/a.txt"}) == {
+        "filename": "a.txt"
+    }
+
+
+def test_path_keys_per_command():
+    normalizer = ArgumentNormalizer(
+        "/workspace",
+        parse_path_keys("clone_repository: clone_path ; copy:source,target"),
+    )
+
+    assert normalizer.path_keys("copy") == ("source", "target")
+    assert normalizer.path_keys("read_file") == ("filename", "directory", "clone_path")
+    assert normalizer.normalize(
+        "copy", {"source": "/workspace/a", "target": "/workspace/b", "filename": "c"}
+    ) == {"source": "a", "target": "b", "filename": "c"}
+
+
+def test_path_keys_from_the_environment(monkeypatch):
+    monkeypatch.setenv("REPLAY_PATH_ARGUMENTS", "my_command:source")
+
+    normalizer = ArgumentNormalizer.from_env("/workspace")
+
+    assert normalizer.path_keys("my_command") == ("source",)
+
+
+def test_another_workspace_root_clears_the_cached_paths():
+    normalizer = ArgumentNormalizer("/workspace")
+    assert normalizer.relative("/workspace/a.txt") == "a.txt"
+
+    normalizer.set_workspace_root("/other")
+
+    assert normalizer.relative("/other/a.txt") == "a.txt"
+    assert normalizer.relative(None) is None
@@ -0,0 +1,79 @@
+import os
+import sys
+import types
+
+import pytest
+
+import auto_gpt_replay
+from auto_gpt_replay import AutoGPTReplay, load_env
+from auto_gpt_replay.frame import SUMMARY_PROMPT
+
+REPLAY_MODULES = (
+    "auto_gpt_replay.main",
+    "auto_gpt_replay.mock",
+    "auto_gpt_replay.recorder",
+    "auto_gpt_replay.snapshot",
+)
+
+
+@pytest.fixture
+def plugin_env(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(auto_gpt_replay, "_env_loaded", False)
+    for name in os.environ:
+        if name.startswith("REPLAY_") or name == "RUN_REPLAY":
+            monkeypatch.delenv(name)
+    for name in REPLAY_MODULES:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    # Plugins are singletons, every test constructs its own
+    monkeypatch.delitem(type(AutoGPTReplay)._instances, AutoGPTReplay, raising=False)
+    return tmp_path
+
+
+def test_env_file_is_read_once(plugin_env, monkeypatch):
+    # Removed again after the test
+    monkeypatch.setenv("REPLAY_RECORD_NAME", "")
+    monkeypatch.delenv("REPLAY_RECORD_NAME")
+    (plugin_env / ".env").write_text("REPLAY_RECORD_NAME=First\n")
+    load_env()
+    (plugin_env / ".env").write_text("REPLAY_RECORD_NAME=Second\n")
+    load_env()
+
+    assert os.environ["REPLAY_RECORD_NAME"] == "First"
+
+
+def test_plugin_loads_the_replay_on_first_use(plugin_env, monkeypatch):
+    monkeypatch.setenv("REPLAY_RECORD", "True")
+
+    plugin = AutoGPTReplay()
+
+    assert plugin.can_handle_on_planning()
+    assert plugin.can_handle_text_embedding("text")
+    summary_prompt = [{"role": "user", "content": f"{SUMMARY_PROMPT} Events"}]
+    assert plugin.can_handle_chat_completion(summary_prompt, "gpt-3.5", 0, None)
+    assert not plugin.can_handle_chat_completion(
+        [{"role": "user", "content": "Hi"}], "gpt-3.5", 0, None
+    )
+    for name in REPLAY_MODULES:
+        assert name not in sys.modules
+
+
+def test_running_replay_is_left_to_itself(plugin_env, monkeypatch):
+    replay = types.SimpleNamespace(
+        can_replay_embedding=lambda text: text == "recorded",
+        replay_embedding=lambda text: [1.0],
+    )
+    mock = types.ModuleType("auto_gpt_replay.mock")
+    mock.MockIOFunctions = types.SimpleNamespace(active=replay)
+    monkeypatch.setitem(sys.modules, "auto_gpt_replay.mock", mock)
+    monkeypatch.setenv("RUN_REPLAY", "True")
+    monkeypatch.setenv("REPLAY_RECORD", "True")
+
+    plugin = AutoGPTReplay()
+
+    # Neither another replay nor a recording of this one
+    assert "auto_gpt_replay.main" not in sys.modules
+    assert not plugin.can_handle_on_planning()
+    assert plugin.can_handle_text_embedding("recorded")
+    assert plugin.handle_text_embedding("recorded") == [1.0]
+    assert not plugin.can_handle_text_embedding("other")
@@ -0,0 +1,64 @@
+from auto_gpt_replay.prefetch import FramePrefetcher
+
+
+def loader():
+    loaded = []
+
+    def load_frame(index, skip_input, log):
+        loaded.append((index, skip_input))
+        log(f"loaded {index}")
+        return (index, skip_input)
+
+    return load_frame, loaded
+
+
+def test_scheduled_frames_are_hits():
+    load_frame, loaded = loader()
+    logged = []
+    prefetcher = FramePrefetcher(load_frame, 2, logged.append)
+
+    prefetcher.schedule(1, 0)
+
+    assert prefetcher.get(2, False) == (2, False)
+    assert prefetcher.get(3, False) == (3, False)
+    assert prefetcher.stats() == {"hits": 2, "misses": 0}
+    # Warnings are shown once the frame is reached
+    assert logged == ["loaded 2", "loaded 3"]
+    prefetcher.shutdown()
+
+
+def test_frames_loaded_for_other_inputs_are_misses():
+    load_frame, loaded = loader()
+    prefetcher = FramePrefetcher(load_frame, 2, lambda msg: None)
+
+    # Inputs are skipped in the next frame only
+    prefetcher.schedule(1, 2)
+    assert prefetcher.get(2, True) == (2, True)
+    assert prefetcher.get(3, True) == (3, True)
+
+    assert prefetcher.stats() == {"hits": 1, "misses": 1}
+    prefetcher.shutdown()
+
+
+def test_frames_behind_the_replay_are_dropped():
+    load_frame, loaded = loader()
+    prefetcher = FramePrefetcher(load_frame, 2, lambda msg: None)
+
+    prefetcher.schedule(1, 0)
+    prefetcher.schedule(4, 0)
+
+    assert sorted(prefetcher._pending) == [5, 6]
+    prefetcher.shutdown()
+    assert prefetcher._pending == {}
+
+
+def test_no_window_loads_every_frame_when_reached():
+    load_frame, loaded = loader()
+    prefetcher = FramePrefetcher(load_frame, 0, lambda msg: None)
+
+    prefetcher.schedule(1, 0)
+
+    assert loaded == []
+    assert prefetcher.get(2, False) == (2, False)
+    assert prefetcher.stats() == {"hits": 0, "misses": 1}
+    prefetcher.shutdown()
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from auto_gpt_replay.archive import SessionArchive, archive_path
+from auto_gpt_replay.frame import Frame
+
+from helpers import SESSION, WORKSPACE_ROOT, write_session
+
+
+def record_session(session_dir, frames, pack):
+    from auto_gpt_replay.recorder import SessionRecorder
+
+    recorder = SessionRecorder(session_dir, "TestGPT", pack=pack)
+    for frame in frames:
+        recorder.start_frame(frame["context"])
+        recorder.record_reply(json.dumps(frame["action"]))
+        if frame["user_input"] is not None:
+            recorder.record_user_input(frame["user_input"])
+        else:
+            recorder.record_command_result(
+                frame["action"]["command"]["name"], frame["result"]
+            )
+    recorder.close()
+    return recorder.session
+
+
+def load_frame(session_dir, session, index, archive=None):
+    return Frame(
+        index, session_dir, session, lambda msg: None, False, WORKSPACE_ROOT, archive
+    )
+
+
+@pytest.mark.parametrize("pack", [False, True])
+def test_recorded_frames_read_like_logged_ones(autogpt, session_dir, tmp_path, pack):
+    logged_dir = str(tmp_path / "logged")
+    recorded = write_session(logged_dir)
+    session = record_session(session_dir, recorded, pack)
+
+    archive = None
+    if pack:
+        path = archive_path(session_dir, session)
+        assert os.path.exists(path)
+        archive = SessionArchive(path)
+    for frame in recorded:
+        logged = load_frame(logged_dir, SESSION, frame["index"])
+        replayed = load_frame(session_dir, session, frame["index"], archive)
+        assert replayed.can_replay
+        assert replayed.current_context == logged.current_context
+        assert replayed.full_message_history == logged.full_message_history
+        assert replayed.current_user_input == logged.current_user_input
+        assert replayed.get_next_command() == logged.get_next_command()
+        assert replayed.command_result == logged.command_result
+    if archive is not None:
+        archive.close()
+
+
+def test_summaries_go_into_the_next_frame(autogpt, session_dir):
+    from auto_gpt_replay.recorder import SessionRecorder
+
+    recorded = write_session(str(session_dir) + "_logged", summary_every=2)
+    recorder = SessionRecorder(session_dir, "TestGPT", pack=False)
+    recorder.start_frame(recorded[0]["context"])
+    recorder.record_reply(json.dumps(recorded[0]["action"]))
+    summary = recorder.record_summary(recorded[1]["summary_prompt"], "gpt-3.5", 0, None)
+    recorder.start_frame(recorded[1]["context"])
+    recorder.close()
+
+    assert summary == "live reply"
+    assert autogpt.live.chats == [recorded[1]["summary_prompt"]]
+    frame = load_frame(session_dir, recorder.session, 2)
+    assert frame.summary_prompt == recorded[1]["summary_prompt"]
+    assert frame.try_replay_message(recorded[1]["summary_prompt"]) == "live reply"
+    assert load_frame(session_dir, recorder.session, 1).summary_prompt is None
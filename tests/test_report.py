@@ -0,0 +1,79 @@
+import json
+
+from auto_gpt_replay.report import (
+    STATUS_PASSED,
+    TIMELINE_CHROME,
+    TIMELINE_JSON,
+    ReplayFinished,
+    ReplayReport,
+)
+
+
+def replayed_report():
+    report = ReplayReport("session", 1, 3)
+    report.begin("chat", 1)
+    with report.phase("load"):
+        pass
+    report.hit("chat", tokens=120)
+    report.end()
+    report.begin("command", 1)
+    report.miss(1, "command", "command arguments differ")
+    with report.phase("live"):
+        # A live command asking for a chat completion of its own
+        report.begin("chat", 1)
+        report.miss(1, "chat", "messages differ")
+        with report.phase("live"):
+            pass
+        report.end()
+    report.end()
+    return report
+
+
+def test_summary_counts_hits_and_misses():
+    summary = replayed_report().summary(STATUS_PASSED, 2, prefetch={"hits": 1})
+
+    assert summary["hits"] == {"chat": 1, "input": 0, "command": 0, "embedding": 0}
+    assert summary["misses"] == {"chat": 1, "input": 0, "command": 1, "embedding": 0}
+    assert summary["divergences"] == [
+        {"frame": 1, "hook": "command", "reason": "command arguments differ"},
+        {"frame": 1, "hook": "chat", "reason": "messages differ"},
+    ]
+    assert summary["saved"]["tokens"] == 120
+    assert summary["saved"]["chat_seconds"] is not None
+    assert set(summary["time"]) == {"load", "match", "live"}
+    assert summary["prefetch"] == {"hits": 1}
+    assert summary["last_frame"] == 2
+
+
+def test_nested_calls_are_recorded_in_order_of_completion():
+    report = replayed_report()
+
+    assert [(call["hook"], call["outcome"]) for call in report.calls] == [
+        ("chat", "hit"),
+        ("chat", "miss"),
+        ("command", "miss"),
+    ]
+    assert [name for name, _, _ in report.calls[2]["phases"]] == ["live"]
+
+
+def test_timeline_exports(tmp_path):
+    report = replayed_report()
+
+    report.export(str(tmp_path / "trace.json"), TIMELINE_CHROME)
+    report.export(str(tmp_path / "timeline.json"), TIMELINE_JSON)
+
+    with open(tmp_path / "trace.json", encoding="utf-8") as fp:
+        events = json.load(fp)["traceEvents"]
+    assert [event["name"] for event in events if event["cat"] == "command"] == [
+        "command miss",
+        "live",
+    ]
+    with open(tmp_path / "timeline.json", encoding="utf-8") as fp:
+        timeline = json.load(fp)
+    assert len(timeline["calls"]) == 3
+    assert timeline["calls"][0]["reason"] is None
+
+
+def test_replay_finished_exit_codes():
+    assert ReplayFinished({"status": STATUS_PASSED}).code == 0
+    assert ReplayFinished({"status": "diverged"}).code == 1
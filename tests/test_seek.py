@@ -0,0 +1,68 @@
+import types
+
+import pytest
+
+from auto_gpt_replay.frame import Frame
+from auto_gpt_replay.report import MISS_FAIL, STATUS_PASSED, ReplayFinished
+from auto_gpt_replay.seek import SUMMARY_PREFIX, apply_state, frame_state
+
+from helpers import SESSION, WORKSPACE_ROOT, write_session
+
+
+def load_frame(session_dir, index):
+    return Frame(index, session_dir, SESSION, lambda msg: None, True, WORKSPACE_ROOT)
+
+
+def test_state_of_a_frame(session_dir):
+    write_session(session_dir, frames=5)
+
+    state = frame_state(load_frame(session_dir, 5))
+
+    # Frames 1 to 4 logged two or three messages each, the context kept six
+    assert len(state.full_message_history) == 11
+    assert state.summary is None
+    assert state.last_trimmed_index == 4
+    assert frame_state(load_frame(session_dir, 9)) is None
+
+
+def test_summary_comes_from_the_context(session_dir):
+    write_session(session_dir, frames=2)
+    frame = load_frame(session_dir, 2)
+    frame.current_context.insert(
+        1, {"role": "system", "content": f"{SUMMARY_PREFIX} \nThe agent searched."}
+    )
+
+    assert frame_state(frame).summary == "The agent searched."
+
+
+def test_apply_state_to_an_agent(session_dir):
+    write_session(session_dir, frames=3)
+    state = frame_state(load_frame(session_dir, 3))
+    state.summary = "The agent searched."
+    agent = types.SimpleNamespace()
+
+    apply_state(agent, state)
+
+    assert agent.cycle_count == 2
+    assert agent.full_message_history == state.full_message_history
+    assert agent.summary_memory["content"].endswith("The agent searched.")
+    assert agent.last_memory_index == state.last_trimmed_index
+
+
+def test_replay_fast_forwards_to_its_start_frame(autogpt, session_dir):
+    recorded = write_session(session_dir, frames=6)
+    from auto_gpt_replay.mock import MockIOFunctions
+
+    openai_mock = MockIOFunctions(
+        session_dir, SESSION, start_frame=4, on_miss=MISS_FAIL, interactive=False
+    )
+    openai_mock.mock_start_interaction_loop()
+    agent = autogpt.Agent(recorded[3:])
+
+    with pytest.raises(ReplayFinished) as finished:
+        agent.start_interaction_loop()
+
+    assert finished.value.summary["status"] == STATUS_PASSED
+    assert agent.cycle_count == 3
+    assert len(agent.full_message_history) == 8
+    assert autogpt.live.chats == []
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+from auto_gpt_replay.report import MISS_STUB, STUB_NEXT_ACTION
+from auto_gpt_replay.server import ReplayIndex, ReplayServer
+
+from helpers import SESSION, WORKSPACE_ROOT
+
+
+@pytest.fixture
+def index(session_dir, recorded):
+    return ReplayIndex.build(session_dir, [SESSION], WORKSPACE_ROOT)
+
+
+async def send(reader, writer, method, path, body=None):
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+        + data
+    )
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in head[1:] if line)
+    payload = await reader.readexactly(int(headers["Content-Length"]))
+    return int(head[0].split(" ")[1]), headers["X-Replay"], json.loads(payload)
+
+
+def serve(server, requests):
+    # Sends the requests over one connection, answers in order
+    async def run():
+        listening = await server.start(port=0)
+        port = listening.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return [await send(reader, writer, *request) for request in requests]
+        finally:
+            writer.close()
+            listening.close()
+            await listening.wait_closed()
+
+    return asyncio.run(run())
+
+
+def chat(messages):
+    return ("POST", "/v1/chat/completions", {"model": "gpt-4", "messages": messages})
+
+
+def test_recorded_prompts_are_answered(index, recorded):
+    server = ReplayServer(index)
+
+    (status, replay, response), (_, _, stats) = serve(
+        server, [chat(recorded[1]["context"]), ("GET", "/replay/stats")]
+    )
+
+    assert status == 200
+    assert replay == "hit"
+    content = json.loads(response["choices"][0]["message"]["content"])
+    assert content["thoughts"] == recorded[1]["action"]["thoughts"]
+    assert stats["sessions"] == [SESSION]
+    assert stats["responses"] == len(recorded)
+    assert stats["hits"]["chat"] == 1
+
+
+def test_misses_follow_the_policy(index):
+    messages = [{"role": "user", "content": "Hi"}]
+
+    [(status, replay, _)] = serve(ReplayServer(index), [chat(messages)])
+    assert (status, replay) == (404, "miss")
+
+    [(status, replay, response)] = serve(
+        ReplayServer(index, MISS_STUB), [chat(messages)]
+    )
+    assert (status, replay) == (200, "stub")
+    assert response["choices"][0]["message"]["content"] == STUB_NEXT_ACTION
+
+
+@pytest.mark.parametrize(
+    "messages",
+    [None, [], "Hi", [{"content": "Hi"}], [{"role": "user", "content": 1}]],
+)
+def test_malformed_messages_are_bad_requests(index, messages):
+    [(status, _, response)] = serve(ReplayServer(index), [chat(messages)])
+
+    assert status == 400
+    assert response["error"]["type"] == "invalid_request_error"
+
+
+def test_errors_answer_the_request_and_keep_the_connection(
+    index, recorded, monkeypatch
+):
+    server = ReplayServer(index)
+
+    def fail(messages, fingerprint=None):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(index, "chat", fail)
+    (status, _, response), (stats_status, _, _) = serve(
+        server, [chat(recorded[1]["context"]), ("GET", "/replay/stats")]
+    )
+
+    assert status == 500
+    assert response["error"]["type"] == "server_error"
+    assert stats_status == 200
+
+
+def test_unknown_paths_and_methods(index):
+    (not_found, _, _), (not_allowed, _, _) = serve(
+        ReplayServer(index),
+        [("POST", "/v1/completions", {}), ("GET", "/v1/chat/completions")],
+    )
+
+    assert (not_found, not_allowed) == (404, 405)
@@ -0,0 +1,58 @@
+import os
+
+from auto_gpt_replay.session_index import SessionIndex
+
+from helpers import write_session
+
+
+def test_latest_is_the_newest_session(session_dir):
+    write_session(session_dir, frames=2, session="20230501_120000_TestGPT")
+    write_session(session_dir, frames=1, session="20230502_090000_TestGPT")
+    os.makedirs(os.path.join(session_dir, "REPLAY_20230503_100000_TestGPT"))
+
+    index = SessionIndex(session_dir)
+
+    assert index.latest() == "20230502_090000_TestGPT"
+    assert [entry["name"] for entry in index.update()] == [
+        "20230502_090000_TestGPT",
+        "20230501_120000_TestGPT",
+    ]
+    assert os.path.exists(index.path)
+
+
+def test_entries_count_frames(session_dir):
+    write_session(session_dir, frames=3)
+
+    (entry,) = SessionIndex(session_dir).update()
+
+    assert entry["frames"] == 3
+    assert entry["created"] == "20230501_120000"
+    assert entry["size"] > 0
+
+
+def test_new_sessions_make_the_index_stale(session_dir):
+    write_session(session_dir, frames=1, session="20230501_120000_TestGPT")
+    index = SessionIndex(session_dir)
+    assert index.latest() == "20230501_120000_TestGPT"
+
+    write_session(session_dir, frames=1, session="20230601_120000_TestGPT")
+    # Make sure the folder's mtime changed on coarse-grained file systems
+    stat = os.stat(session_dir)
+    os.utime(session_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert index.latest() == "20230601_120000_TestGPT"
+
+
+def test_the_latest_session_is_read_from_the_index(session_dir, monkeypatch):
+    write_session(session_dir, frames=1)
+    index = SessionIndex(session_dir)
+    index.update()
+
+    # Nothing is listed while the folder is unchanged
+    monkeypatch.setattr(os, "listdir", None)
+    assert index.latest() == "20230501_120000_TestGPT"
+
+
+def test_no_sessions(tmp_path):
+    assert SessionIndex(str(tmp_path / "missing")).latest() is None
+    assert SessionIndex(str(tmp_path)).latest() is None
@@ -0,0 +1,81 @@
+import os
+
+from auto_gpt_replay.snapshot import WorkspaceSnapshots
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write(text)
+
+
+def read_workspace(workspace):
+    files = {}
+    for root, dirs, names in os.walk(workspace):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "r", encoding="utf-8") as fp:
+                files[os.path.relpath(path, workspace)] = fp.read()
+    return files
+
+
+def test_restores_the_workspace_after_any_frame(tmp_path):
+    workspace = str(tmp_path / "workspace")
+    os.makedirs(workspace)
+    snapshots = WorkspaceSnapshots(str(tmp_path / "session"))
+
+    write(os.path.join(workspace, "a.txt"), "a1")
+    assert snapshots.record(1, workspace)
+    write(os.path.join(workspace, "notes", "b.txt"), "b1")
+    assert snapshots.record(2, workspace)
+    # Nothing changed, no diff for the frame
+    assert not snapshots.record(3, workspace)
+    write(os.path.join(workspace, "a.txt"), "a2")
+    os.remove(os.path.join(workspace, "notes", "b.txt"))
+    assert snapshots.record(4, workspace)
+
+    reopened = WorkspaceSnapshots(str(tmp_path / "session")).scan()
+    assert sorted(reopened.diffs) == [1, 2, 4]
+    assert not reopened.has_frame(3)
+
+    assert reopened.restore(2, workspace) == 2
+    assert read_workspace(workspace) == {
+        "a.txt": "a1",
+        os.path.join("notes", "b.txt"): "b1",
+    }
+    assert reopened.restore(3, workspace) == 0
+    assert reopened.restore(4, workspace) == 1
+    assert read_workspace(workspace) == {"a.txt": "a2"}
+
+
+def test_files_the_session_never_wrote_are_left_alone(tmp_path):
+    workspace = str(tmp_path / "workspace")
+    os.makedirs(workspace)
+    snapshots = WorkspaceSnapshots(str(tmp_path / "session"))
+    write(os.path.join(workspace, "a.txt"), "a1")
+    snapshots.record(1, workspace)
+
+    write(os.path.join(workspace, "other.txt"), "mine")
+    os.remove(os.path.join(workspace, "a.txt"))
+    snapshots.restore(1, workspace)
+
+    assert read_workspace(workspace) == {"a.txt": "a1", "other.txt": "mine"}
+
+
+def test_identical_files_share_a_blob(tmp_path):
+    workspace = str(tmp_path / "workspace")
+    os.makedirs(workspace)
+    snapshots = WorkspaceSnapshots(str(tmp_path / "session"))
+    write(os.path.join(workspace, "a.txt"), "same")
+    write(os.path.join(workspace, "b.txt"), "same")
+
+    snapshots.record(1, workspace)
+
+    blobs = [
+        name for root, dirs, names in os.walk(snapshots.blob_path) for name in names
+    ]
+    assert len(blobs) == 1
+
+
+def test_sessions_without_snapshots(tmp_path):
+    assert WorkspaceSnapshots.open(str(tmp_path), "session") is None
@@ -0,0 +1,37 @@
+from auto_gpt_replay.token_cache import TokenCountCache
+
+from helpers import SESSION
+
+
+def test_counts_once_per_model_and_fingerprint(tmp_path):
+    cache = TokenCountCache(str(tmp_path / "token_counts.json"))
+    counted = []
+
+    def count():
+        counted.append(1)
+        return 42
+
+    assert cache.count(b"\x01", "gpt-4", count) == 42
+    assert cache.count(b"\x01", "gpt-4", count) == 42
+    assert cache.count(b"\x01", "gpt-3.5-turbo", count) == 42
+    assert len(counted) == 2
+
+
+def test_counts_are_kept_across_replays(session_dir, recorded):
+    cache = TokenCountCache.for_session(session_dir, SESSION)
+    cache.count(b"\x02", "gpt-4", lambda: 7)
+    cache.save()
+
+    reloaded = TokenCountCache.for_session(session_dir, SESSION)
+
+    assert reloaded.count(b"\x02", "gpt-4", lambda: 0) == 7
+    assert not reloaded.dirty
+
+
+def test_unwritable_cache_is_not_an_error(tmp_path):
+    cache = TokenCountCache(str(tmp_path / "missing" / "token_counts.json"))
+    cache.count(b"\x03", "gpt-4", lambda: 1)
+
+    cache.save()
+
+    assert cache.dirty